@@ -0,0 +1,116 @@
+# analytics.py
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from result_history import RECORD, TYPE_NAMES, ResultHistory
+
+# ساختار رکوردهای فایل تاریخچه (باید با result_history.RECORD یکسان باشد)
+HISTORY_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('key', '<u8'),
+    ('delay', '<f4'),
+    ('success', 'u1'),
+    ('type', 'u1'),
+    ('pad', 'V2'),
+])
+assert HISTORY_DTYPE.itemsize == RECORD.size
+
+
+@dataclass
+class ServerAvailability:
+    keys: np.ndarray          # کلید fingerprint هر سرور
+    attempts: np.ndarray
+    availability: np.ndarray  # نسبت تست‌های موفق
+    jitter: np.ndarray        # انحراف معیار اختلاف تاخیرهای متوالی (ms)
+
+
+class HistoryAnalytics:
+    """تحلیل برداری نتایج و تاریخچه تست‌ها با NumPy"""
+
+    def __init__(self, records: np.ndarray):
+        self.timestamp = records['timestamp']
+        self.key = records['key']
+        self.delay = records['delay'].astype(np.float64)
+        self.success = records['success'].astype(bool)
+        self.type = records['type']
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @classmethod
+    def from_history(cls, history: ResultHistory) -> 'HistoryAnalytics':
+        history.flush()
+        path = history.path
+        if not path.exists() or path.stat().st_size < HISTORY_DTYPE.itemsize:
+            return cls(np.zeros(0, dtype=HISTORY_DTYPE))
+        count = path.stat().st_size // HISTORY_DTYPE.itemsize
+        # memmap: فقط ستون‌های مورد نیاز از دیسک خوانده می‌شوند
+        return cls(np.memmap(path, dtype=HISTORY_DTYPE, mode='r', shape=(count,)))
+
+    def grouped_percentiles(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, List[float]]:
+        """صدک‌های تاخیر تست‌های موفق به تفکیک نوع کانفیگ"""
+        mask = self.success
+        types = self.type[mask]
+        delays = self.delay[mask]
+        result = {}
+        # تعداد انواع کم است؛ np.percentile با partition و بدون مرتب‌سازی کامل کار می‌کند
+        for code in np.unique(types):
+            name = TYPE_NAMES.get(int(code), 'unknown')
+            result[name] = np.percentile(delays[types == code], percentiles).tolist()
+        return result
+
+    def server_availability(self) -> ServerAvailability:
+        """دسترس‌پذیری و jitter هر سرور با bincount روی کلیدهای یکتا"""
+        if not len(self):
+            empty = np.zeros(0)
+            return ServerAvailability(empty.astype(np.uint64), empty, empty, empty)
+        keys, inverse = np.unique(self.key, return_inverse=True)
+        attempts = np.bincount(inverse)
+        successes = np.bincount(inverse, weights=self.success)
+
+        # اختلاف تاخیر تست‌های موفق متوالی هر سرور؛ رکوردها به ترتیب زمان
+        # ذخیره شده‌اند و مرتب‌سازی پایدار بر اساس سرور ترتیب زمانی را حفظ می‌کند
+        order = np.argsort(inverse, kind='stable')
+        server = inverse[order]
+        delay = self.delay[order]
+        ok = self.success[order]
+        same = (server[1:] == server[:-1]) & ok[1:] & ok[:-1]
+        diffs = np.diff(delay)[same]
+        groups = server[1:][same]
+        count = np.bincount(groups, minlength=len(keys))
+        total = np.bincount(groups, weights=diffs, minlength=len(keys))
+        squares = np.bincount(groups, weights=diffs * diffs, minlength=len(keys))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            jitter = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+        jitter[count == 0] = 0.0
+        return ServerAvailability(keys, attempts, successes / attempts, jitter)
+
+    def trend(self, window_seconds: float, windows: int) -> Dict[str, np.ndarray]:
+        """نرخ موفقیت و میانگین تاخیر در پنجره‌های زمانی اخیر"""
+        if not len(self):
+            return {'start': np.zeros(0), 'tests': np.zeros(0),
+                    'success_rate': np.zeros(0), 'mean_delay': np.zeros(0), 'slope': 0.0}
+        end = float(self.timestamp.max())
+        start = end - window_seconds * windows
+        mask = self.timestamp > start
+        index = np.minimum(((self.timestamp[mask] - start) // window_seconds).astype(np.int64), windows - 1)
+        success = self.success[mask]
+        tests = np.bincount(index, minlength=windows)
+        ok = np.bincount(index, weights=success, minlength=windows)
+        delay_sum = np.bincount(index, weights=np.where(success, self.delay[mask], 0.0), minlength=windows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            success_rate = ok / tests
+            mean_delay = delay_sum / ok
+        # شیب تغییر میانگین تاخیر در هر پنجره (ms)
+        valid = ok > 0
+        slope = float(np.polyfit(np.flatnonzero(valid), mean_delay[valid], 1)[0]) if valid.sum() > 1 else 0.0
+        return {
+            'start': start + np.arange(windows) * window_seconds,
+            'tests': tests,
+            'success_rate': success_rate,
+            'mean_delay': mean_delay,
+            'slope': slope,
+        }
@@ -1,11 +1,18 @@
 # app_manager.py
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QStatusBar
-from PyQt6.QtCore import Qt, pyqtSlot
+import struct
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget, QStatusBar, QLabel
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
 
-from subscription_manager import SubscriptionTab
-from config_processor import ConfigsTab
+from subscription_manager import SubscriptionTab, normalize_link
+from config_processor import ConfigsTab, IngestDiff
 from config_tester import TestTab
 from report_generator import ReportTab
+from pipeline import PipelineWorker
+from result_history import ResultHistory
+from pool_snapshot import ConfigSnapshot, SnapshotLoader, SnapshotView, save_snapshot
+from subscription_server import DEFAULT_PORT, SubscriptionPublisher, SubscriptionServer
+from metrics import (METRICS, OPEN_SESSIONS, PARSE_LINES, PROBE_SECONDS, PROBES,
+                     PROBES_IN_FLIGHT, RateTracker)
 
 class AppManager(QMainWindow):
     def __init__(self):
@@ -21,6 +28,20 @@ class AppManager(QMainWindow):
         # ایجاد نوار وضعیت
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self._setup_metrics_panel()
+        
+        # منوی ابزارها: اجرای یک چرخه کامل با پروفایل
+        self.pipeline_worker = None
+        tools_menu = self.menuBar().addMenu("ابزارها")
+        self.profile_action = tools_menu.addAction("اجرای کامل با پروفایل")
+        self.profile_action.triggered.connect(self._run_profiled_pipeline)
+        
+        # ساب‌اسکریپشن محلی از بهترین کانفیگ‌های تست‌شده
+        self.publisher = SubscriptionPublisher()
+        self.subscription_server = None
+        self.publish_action = tools_menu.addAction("انتشار ساب‌اسکریپشن محلی")
+        self.publish_action.setCheckable(True)
+        self.publish_action.toggled.connect(self.set_publishing)
         
         # ایجاد تب‌ها
         self.tabs = QTabWidget()
@@ -30,8 +51,10 @@ class AppManager(QMainWindow):
         # ایجاد و اضافه کردن تب‌ها
         self.subscription_tab = SubscriptionTab()
         self.configs_tab = ConfigsTab()
-        self.test_tab = TestTab()
-        self.report_tab = ReportTab()
+        # یک تاریخچه مشترک؛ دو نمونه روی یک فایل رکوردهای ذخیره‌نشده یکدیگر را نمی‌بینند
+        self.history = ResultHistory()
+        self.test_tab = TestTab(history=self.history)
+        self.report_tab = ReportTab(history=self.history)
         
         self.tabs.addTab(self.subscription_tab, "مدیریت لینک‌ها")
         self.tabs.addTab(self.configs_tab, "کانفیگ‌ها")
@@ -40,18 +63,140 @@ class AppManager(QMainWindow):
         
         # اتصال سیگنال‌ها
         self._connect_signals()
+        
+        # نمایش فوری مجموعه کانفیگ‌های اجرای قبلی
+        self.snapshot = None
+        self.snapshot_loader = None
+        self._load_snapshot()
+    
+    def _connect_signals(self):
+        # مجموعه مشترک کانفیگ‌های همه لینک‌ها
+        subscription_manager = self.subscription_tab.subscription_manager
+        for link in subscription_manager.get_links():
+            weight, quota = subscription_manager.get_link_options(link)
+            self.configs_tab.set_source_options(link, weight, quota)
+        self.test_tab.set_pool(self.configs_tab.config_processor.pool)
+        
+        # اتصال سیگنال‌های بین تب‌ها
+        self.subscription_tab.subscription_updated.connect(self.configs_tab.ingest_subscription)
+        self.subscription_tab.link_removed.connect(self.configs_tab.remove_source)
+        self.subscription_tab.link_options_changed.connect(self._handle_link_options)
+        self.configs_tab.configs_changed.connect(self.test_tab.apply_diff)
+        self.configs_tab.configs_changed.connect(self._handle_configs_diff)
+        self.test_tab.results_updated.connect(self.report_tab.set_results)
+        self.test_tab.results_updated.connect(self.publisher.update)
+        self.test_tab.result_received.connect(self.report_tab.add_result)
+        self.test_tab.results_changed.connect(self.report_tab.update_results)
+        self.test_tab.results_changed.connect(self.publisher.apply)
+    
+    def _setup_metrics_panel(self):
+        # پنل متریک‌های زنده فقط وقتی متریک‌ها فعال باشند نمایش داده می‌شود
+        self.metrics_label = QLabel()
+        self.status_bar.addPermanentWidget(self.metrics_label)
+        self.metrics_label.setVisible(METRICS.enabled)
+        self.rate_tracker = RateTracker([PROBES, PARSE_LINES])
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self._update_metrics_panel)
+        if METRICS.enabled:
+            self.metrics_timer.start()
+    
+    def _update_metrics_panel(self):
+        rates = self.rate_tracker.rates()
+        self.metrics_label.setText(
+            f"تست/ث: {rates[PROBES.name]:.1f} | خط/ث: {rates[PARSE_LINES.name]:.0f} | "
+            f"در حال تست: {PROBES_IN_FLIGHT.value:.0f} | نشست: {OPEN_SESSIONS.value:.0f} | "
+            f"p50: {PROBE_SECONDS.quantile(0.5) * 1000:.0f}ms"
+        )
     
-def _connect_signals(self):
-    # اتصال سیگنال‌های بین تب‌ها
-    self.subscription_tab.configs_updated.connect(self.configs_tab.process_subscription_data)
-    self.configs_tab.configs_filtered.connect(self.test_tab.set_configs)
-    self.test_tab.results_updated.connect(self.report_tab.set_results)
-    
-    @pyqtSlot(list)
-    def _handle_configs_update(self, configs):
-        """پردازش کانفیگ‌های دریافتی از subscription و ارسال به تب کانفیگ‌ها"""
-        if configs:
-            self.configs_tab.process_subscription_data("\n".join(configs))
-            self.status_bar.showMessage("کانفیگ‌ها با موفقیت به‌روزرسانی شدند", 5000)
+    def _run_profiled_pipeline(self):
+        self.profile_action.setEnabled(False)
+        self.status_bar.showMessage("در حال اجرای چرخه کامل با پروفایل...")
+        self.pipeline_worker = PipelineWorker(
+            self.test_tab.max_configs,
+            self.configs_tab.config_processor.pool.copy(),
+            history=self.history,
+            **self.test_tab.probe_settings(),
+        )
+        self.pipeline_worker.finished.connect(self._profiled_pipeline_finished)
+        self.pipeline_worker.start()
+    
+    @pyqtSlot(bool, str)
+    def _profiled_pipeline_finished(self, success: bool, message: str):
+        self.profile_action.setEnabled(True)
+        if success:
+            self.status_bar.showMessage(f"پروفایل ذخیره شد: {message}", 10000)
         else:
-            self.status_bar.showMessage("خطا در پردازش کانفیگ‌ها", 5000)
+            self.status_bar.showMessage(f"خطا در اجرای پروفایل: {message}", 10000)
+    
+    def set_publishing(self, enabled: bool, port: int = DEFAULT_PORT):
+        if enabled and self.subscription_server is None:
+            try:
+                self.subscription_server = SubscriptionServer(self.publisher, port)
+            except OSError as e:
+                self.status_bar.showMessage(f"خطا در راه‌اندازی سرور ساب‌اسکریپشن: {e}", 10000)
+                self.publish_action.setChecked(False)
+                return
+            self.subscription_server.start()
+            self.publish_action.setChecked(True)
+            self.status_bar.showMessage(f"ساب‌اسکریپشن محلی: {self.subscription_server.url}", 10000)
+        elif not enabled and self.subscription_server is not None:
+            self.subscription_server.stop()
+            self.subscription_server = None
+    
+    def _load_snapshot(self):
+        self.snapshot = ConfigSnapshot.open()
+        if self.snapshot is None:
+            return
+        self.configs_tab.show_snapshot(SnapshotView(self.snapshot))
+        self.status_bar.showMessage(f"{len(self.snapshot)} کانفیگ از اجرای قبلی بارگذاری شد", 5000)
+        # ساخت کامل اشیا در پس‌زمینه؛ تا آن زمان جدول مستقیماً از snapshot خوانده می‌شود
+        self.snapshot_loader = SnapshotLoader(self.snapshot)
+        self.snapshot_loader.finished.connect(self._snapshot_loaded)
+        self.snapshot_loader.start()
+    
+    @pyqtSlot(object, object)
+    def _snapshot_loaded(self, sources, results):
+        # نام منابع snapshotهای قدیمی‌تر با لینک‌های یکسان‌سازی‌شده تطبیق داده می‌شود
+        links = set(self.subscription_tab.subscription_manager.get_links())
+        restored = {}
+        for source, configs in sources.items():
+            link = normalize_link(source) or source
+            if link in links:
+                for config in configs.values():
+                    config.source = link
+                restored.setdefault(link, {}).update(configs)
+        self.configs_tab.restore_pool(restored)
+        self.test_tab.set_pool(self.configs_tab.config_processor.pool)
+        self.test_tab.restore_results(results)
+        self.snapshot_loader = None
+        self.snapshot.close()
+        self.snapshot = None
+    
+    def closeEvent(self, event):
+        # نخ پایش نباید پس از بسته شدن پنجره به اجرا ادامه دهد
+        self.test_tab.stop_monitor()
+        if self.snapshot_loader is not None:
+            # بارگذاری کامل نشده؛ snapshot قبلی روی دیسک معتبر می‌ماند
+            self.snapshot_loader.wait()
+            super().closeEvent(event)
+            return
+        try:
+            save_snapshot(self.configs_tab.config_processor.pool, self.test_tab.results_by_fingerprint())
+        except (OSError, struct.error, ValueError) as e:
+            print(f"Error saving snapshot: {e}")
+        super().closeEvent(event)
+    
+    @pyqtSlot(str, int, int)
+    def _handle_link_options(self, link: str, weight: int, quota: int):
+        self.configs_tab.set_source_options(link, weight, quota)
+        self.test_tab.set_pool(self.configs_tab.config_processor.pool)
+    
+    @pyqtSlot(object)
+    def _handle_configs_diff(self, diff: IngestDiff):
+        """نمایش خلاصه تغییرات ساب‌اسکریپشن در نوار وضعیت"""
+        self.status_bar.showMessage(
+            f"{len(diff.added)} کانفیگ جدید، {len(diff.removed)} حذف‌شده، "
+            f"{diff.unchanged} بدون تغییر",
+            5000
+        )
@@ -0,0 +1,72 @@
+# benchmarks/bench_decoder.py
+"""بنچمارک رمزگشایی بدنه ساب‌اسکریپشن روی داده‌های چند مگابایتی
+
+اجرا: python benchmarks/bench_decoder.py
+"""
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from subscription_decoder import decode_subscription
+
+
+def make_plain_body(size_mb: float) -> bytes:
+    lines = []
+    total = 0
+    i = 0
+    while total < size_mb * 1024 * 1024:
+        payload = json.dumps({"v": "2", "ps": f"node-{i}", "add": f"10.0.{i % 256}.{i % 250 + 1}",
+                              "port": "443", "id": "b831381d-6324-4d53-ad4f-8cda48b30811"})
+        line = "vmess://" + base64.b64encode(payload.encode()).decode()
+        lines.append(line)
+        total += len(line) + 1
+        i += 1
+    return "\n".join(lines).encode()
+
+
+def legacy_decode(content: bytes) -> str:
+    # روش قبلی: تبدیل به str و تلاش کورکورانه برای b64decode
+    text = content.decode('utf-8')
+    try:
+        return base64.b64decode(text).decode('utf-8')
+    except Exception:
+        return text
+
+
+def measure(func, data, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size_mb: float = 8.0) -> dict:
+    plain = make_plain_body(size_mb)
+    encoded = base64.b64encode(plain)
+    urlsafe = base64.urlsafe_b64encode(plain).rstrip(b'=')
+
+    cases = {
+        "plain": plain,
+        "base64": encoded,
+        "base64_urlsafe_unpadded": urlsafe,
+    }
+    results = {}
+    for name, body in cases.items():
+        assert decode_subscription(memoryview(body)) == plain.decode()
+        new = measure(decode_subscription, body)
+        entry = {"size_mb": round(len(body) / 1024 / 1024, 2), "decode_subscription_s": round(new, 5)}
+        if name != "base64_urlsafe_unpadded":
+            # روش قبلی محتوای URL-safe بدون padding را اصلاً رمزگشایی نمی‌کند
+            entry["legacy_s"] = round(measure(legacy_decode, body), 5)
+        results[name] = entry
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,63 @@
+# benchmarks/bench_distributed.py
+"""بنچمارک تست توزیع‌شده با هماهنگ‌کننده و پردازش‌های کارگر محلی
+
+همه کارگرها از طریق StandInServer تست می‌کنند؛ بنابراین کل مسیر (اجاره،
+پروتکل NDJSON، ادغام نتایج) روی localhost اندازه‌گیری می‌شود.
+
+اجرا: python benchmarks/bench_distributed.py
+"""
+import asyncio
+import functools
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QCoreApplication
+
+from config_tester import DistributedTester
+from bench_probe import StandInTester, make_configs
+from standin_server import StandInServer
+
+SCENARIOS = (
+    # (تعداد کانفیگ، تاخیر ms، تعداد کارگر، تعداد نقطه دید برای هر کانفیگ)
+    (1000, 50.0, 1, 1),
+    (1000, 50.0, 4, 1),
+    (1000, 50.0, 4, 2),
+)
+
+
+def run_scenario(count: int, latency_ms: float, workers: int, replicas: int) -> dict:
+    configs = make_configs(count)
+    with StandInServer(latency_ms=latency_ms) as server:
+        tester = DistributedTester(
+            configs, workers=workers, replicas=replicas,
+            engine_factory=functools.partial(StandInTester, [], server.proxy_url),
+        )
+        results = []
+        tester.result.connect(results.append)
+        start = time.perf_counter()
+        asyncio.run(tester.run_tests())
+        elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "probes_per_s": round(len(results) * replicas / elapsed, 1),
+        "merged": len(results),
+        "successful": sum(1 for r in results if r.success),
+    }
+
+
+def run(scenarios=SCENARIOS) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication([])
+    return {
+        f"{count}x{int(latency)}ms_{workers}workers_{replicas}replicas":
+            run_scenario(count, latency, workers, replicas)
+        for count, latency, workers, replicas in scenarios
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
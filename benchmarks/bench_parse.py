@@ -0,0 +1,55 @@
+# benchmarks/bench_parse.py
+"""بنچمارک رمزگشایی و پارس ساب‌اسکریپشن‌های مصنوعی در اندازه‌های ۱k/۱۰k/۱۰۰k
+
+اجرا: python benchmarks/bench_parse.py
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_processor import ConfigProcessor
+from subscription_decoder import decode_subscription
+from synthetic import SIZES, make_subscription
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=SIZES, repeat: int = 3) -> dict:
+    results = {}
+    for size in sizes:
+        body = make_subscription(size)
+        text = decode_subscription(body)
+
+        def cold():
+            ConfigProcessor().ingest_subscription('bench', text)
+
+        # دریافت دوباره همان ساب‌اسکریپشن: هیچ خطی نباید دوباره پارس شود
+        processor = ConfigProcessor()
+        diff = processor.ingest_subscription('bench', text)
+
+        decode_s = best_of(lambda: decode_subscription(body), repeat)
+        ingest_s = best_of(cold, repeat)
+        reingest_s = best_of(lambda: processor.ingest_subscription('bench', text), repeat)
+        results[str(size)] = {
+            "body_mb": round(len(body) / 1024 / 1024, 3),
+            "parsed": len(diff.added),
+            "decode_s": round(decode_s, 5),
+            "ingest_s": round(ingest_s, 5),
+            "reingest_s": round(reingest_s, 5),
+            "lines_per_s": round(size / ingest_s),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,93 @@
+# benchmarks/bench_probe.py
+"""بنچمارک ConfigTester در برابر سرور محلی با تاخیر و نرخ خطای قابل تنظیم
+
+به جای اتصال واقعی، همه کانفیگ‌ها از طریق StandInServer به عنوان پروکسی
+HTTP تست می‌شوند؛ بنابراین فقط سربار خود تستر (زمان‌بندی، سشن‌ها،
+همزمانی) اندازه‌گیری می‌شود.
+
+اجرا: python benchmarks/bench_probe.py
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QCoreApplication
+
+from config_processor import ConfigProcessor
+from config_tester import ConfigTester
+from probe_targets import MODE_AGGREGATE, MODE_RACE, ProbeTarget
+from standin_server import StandInServer
+from synthetic import make_lines
+
+SCENARIOS = (
+    # (تعداد کانفیگ، تاخیر ms، نرخ خطا، حالت ترکیب مقصدها)
+    (200, 20.0, 0.0, MODE_RACE),
+    (200, 100.0, 0.0, MODE_RACE),
+    (200, 20.0, 0.2, MODE_RACE),
+    (200, 20.0, 0.2, MODE_AGGREGATE),
+)
+# مقصدها فقط مسیر درخواست را تعیین می‌کنند؛ همه از سرور محلی عبور می‌کنند
+TARGETS = (
+    ProbeTarget('http://probe-a.test/generate_204', expected_status=(204,)),
+    ProbeTarget('http://probe-b.test/', method='HEAD'),
+    ProbeTarget('http://probe-c.test/generate_204', expected_status=(204,)),
+)
+
+
+class StandInTester(ConfigTester):
+    """تستری که همه کانفیگ‌ها را از سرور محلی عبور می‌دهد"""
+
+    def __init__(self, configs, proxy_url: str, mode: str = MODE_RACE):
+        # تلاش مجدد یک ثانیه صبر می‌کند و نتیجه را بی‌معنی می‌کند
+        super().__init__(configs, max_retries=1, targets=TARGETS, mode=mode)
+        self.proxy_url = proxy_url
+
+    def _get_proxy_url(self, config) -> str:
+        return self.proxy_url
+
+
+def make_configs(count: int):
+    processor = ConfigProcessor()
+    configs = processor.process_subscription_data("\n".join(make_lines(count * 2, kinds=('vmess',))))
+    return configs[:count]
+
+
+def run_scenario(count: int, latency_ms: float, failure_rate: float, mode: str = MODE_RACE) -> dict:
+    configs = make_configs(count)
+    with StandInServer(latency_ms=latency_ms, failure_rate=failure_rate) as server:
+        tester = StandInTester(configs, server.proxy_url, mode)
+        results = []
+        tester.result.connect(results.append)
+        start = time.perf_counter()
+        asyncio.run(tester.run_tests())
+        elapsed = time.perf_counter() - start
+    delays = [r.delay for r in results if r.success]
+    return {
+        "configs": count,
+        "latency_ms": latency_ms,
+        "failure_rate": failure_rate,
+        "mode": mode,
+        "elapsed_s": round(elapsed, 4),
+        "probes_per_s": round(len(results) / elapsed, 1),
+        "successful": len(delays),
+        "median_delay_ms": round(statistics.median(delays), 2) if delays else None,
+        # سربار تستر نسبت به تاخیر واقعی سرور
+        "overhead_ms": round(statistics.median(delays) - latency_ms, 2) if delays else None,
+    }
+
+
+def run(scenarios=SCENARIOS) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication([])
+    return {
+        f"{count}x{int(latency)}ms_fail{failure:.0%}_{mode}": run_scenario(count, latency, failure, mode)
+        for count, latency, failure, mode in scenarios
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,75 @@
+# benchmarks/bench_report.py
+"""بنچمارک آمار، خروجی CSV/NDJSON، گزارش PDF و نمودار روی نتایج مصنوعی
+
+اجرا: python benchmarks/bench_report.py
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from charts import CHART_ECDF, CHART_HISTOGRAM, ChartData, ChartRenderer
+from config_processor import ConfigProcessor
+from config_tester import TestResult
+from exporters import result_record, write_csv, write_ndjson
+from pdf_report import build_pdf_report, result_to_row
+from report_stats import StatsAccumulator
+from synthetic import make_lines
+
+SIZES = (1_000, 10_000, 100_000)
+# جدول کامل PDF برای اندازه‌های بزرگ بیش از حد کند است
+PDF_FULL_LIMIT = 10_000
+
+
+def make_results(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    configs = ConfigProcessor().process_subscription_data("\n".join(make_lines(count, kinds=('vmess',))))
+    results = []
+    for config in configs:
+        if rng.random() < 0.7:
+            results.append(TestResult(config, rng.lognormvariate(5.0, 0.6), True))
+        else:
+            results.append(TestResult(config, float('inf'), False, "Timeout"))
+    return results
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return round(time.perf_counter() - start, 5)
+
+
+def run(sizes=SIZES) -> dict:
+    results = {}
+    renderer = ChartRenderer()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        for size in sizes:
+            test_results = make_results(size)
+            stats = StatsAccumulator()
+            entry = {"summary_s": timed(lambda: stats.extend(test_results) or stats.summary())}
+            summary = stats.summary()
+            entry["csv_s"] = timed(lambda: write_csv(test_results, str(out / 'r.csv')))
+            entry["csv_gz_s"] = timed(lambda: write_csv(test_results, str(out / 'r.csv.gz')))
+            entry["ndjson_s"] = timed(
+                lambda: write_ndjson((result_record(r) for r in test_results), str(out / 'r.jsonl'))
+            )
+            rows = [result_to_row(r) for r in test_results]
+            entry["pdf_top100_s"] = timed(lambda: build_pdf_report(rows, summary, str(out / 't.pdf'), 100))
+            if size <= PDF_FULL_LIMIT:
+                entry["pdf_full_s"] = timed(lambda: build_pdf_report(rows, summary, str(out / 'f.pdf')))
+            data = ChartData.from_results(test_results)
+            entry["chart_histogram_s"] = timed(lambda: renderer.render_png(CHART_HISTOGRAM, data))
+            entry["chart_ecdf_s"] = timed(lambda: renderer.render_png(CHART_ECDF, data))
+            # بار دوم از کش خوانده می‌شود
+            entry["chart_cached_s"] = timed(lambda: renderer.render_png(CHART_HISTOGRAM, data))
+            results[str(size)] = entry
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,67 @@
+# benchmarks/bench_throughput.py
+"""بنچمارک مرحله تست سرعت در برابر سرور payload محلی
+
+اجرا: python benchmarks/bench_throughput.py
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QCoreApplication
+
+from config_tester import ThroughputTester
+from bench_probe import make_configs
+from standin_server import StandInServer
+
+SCENARIOS = (
+    # (تعداد کانفیگ، پهنای باند هر اتصال در سرور Mbps، سقف کل Mbps، تعداد جریان)
+    (3, 40.0, 0, 4),
+    (3, 40.0, 80, 4),
+    (3, 0.0, 200, 2),
+)
+
+
+class StandInThroughputTester(ThroughputTester):
+    def __init__(self, configs, server: StandInServer, **kwargs):
+        super().__init__(configs, payload_url='http://payload.test/__down?bytes={bytes}', **kwargs)
+        self.server = server
+
+    def _get_proxy_url(self, config) -> str:
+        return self.server.proxy_url
+
+
+def run_scenario(count: int, bandwidth: float, limit: float, streams: int) -> dict:
+    configs = make_configs(count)
+    with StandInServer(latency_ms=5, bandwidth_mbps=bandwidth) as server:
+        tester = StandInThroughputTester(configs, server, payload_mb=8, streams=streams,
+                                         rate_limit_mbps=limit)
+        results = []
+        tester.throughput_result.connect(results.append)
+        start = time.perf_counter()
+        asyncio.run(tester.run_tests())
+        elapsed = time.perf_counter() - start
+    ok = [r for r in results if r.success]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "successful": len(ok),
+        "mean_mbps": round(sum(r.mbps for r in ok) / len(ok), 1) if ok else None,
+        "max_stall_s": round(max(r.stall_time for r in ok), 3) if ok else None,
+        "mean_jitter_ms": round(sum(r.jitter_ms for r in ok) / len(ok), 2) if ok else None,
+    }
+
+
+def run(scenarios=SCENARIOS) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication([])
+    return {
+        f"{count}cfg_server{int(bandwidth)}mbps_limit{int(limit)}_x{streams}":
+            run_scenario(count, bandwidth, limit, streams)
+        for count, bandwidth, limit, streams in scenarios
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
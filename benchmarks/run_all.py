@@ -0,0 +1,98 @@
+# benchmarks/run_all.py
+"""اجرای همه بنچمارک‌ها و ذخیره نتیجه به صورت JSON برای مقایسه در طول زمان
+
+اجرا:
+    python benchmarks/run_all.py                 # اجرای کامل
+    python benchmarks/run_all.py --quick         # اندازه‌های کوچک
+    python benchmarks/run_all.py --compare old.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import bench_decoder
+import bench_distributed
+import bench_parse
+import bench_probe
+import bench_report
+import bench_throughput
+
+RESULTS_DIR = BENCH_DIR / 'results'
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ''
+
+
+def run(quick: bool = False) -> dict:
+    sizes = (1_000, 10_000) if quick else bench_parse.SIZES
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "decoder": bench_decoder.run(1.0 if quick else 8.0),
+        "parse": bench_parse.run(sizes),
+        "probe": bench_probe.run(bench_probe.SCENARIOS[:1] if quick else bench_probe.SCENARIOS),
+        "distributed": bench_distributed.run(
+            bench_distributed.SCENARIOS[:1] if quick else bench_distributed.SCENARIOS
+        ),
+        "report": bench_report.run(sizes),
+        "throughput": bench_throughput.run(bench_throughput.SCENARIOS[:1] if quick else bench_throughput.SCENARIOS),
+    }
+
+
+def _flatten(data, prefix=''):
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and name.endswith('_s') \
+                and not name.endswith('_per_s'):
+            yield name, value
+
+
+def compare(old: dict, new: dict):
+    """چاپ نسبت زمان‌های جدید به قبلی (کمتر از ۱ یعنی سریع‌تر)"""
+    before = dict(_flatten({k: v for k, v in old.items() if k != 'meta'}))
+    for name, value in _flatten({k: v for k, v in new.items() if k != 'meta'}):
+        if before.get(name):
+            print(f"{name:60s} {before[name]:>10.5f} -> {value:>10.5f}  x{value / before[name]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--compare', type=Path, default=None)
+    parser.add_argument('--output', type=Path, default=None)
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare is not None:
+        compare(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/standin_server.py
+"""سرور HTTP محلی که نقش پروکسی/مقصد تست را بازی می‌کند
+
+هر درخواست با تاخیر قابل تنظیم پاسخ داده می‌شود و با نرخ خطای مشخص
+پاسخ 503 برمی‌گرداند. مسیرهای generate_204 پاسخ 204 و درخواست‌های HEAD
+فقط هدر دریافت می‌کنند. درخواست‌هایی با پارامتر bytes=N (مانند
+/__down?bytes=N) به اندازه N بایت داده با پهنای باند قابل تنظیم دریافت
+می‌کنند تا تست سرعت هم بدون شبکه قابل اجرا باشد. سرور روی یک event loop جداگانه در نخ
+پس‌زمینه اجرا می‌شود تا ConfigTester بتواند asyncio.run خودش را داشته باشد.
+"""
+import asyncio
+import random
+import re
+import threading
+from typing import Optional
+
+RESPONSE = (b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+            b"Content-Length: 2\r\nConnection: close\r\n\r\nok")
+NO_CONTENT = b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+FAILURE = (b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n"
+           b"Connection: close\r\n\r\n")
+PAYLOAD_CHUNK = 64 * 1024
+BYTES_PARAM = re.compile(rb'[?&]bytes=(\d+)')
+
+
+class StandInServer:
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                 failure_rate: float = 0.0, seed: int = 0, host: str = '127.0.0.1',
+                 bandwidth_mbps: float = 0.0):
+        self.latency_ms = latency_ms
+        # پهنای باند هر اتصال در حالت payload؛ صفر یعنی نامحدود
+        self.bandwidth_mbps = bandwidth_mbps
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.host = host
+        self.port = 0
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # فقط هدرهای درخواست خوانده می‌شود
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line = head.split(b"\r\n", 1)[0]
+            self.requests += 1
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            await asyncio.sleep(delay)
+            if self._rng.random() < self.failure_rate:
+                self.failures += 1
+                writer.write(FAILURE)
+            else:
+                payload = BYTES_PARAM.search(request_line)
+                if payload:
+                    await self._send_payload(writer, int(payload.group(1)))
+                elif b'generate_204' in request_line:
+                    writer.write(NO_CONTENT)
+                elif request_line.startswith(b'HEAD '):
+                    writer.write(RESPONSE[:RESPONSE.index(b"\r\n\r\n") + 4])
+                else:
+                    writer.write(RESPONSE)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_payload(self, writer: asyncio.StreamWriter, size: int):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+                     b"Content-Length: %d\r\nConnection: close\r\n\r\n" % size)
+        chunk = b"\0" * PAYLOAD_CHUNK
+        rate = self.bandwidth_mbps * 1_000_000 / 8
+        remaining = size
+        while remaining > 0:
+            part = chunk[:min(remaining, PAYLOAD_CHUNK)]
+            writer.write(part)
+            await writer.drain()
+            remaining -= len(part)
+            if rate:
+                await asyncio.sleep(len(part) / rate)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, 0, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        # اتصال‌های باز در حال ارسال payload لغو می‌شوند
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._server.close()
+        self._loop.run_until_complete(self._server.wait_closed())
+        self._loop.close()
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,169 @@
+# charts.py
+import hashlib
+import io
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+CHART_HISTOGRAM = 'histogram'
+CHART_ECDF = 'ecdf'
+CHART_BOXPLOT = 'boxplot'
+CHART_TIMESERIES = 'timeseries'
+CHART_KINDS = (CHART_HISTOGRAM, CHART_ECDF, CHART_BOXPLOT, CHART_TIMESERIES)
+
+# حداکثر تعداد نقاط رسم‌شده برای ECDF
+MAX_ECDF_POINTS = 2000
+HISTOGRAM_BINS = 60
+CACHE_SIZE = 16
+
+
+class ChartData:
+    """داده‌های عددی مورد نیاز نمودارها؛ از نتایج تست یا تاریخچه ساخته می‌شود"""
+
+    def __init__(self, delays: np.ndarray, types: Sequence[str] = (),
+                 trend: Optional[Dict[str, np.ndarray]] = None):
+        self.delays = np.asarray(delays, dtype=np.float64)
+        self.types = np.asarray(types) if len(types) else np.zeros(0, dtype=str)
+        self.trend = trend
+
+    @classmethod
+    def from_results(cls, results: Sequence) -> 'ChartData':
+        successful = [r for r in results if r.success]
+        return cls(
+            np.fromiter((r.delay for r in successful), dtype=np.float64, count=len(successful)),
+            [r.config.type for r in successful],
+        )
+
+    def digest(self, kind: str) -> str:
+        hasher = hashlib.blake2b(kind.encode(), digest_size=16)
+        hasher.update(self.delays.tobytes())
+        if kind == CHART_BOXPLOT:
+            hasher.update('\0'.join(self.types.tolist()).encode())
+        if kind == CHART_TIMESERIES and self.trend is not None:
+            for name in ('start', 'tests', 'success_rate', 'mean_delay'):
+                hasher.update(np.asarray(self.trend[name]).tobytes())
+        return hasher.hexdigest()
+
+
+class ChartRenderer:
+    """رسم نمودار با API شیءگرای Agg (بدون وضعیت سراسری pyplot)"""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self._cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.cache_size = cache_size
+
+    def render(self, kind: str, data: ChartData, filename: str) -> bool:
+        try:
+            png = self.render_png(kind, data)
+            if png is None:
+                return False
+            with open(filename, 'wb') as f:
+                f.write(png)
+            return True
+        except Exception as e:
+            print(f"Error generating chart: {e}")
+            return False
+
+    def render_png(self, kind: str, data: ChartData) -> Optional[bytes]:
+        # اگر ورودی تغییر نکرده باشد، خروجی قبلی دوباره استفاده می‌شود
+        key = data.digest(kind)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        figure = Figure(figsize=(10, 5))
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot()
+        drawers = {
+            CHART_HISTOGRAM: self._histogram,
+            CHART_ECDF: self._ecdf,
+            CHART_BOXPLOT: self._boxplot,
+            CHART_TIMESERIES: self._timeseries,
+        }
+        if not drawers[kind](ax, data):
+            return None
+        figure.tight_layout()
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format='png', dpi=100)
+        png = buffer.getvalue()
+        self._cache[key] = png
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png
+
+    @staticmethod
+    def _histogram(ax, data: ChartData) -> bool:
+        if not len(data.delays):
+            return False
+        # np.histogram روی همه داده‌ها؛ فقط تعداد ثابتی میله رسم می‌شود
+        counts, edges = np.histogram(data.delays, bins=HISTOGRAM_BINS)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge')
+        ax.set_xlabel('Delay (ms)')
+        ax.set_ylabel('Configs')
+        ax.set_title(f'Delay Histogram (n={len(data.delays)})')
+        return True
+
+    @staticmethod
+    def _ecdf(ax, data: ChartData) -> bool:
+        if not len(data.delays):
+            return False
+        delays = np.sort(data.delays)
+        n = len(delays)
+        if n > MAX_ECDF_POINTS:
+            # نمونه‌برداری یکنواخت روی صدک‌ها
+            index = np.linspace(0, n - 1, MAX_ECDF_POINTS).astype(np.int64)
+        else:
+            index = np.arange(n)
+        ax.step(delays[index], (index + 1) / n, where='post')
+        ax.set_xlabel('Delay (ms)')
+        ax.set_ylabel('Fraction of configs')
+        ax.set_ylim(0, 1.01)
+        ax.set_title(f'Delay ECDF (n={n})')
+        ax.grid(True, alpha=0.3)
+        return True
+
+    @staticmethod
+    def _boxplot(ax, data: ChartData) -> bool:
+        if not len(data.delays) or len(data.types) != len(data.delays):
+            return False
+        stats = []
+        for config_type in np.unique(data.types):
+            delays = data.delays[data.types == config_type]
+            # آمار جعبه با numpy محاسبه و فقط نتیجه به matplotlib داده می‌شود
+            q1, median, q3 = np.percentile(delays, (25, 50, 75))
+            iqr = q3 - q1
+            low = delays[delays >= q1 - 1.5 * iqr].min()
+            high = delays[delays <= q3 + 1.5 * iqr].max()
+            stats.append({
+                'label': f'{config_type} (n={len(delays)})',
+                'med': median, 'q1': q1, 'q3': q3,
+                'whislo': low, 'whishi': high, 'fliers': [],
+            })
+        ax.bxp(stats, showfliers=False)
+        ax.set_ylabel('Delay (ms)')
+        ax.set_title('Delay by Config Type')
+        return True
+
+    @staticmethod
+    def _timeseries(ax, data: ChartData) -> bool:
+        trend = data.trend
+        if trend is None or not np.any(trend['tests']):
+            return False
+        valid = trend['tests'] > 0
+        times = [datetime.fromtimestamp(t) for t in trend['start'][valid]]
+        ax.plot(times, trend['mean_delay'][valid], marker='o', label='Mean delay (ms)')
+        ax.set_ylabel('Delay (ms)')
+        ax.set_title('Delay and Success Rate over Time')
+        rate_ax = ax.twinx()
+        rate_ax.plot(times, trend['success_rate'][valid] * 100, color='tab:green',
+                     linestyle='--', label='Success rate (%)')
+        rate_ax.set_ylabel('Success rate (%)')
+        rate_ax.set_ylim(0, 105)
+        ax.figure.autofmt_xdate()
+        return True
@@ -0,0 +1,90 @@
+# config_pool.py
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set
+
+if TYPE_CHECKING:
+    from config_processor import ConfigData
+
+@dataclass
+class SourceOptions:
+    weight: int = 1
+    quota: int = 0  # حداکثر تعداد کانفیگ انتخابی از این منبع؛ صفر یعنی بدون محدودیت
+
+class ConfigPool:
+    """مجموعه ادغام‌شده کانفیگ‌های همه ساب‌اسکریپشن‌ها
+
+    کانفیگ‌های هر منبع جداگانه و بر اساس fingerprint نگهداری می‌شوند؛
+    انتخاب برای تست با وزن و سهمیه هر منبع در ConfigSampler انجام می‌شود.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Dict[str, 'ConfigData']] = {}
+        self._options: Dict[str, SourceOptions] = {}
+        # تعداد منابعی که هر fingerprint را دارند؛ یک خط می‌تواند در چند منبع باشد
+        self._refs: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._refs
+
+    def refcount(self, fingerprint: str) -> int:
+        return self._refs.get(fingerprint, 0)
+
+    def __iter__(self) -> Iterator['ConfigData']:
+        """هر fingerprint یک بار، از اولین منبعی که آن را دارد"""
+        seen: Set[str] = set()
+        for configs in self._sources.values():
+            for fingerprint, config in configs.items():
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    yield config
+
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    def source_configs(self, source: str) -> Dict[str, 'ConfigData']:
+        return self._sources.get(source, {})
+
+    def copy(self) -> 'ConfigPool':
+        """کپی مستقل فهرست‌های منابع و تنظیمات (خود ConfigDataها مشترک می‌مانند)"""
+        pool = ConfigPool()
+        for source, configs in self._sources.items():
+            pool.replace_source(source, dict(configs))
+        for source, options in self._options.items():
+            pool.set_source_options(source, options.weight, options.quota)
+        return pool
+
+    def options(self, source: str) -> SourceOptions:
+        return self._options.get(source) or SourceOptions()
+
+    def set_source_options(self, source: str, weight: int = 1, quota: int = 0):
+        self._options[source] = SourceOptions(weight=max(1, weight), quota=max(0, quota))
+
+    def _unref(self, fingerprints) -> List[str]:
+        """کاهش شمارنده‌ها؛ fingerprintهایی که دیگر در هیچ منبعی نیستند برگردانده می‌شوند"""
+        orphaned = []
+        for fingerprint in fingerprints:
+            count = self._refs[fingerprint] - 1
+            if count:
+                self._refs[fingerprint] = count
+            else:
+                del self._refs[fingerprint]
+                orphaned.append(fingerprint)
+        return orphaned
+
+    def replace_source(self, source: str, configs: Dict[str, 'ConfigData']) -> List[str]:
+        """جایگزینی کانفیگ‌های یک منبع؛ fingerprintهای کاملا حذف‌شده از مجموعه را برمی‌گرداند"""
+        previous = self._sources.get(source, {})
+        for fingerprint in configs:
+            if fingerprint not in previous:
+                self._refs[fingerprint] = self._refs.get(fingerprint, 0) + 1
+        self._sources[source] = configs
+        return self._unref(fp for fp in previous if fp not in configs)
+
+    def remove_source(self, source: str) -> List[str]:
+        """حذف منبع؛ فقط fingerprintهایی که منبع دیگری ندارند برگردانده می‌شوند"""
+        configs = self._sources.pop(source, {})
+        self._options.pop(source, None)
+        return self._unref(configs)
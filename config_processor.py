@@ -1,22 +1,46 @@
 # config_processor.py
 import json
-import base64
+import hashlib
+import ipaddress
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from json.decoder import scanstring
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import unquote
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QTableWidget, QTableWidgetItem, QComboBox, QLabel,
-                           QMessageBox, QFileDialog)
-from PyQt6.QtCore import Qt
+                           QTableView, QComboBox, QLabel,
+                           QMessageBox, QFileDialog, QProgressBar)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
 from PyQt6.QtCore import pyqtSignal
 
-@dataclass
+from subscription_decoder import decode_subscription, decode_base64_token
+from config_pool import ConfigPool
+from transport_profile import PROFILE_PARAMS, TransportProfile, profile_from_params
+from exporters import ExportWorker, write_json_array, write_ndjson
+from metrics import INGEST_SECONDS, PARSE_FAILURES, PARSE_LINES
+
+@dataclass(slots=True)
 class ConfigData:
     type: str
     name: str
     server: str
     port: int
-    raw_config: dict
+    # جزئیات کامل (transport، TLS، SNI، ...) تا اولین فراخوانی decode() ساخته نمی‌شود
+    raw_config: Optional[dict] = None
+    uri: str = ""
+    fingerprint: str = ""
+    source: str = ""
+    
+    def decode(self) -> dict:
+        """رمزگشایی کامل کانفیگ از روی URI؛ فقط هنگام تست، خروجی یا نمایش جزئیات"""
+        if self.raw_config is None:
+            parser = PARSERS_BY_TYPE.get(self.type)
+            try:
+                self.raw_config = parser.decode(self.uri) if parser and self.uri else {}
+            except Exception as e:
+                print(f"Error decoding config: {e}")
+                self.raw_config = {}
+        return self.raw_config
     
     def to_json(self) -> dict:
         return {
@@ -24,118 +48,228 @@ class ConfigData:
             "name": self.name,
             "server": self.server,
             "port": self.port,
-            "raw_config": self.raw_config
+            "raw_config": {
+                key: value.to_json() if isinstance(value, TransportProfile) else value
+                for key, value in self.decode().items()
+            }
         }
 
+def config_fingerprint(config_str: str) -> str:
+    """شناسه پایدار یک خط کانفیگ برای مقایسه نسخه‌های مختلف ساب‌اسکریپشن"""
+    return hashlib.blake2b(config_str.encode('utf-8'), digest_size=8).hexdigest()
+
+@dataclass
+class IngestDiff:
+    """تفاوت یک ساب‌اسکریپشن با نسخه قبلی آن"""
+    source: str
+    added: List[ConfigData] = field(default_factory=list)
+    # fingerprint کانفیگ‌هایی که دیگر در هیچ منبعی نیستند
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def is_empty(self) -> bool:
+        return not self.added and not self.removed
+
 class ConfigParser(ABC):
+    """پارس دو مرحله‌ای: scan فقط فیلدهای شاخص و decode جزئیات کامل"""
+
     @abstractmethod
     def can_parse(self, config_str: str) -> bool:
         pass
     
     @abstractmethod
-    def parse(self, config_str: str) -> Optional[ConfigData]:
+    def scan(self, config_str: str) -> Optional[ConfigData]:
+        """مرحله سریع: فقط نوع، نام، سرور و پورت؛ raw_config خالی می‌ماند"""
+        pass
+    
+    @abstractmethod
+    def decode(self, config_str: str) -> dict:
+        """مرحله کامل: همه پارامترهای کانفیگ"""
         pass
+    
+    def parse(self, config_str: str) -> Optional[ConfigData]:
+        config = self.scan(config_str)
+        if config is not None:
+            config.raw_config = self.decode(config_str)
+        return config
+
+def _parse_query(query: str) -> Dict[str, str]:
+    """پارامترهای query با رمزگشایی درصدی RFC 3986؛ '+' به فاصله تبدیل نمی‌شود"""
+    params = {}
+    for item in query.split('&'):
+        if item:
+            key, _, value = item.partition('=')
+            params[unquote(key)] = unquote(value)
+    return params
 
-class TrojanParser(ConfigParser):
+class UriConfigParser(ConfigParser):
+    """پارسر کانفیگ‌های scheme://credential@host:port?query#name طبق RFC 3986"""
+    scheme = ""
+    credential_key = ""
+    default_name = ""
+    # امنیت پیش‌فرض پروتکل وقتی پارامتر security در URI نیست
+    default_security = "none"
+    
     def can_parse(self, config_str: str) -> bool:
         try:
-            return config_str.startswith('trojan://')
+            return config_str.startswith(self.scheme + '://')
         except:
             return False
     
-    def parse(self, config_str: str) -> Optional[ConfigData]:
-        try:
-            # حذف پیشوند پروتکل
-            config_str = config_str.replace('trojan://', '')
-            
-            # جداسازی اجزای آدرس
-            parts = config_str.split('@')
-            if len(parts) != 2:
+    def _split(self, config_str: str):
+        """(userinfo، host، port، query، fragment) رمزگشایی‌شده یا None برای URI نامعتبر"""
+        rest = config_str[len(self.scheme) + 3:]
+        # ترتیب جداسازی طبق RFC 3986: fragment، سپس query، سپس path
+        rest, _, fragment = rest.partition('#')
+        rest, _, query = rest.partition('?')
+        userinfo, at, hostport = rest.partition('/')[0].rpartition('@')
+        if hostport.startswith('['):
+            # IPv6 داخل براکت
+            host, bracket, port = hostport[1:].partition(']')
+            if not bracket or not port.startswith(':'):
                 return None
-                
-            password = parts[0]
-            server_parts = parts[1].split(':')
-            if len(server_parts) != 2:
+            host = ipaddress.IPv6Address(host).compressed
+            port = port[1:]
+        else:
+            host, _, port = hostport.rpartition(':')
+            if ':' in host:
                 return None
-                
-            server, port = server_parts
-            port = int(port)
-            
-            return ConfigData(
-                type="trojan",
-                name=f"Trojan-{server}",
-                server=server,
-                port=port,
-                raw_config={
-                    "password": password,
-                    "server": server,
-                    "port": port
-                }
-            )
-        except:
+            host = unquote(host).lower()
+        if not at or not userinfo or not host or not (port.isascii() and port.isdigit()):
             return None
-
-class VmessParser(ConfigParser):
-    def can_parse(self, config_str: str) -> bool:
-        try:
-            return config_str.startswith('vmess://')
-        except:
-            return False
+        port = int(port)
+        if not 0 < port < 65536:
+            return None
+        return unquote(userinfo), host, port, query, fragment
     
-    def parse(self, config_str: str) -> Optional[ConfigData]:
+    def scan(self, config_str: str) -> Optional[ConfigData]:
         try:
-            # حذف پیشوند پروتکل و رمزگشایی Base64
-            config_str = config_str.replace('vmess://', '')
-            decoded = base64.b64decode(config_str).decode('utf-8')
-            config = json.loads(decoded)
-            
+            split = self._split(config_str)
+            if split is None:
+                return None
+            _, host, port, _, fragment = split
             return ConfigData(
-                type="vmess",
-                name=config.get('ps', f"Vmess-{config['add']}"),
-                server=config['add'],
-                port=int(config['port']),
-                raw_config=config
+                type=self.scheme,
+                name=unquote(fragment) or f"{self.default_name}-{host}",
+                server=host,
+                port=port
             )
         except:
             return None
+    
+    def decode(self, config_str: str) -> dict:
+        credential, host, port, query, _ = self._split(config_str)
+        params = _parse_query(query)
+        raw = {
+            self.credential_key: credential,
+            "server": host,
+            "port": port,
+            # پروفایل انتقال بین همه کانفیگ‌های با پارامترهای یکسان مشترک است
+            "transport": profile_from_params(params, self.default_security, host),
+        }
+        extra = {key: value for key, value in params.items() if key not in PROFILE_PARAMS}
+        if extra:
+            raw["params"] = extra
+        return raw
+
+class TrojanParser(UriConfigParser):
+    scheme = "trojan"
+    credential_key = "password"
+    default_name = "Trojan"
+    default_security = "tls"
+
+def _json_field(payload: bytes, key: bytes) -> Optional[str]:
+    """خواندن مقدار رشته‌ای یا عددی یک کلید سطح اول از JSON بدون پارس کل سند
+
+    فقط "key" بعد از { یا , و پیش از : کلید حساب می‌شود. برای کلید
+    ناموجود None و برای هر حالت غیرعادی (مقدار null یا تو در تو، کلید
+    تکراری) ValueError برمی‌گردد تا فراخواننده به json.loads برگردد.
+    """
+    needle = b'"%s"' % key
+    found = None
+    start = payload.find(needle)
+    while start >= 0:
+        before = start - 1
+        while before >= 0 and payload[before] in b' \t\r\n':
+            before -= 1
+        after = start + len(needle)
+        while after < len(payload) and payload[after] in b' \t\r\n':
+            after += 1
+        if before >= 0 and payload[before] in b'{,' and payload[after:after + 1] == b':':
+            if found is not None:
+                raise ValueError(f"Duplicate key {key!r}")
+            found = after + 1
+        start = payload.find(needle, start + 1)
+    if found is None:
+        return None
+    start = found
+    while payload[start] in b' \t\r\n':
+        start += 1
+    if payload[start] == 0x22:  # '"'
+        # scanstring (پیاده‌سازی C ماژول json) escapeها را مانند json.loads رمزگشایی می‌کند
+        return scanstring(payload[start:].decode('utf-8'), 1)[0]
+    end = start
+    while end < len(payload) and payload[end] in b'0123456789':
+        end += 1
+    if end == start:
+        raise ValueError(f"Unsupported value for {key!r}")
+    return payload[start:end].decode('ascii')
+
+def _vmess_fields(payload: bytes) -> Tuple[Optional[str], Optional[str], object]:
+    """(add, ps, port) با مسیر سریع؛ سند تو در تو یا غیرعادی با json.loads خوانده می‌شود"""
+    if payload.count(b'{') == 1 and b'[' not in payload:
+        try:
+            return _json_field(payload, b'add'), _json_field(payload, b'ps'), _json_field(payload, b'port')
+        except ValueError:
+            pass
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("VMess payload is not an object")
+    return data.get('add'), data.get('ps'), data.get('port')
 
-class VlessParser(ConfigParser):
+class VmessParser(ConfigParser):
     def can_parse(self, config_str: str) -> bool:
         try:
-            return config_str.startswith('vless://')
+            return config_str.startswith('vmess://')
         except:
             return False
     
-    def parse(self, config_str: str) -> Optional[ConfigData]:
+    def _payload(self, config_str: str) -> bytes:
+        # حذف پیشوند پروتکل و رمزگشایی Base64
+        return decode_base64_token(config_str.replace('vmess://', ''))
+    
+    def scan(self, config_str: str) -> Optional[ConfigData]:
         try:
-            # پیاده‌سازی پارسر VLESS
-            # مشابه Trojan با پارامترهای اضافی
-            config_str = config_str.replace('vless://', '')
-            parts = config_str.split('@')
-            if len(parts) != 2:
+            # فقط فیلدهای شاخص از JSON رمزگشایی‌شده خوانده می‌شوند
+            server, name, port = _vmess_fields(self._payload(config_str))
+            if not server or not isinstance(server, str) or isinstance(port, bool):
                 return None
-                
-            uuid = parts[0]
-            server_parts = parts[1].split('?')[0].split(':')
-            if len(server_parts) != 2:
-                return None
-                
-            server, port = server_parts
             port = int(port)
-            
+            if not 1 <= port <= 65535:
+                return None
             return ConfigData(
-                type="vless",
-                name=f"Vless-{server}",
+                type="vmess",
+                name=name if isinstance(name, str) and name else f"Vmess-{server}",
                 server=server,
-                port=port,
-                raw_config={
-                    "uuid": uuid,
-                    "server": server,
-                    "port": port
-                }
+                port=port
             )
         except:
             return None
+    
+    def decode(self, config_str: str) -> dict:
+        return json.loads(self._payload(config_str))
+
+class VlessParser(UriConfigParser):
+    scheme = "vless"
+    credential_key = "uuid"
+    default_name = "Vless"
+
+# پارسر هر نوع برای رمزگشایی تنبل ConfigData.decode
+PARSERS_BY_TYPE: Dict[str, ConfigParser] = {
+    "trojan": TrojanParser(),
+    "vmess": VmessParser(),
+    "vless": VlessParser(),
+}
 
 class ConfigProcessor:
     def __init__(self):
@@ -145,55 +279,223 @@ class ConfigProcessor:
             VlessParser()
             # می‌توان پارسرهای دیگر را هم اضافه کرد
         ]
-        self.configs: List[ConfigData] = []
+        # فهرست تخت کانفیگ‌ها فقط هنگام نیاز (فیلتر یا ذخیره) از روی pool ساخته می‌شود
+        self._configs: Optional[List[ConfigData]] = []
+        # مجموعه ادغام‌شده همه ساب‌اسکریپشن‌ها (آخرین نسخه هر منبع)
+        self.pool = ConfigPool()
+        # خطوطی که قبلاً پارس نشده‌اند تا در به‌روزرسانی بعدی دوباره پارس نشوند
+        self._rejected: Dict[str, Set[str]] = {}
     
-def process_subscription_data(self, data: str) -> bool:
-    try:
-        # تلاش برای رمزگشایی base64 اگر محتوا کدگذاری شده باشد
+    @property
+    def configs(self) -> List[ConfigData]:
+        if self._configs is None:
+            self._configs = list(self.pool)
+        return self._configs
+
+    @configs.setter
+    def configs(self, configs: List[ConfigData]):
+        self._configs = configs
+
+    def _split_lines(self, data: Union[str, bytes, List[str]]) -> List[str]:
+        if isinstance(data, list):
+            return data
+        # رمزگشایی یکباره بدنه (base64 یا متن ساده)
+        return decode_subscription(data).splitlines()
+
+    def process_subscription_data(self, data: Union[str, bytes, List[str]]) -> List[ConfigData]:
         try:
-            decoded_data = base64.b64decode(data).decode('utf-8')
-        except:
-            decoded_data = data
-            
-        # تقسیم به خطوط جداگانه و حذف خطوط خالی
-        config_lines = [line.strip() for line in decoded_data.split('\n') if line.strip()]
-        
-        successful_configs = []
-        for config_str in config_lines:
-            config = self.config_processor.process_single_config(config_str)
-            if config:
-                successful_configs.append(config)
-        
-        if successful_configs:
-            self._update_table(successful_configs)
-            self.configs_filtered.emit(successful_configs)
-            return True
-        return False
-    except Exception as e:
-        print(f"Error processing subscription data: {e}")
-        return False
-    
-    def process_single_config(self, config_str: str) -> Optional[ConfigData]:
+            config_lines = self._split_lines(data)
+
+            successful_configs = []
+            for config_str in config_lines:
+                config_str = config_str.strip()
+                if not config_str:
+                    continue
+                config = self.process_single_config(config_str)
+                if config:
+                    successful_configs.append(config)
+
+            self.configs = successful_configs
+            return successful_configs
+        except Exception as e:
+            print(f"Error processing subscription data: {e}")
+            return []
+
+    def ingest_subscription(self, source: str, data: Union[str, bytes, List[str]]) -> IngestDiff:
+        """مقایسه ساب‌اسکریپشن با نسخه قبلی و پارس کردن فقط خطوط جدید"""
+        diff = IngestDiff(source=source)
+        try:
+            with INGEST_SECONDS.time():
+                self._ingest(source, data, diff)
+        except Exception as e:
+            print(f"Error ingesting subscription: {e}")
+        return diff
+
+    def _ingest(self, source: str, data: Union[str, bytes, List[str]], diff: IngestDiff):
+        previous = self.pool.source_configs(source)
+        previous_rejected = self._rejected.get(source, set())
+        current: Dict[str, ConfigData] = {}
+        rejected: Set[str] = set()
+
+        for config_str in self._split_lines(data):
+            config_str = config_str.strip()
+            if not config_str:
+                continue
+            fingerprint = config_fingerprint(config_str)
+            if fingerprint in current or fingerprint in rejected:
+                continue
+
+            config = previous.get(fingerprint)
+            if config is not None:
+                diff.unchanged += 1
+            elif fingerprint in previous_rejected:
+                rejected.add(fingerprint)
+                continue
+            else:
+                config = self.process_single_config(config_str, fingerprint)
+                if config is None:
+                    rejected.add(fingerprint)
+                    continue
+                config.source = source
+                diff.added.append(config)
+            current[fingerprint] = config
+
+        changed = bool(diff.added) or len(previous) != diff.unchanged
+        diff.removed = self.pool.replace_source(source, current)
+        # خطی که منبع دیگری هم دارد قبلا در جدول و تست‌ها هست
+        diff.added = [c for c in diff.added if self.pool.refcount(c.fingerprint) == 1]
+        self._rejected[source] = rejected
+        if changed:
+            self._configs = None
+
+    def restore(self, sources: Dict[str, Dict[str, ConfigData]]):
+        """بازگردانی منابع از snapshot؛ منابعی که در این فاصله دریافت شده‌اند دست نمی‌خورند"""
+        for source, configs in sources.items():
+            if not self.pool.source_configs(source):
+                self.pool.replace_source(source, configs)
+        self._configs = None
+
+    def remove_source(self, source: str) -> IngestDiff:
+        removed = self.pool.remove_source(source)
+        self._rejected.pop(source, None)
+        self._configs = None
+        return IngestDiff(source=source, removed=removed)
+
+    def process_single_config(self, config_str: str, fingerprint: Optional[str] = None) -> Optional[ConfigData]:
+        """مرحله سریع پارس؛ جزئیات کامل با ConfigData.decode در صورت نیاز ساخته می‌شود"""
+        PARSE_LINES.inc()
         for parser in self.parsers:
             if parser.can_parse(config_str):
-                return parser.parse(config_str)
+                config = parser.scan(config_str)
+                if config is not None:
+                    config.uri = config_str
+                    config.fingerprint = fingerprint or config_fingerprint(config_str)
+                    return config
+                break
+        PARSE_FAILURES.inc()
         return None
     
-    def save_configs(self, filename: str) -> bool:
+    def save_configs(self, filename: str, progress=None) -> bool:
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json_data = [config.to_json() for config in self.configs]
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            # نوشتن کانفیگ به کانفیگ بدون ساختن کل JSON در حافظه
+            records = (config.to_json() for config in list(self.configs))
+            if filename.endswith(('.jsonl', '.ndjson', '.jsonl.gz', '.ndjson.gz', '.jsonl.zst', '.ndjson.zst')):
+                write_ndjson(records, filename, progress)
+            else:
+                write_json_array(records, filename, progress)
             return True
         except Exception as e:
             print(f"Error saving configs: {e}")
             return False
 
+class ConfigTableModel(QAbstractTableModel):
+    """مدل جدول کانفیگ‌ها با امکان اعمال تغییرات جزئی به جای بازسازی کامل"""
+    HEADERS = ["نام", "نوع", "سرور", "پورت"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[ConfigData] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            # نمایش جزئیات؛ کانفیگ فقط همین‌جا به طور کامل رمزگشایی می‌شود
+            details = self._rows[index.row()].decode()
+            return "\n".join(f"{key}: {value}" for key, value in details.items())
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        config = self._rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return config.name
+        if column == 1:
+            return config.type
+        if column == 2:
+            return config.server
+        return str(config.port)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def set_configs(self, configs: Sequence[ConfigData]):
+        self.beginResetModel()
+        # دنباله‌های تنبل (مانند SnapshotView) کپی نمی‌شوند تا رکوردها فقط هنگام نمایش ساخته شوند
+        self._rows = list(configs) if isinstance(configs, (list, tuple)) else configs
+        self.endResetModel()
+
+    def _materialize(self):
+        if not isinstance(self._rows, list):
+            self._rows = list(self._rows)
+
+    def add_configs(self, configs: List[ConfigData]):
+        if not configs:
+            return
+        self._materialize()
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(configs) - 1)
+        self._rows.extend(configs)
+        self.endInsertRows()
+
+    def remove_fingerprints(self, fingerprints: Set[str]):
+        if not fingerprints:
+            return
+        self._materialize()
+        rows = [i for i, config in enumerate(self._rows) if config.fingerprint in fingerprints]
+        if not rows:
+            return
+        if len(rows) > 100:
+            # برای تعداد زیاد، بازسازی مدل ارزان‌تر از حذف تک‌تک ردیف‌هاست
+            self.set_configs([c for c in self._rows if c.fingerprint not in fingerprints])
+            return
+        # حذف از انتها به ابتدا، هر بار یک بازه پیوسته
+        end = len(rows) - 1
+        while end >= 0:
+            start = end
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            self.beginRemoveRows(QModelIndex(), rows[start], rows[end])
+            del self._rows[rows[start]:rows[end] + 1]
+            self.endRemoveRows()
+            end = start - 1
+
 class ConfigsTab(QWidget):
     configs_filtered = pyqtSignal(list)  # اضافه کردن این خط
+    configs_changed = pyqtSignal(object)  # IngestDiff هر ساب‌اسکریپشن
     def __init__(self, parent=None):
         super().__init__(parent)
         self.config_processor = ConfigProcessor()
+        self.save_worker = None
+        # نمای snapshot تا زمان بارگذاری کامل مجموعه کانفیگ‌ها
+        self._snapshot_view = None
         self._init_ui()
     
     def _init_ui(self):
@@ -210,9 +512,9 @@ class ConfigsTab(QWidget):
         layout.addLayout(filter_layout)
         
         # جدول کانفیگ‌ها
-        self.configs_table = QTableWidget()
-        self.configs_table.setColumnCount(4)
-        self.configs_table.setHorizontalHeaderLabels(["نام", "نوع", "سرور", "پورت"])
+        self.configs_model = ConfigTableModel(self)
+        self.configs_table = QTableView()
+        self.configs_table.setModel(self.configs_model)
         self.configs_table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.configs_table)
         
@@ -222,26 +524,61 @@ class ConfigsTab(QWidget):
         self.save_button.clicked.connect(self._save_configs)
         buttons_layout.addWidget(self.save_button)
         layout.addLayout(buttons_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
     
-    def process_subscription_data(self, data: str):
+    def process_subscription_data(self, data):
         configs = self.config_processor.process_subscription_data(data)
         self._update_table(configs)
+        if configs:
+            self.configs_filtered.emit(configs)
         return len(configs) > 0
     
+    def ingest_subscription(self, source: str, data):
+        diff = self.config_processor.ingest_subscription(source, data)
+        if not diff.is_empty():
+            # فقط تغییرات به جدول اعمال می‌شود
+            self.configs_model.remove_fingerprints(set(diff.removed))
+            self.configs_model.add_configs(
+                [config for config in diff.added if self._matches_filter(config)]
+            )
+            self.configs_changed.emit(diff)
+        return diff
+    
+    def remove_source(self, source: str):
+        diff = self.config_processor.remove_source(source)
+        if not diff.is_empty():
+            self.configs_model.remove_fingerprints(set(diff.removed))
+            self.configs_changed.emit(diff)
+    
+    def set_source_options(self, source: str, weight: int, quota: int):
+        self.config_processor.pool.set_source_options(source, weight, quota)
+    
+    def show_snapshot(self, view):
+        """نمایش فوری کانفیگ‌های ذخیره‌شده پیش از بارگذاری کامل"""
+        self._snapshot_view = view
+        self._apply_filters()
+    
+    def restore_pool(self, sources: Dict[str, Dict[str, ConfigData]]):
+        self.config_processor.restore(sources)
+        self._snapshot_view = None
+        self._apply_filters()
+    
     def _update_table(self, configs: List[ConfigData]):
-        self.configs_table.setRowCount(0)
-        for config in configs:
-            row = self.configs_table.rowCount()
-            self.configs_table.insertRow(row)
-            
-            self.configs_table.setItem(row, 0, QTableWidgetItem(config.name))
-            self.configs_table.setItem(row, 1, QTableWidgetItem(config.type))
-            self.configs_table.setItem(row, 2, QTableWidgetItem(config.server))
-            self.configs_table.setItem(row, 3, QTableWidgetItem(str(config.port)))
+        self.configs_model.set_configs(configs)
+    
+    def _matches_filter(self, config: ConfigData) -> bool:
+        selected_type = self.config_type_filter.currentText()
+        return selected_type == "همه" or config.type == selected_type
     
     def _apply_filters(self):
         selected_type = self.config_type_filter.currentText()
-        if selected_type == "همه":
+        if self._snapshot_view is not None:
+            # فیلتر روی ستون نوع snapshot بدون ساختن رکوردها
+            self._update_table(self._snapshot_view.of_type(None if selected_type == "همه" else selected_type))
+        elif selected_type == "همه":
             self._update_table(self.config_processor.configs)
         else:
             filtered_configs = [
@@ -259,11 +596,27 @@ class ConfigsTab(QWidget):
             self,
             "ذخیره کانفیگ‌ها",
             "",
-            "JSON Files (*.json);;All Files (*.*)"
+            "JSON Files (*.json);;JSON Lines (*.jsonl);;Gzip JSON Lines (*.jsonl.gz);;All Files (*.*)"
         )
         
         if filename:
-            if self.config_processor.save_configs(filename):
-                QMessageBox.information(self, "موفق", "کانفیگ‌ها با موفقیت ذخیره شدند")
-            else:
-                QMessageBox.warning(self, "خطا", "خطا در ذخیره‌سازی کانفیگ‌ها")
+            def job(progress):
+                if not self.config_processor.save_configs(filename, progress):
+                    raise RuntimeError("save failed")
+            
+            # ذخیره‌سازی در پس‌زمینه تا رابط کاربری قفل نشود
+            self.save_button.setEnabled(False)
+            self.progress_bar.setValue(0)
+            self.progress_bar.show()
+            self.save_worker = ExportWorker(job, filename, len(self.config_processor.configs))
+            self.save_worker.progress.connect(self.progress_bar.setValue)
+            self.save_worker.finished.connect(self._save_finished)
+            self.save_worker.start()
+    
+    def _save_finished(self, success: bool, message: str):
+        self.progress_bar.hide()
+        self.save_button.setEnabled(True)
+        if success:
+            QMessageBox.information(self, "موفق", "کانفیگ‌ها با موفقیت ذخیره شدند")
+        else:
+            QMessageBox.warning(self, "خطا", "خطا در ذخیره‌سازی کانفیگ‌ها")
@@ -0,0 +1,164 @@
+# config_sampler.py
+import ipaddress
+import math
+import random
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from result_history import ResultHistory, ServerStats, fingerprint_key
+
+if TYPE_CHECKING:
+    from config_processor import ConfigData
+    from config_pool import ConfigPool
+
+# ضریب اکتشاف در UCB1؛ مقدار بیشتر یعنی تست بیشتر سرورهای کم‌تست‌شده
+EXPLORATION = 0.5
+
+# در هر طبقه حداکثر این ضریب از تعداد مورد نیاز برای تنوع شبکه‌ها بررسی می‌شود
+CANDIDATE_FACTOR = 4
+
+_IPV4_NETWORK = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3})\.\d{1,3}')
+_FLAG = re.compile('[\U0001F1E6-\U0001F1FF]{2}')
+_REGIONAL_A = 0x1F1E6
+
+
+@lru_cache(maxsize=1 << 17)
+def network_key(server: str) -> str:
+    """شبکه /24 برای IPv4، /48 برای IPv6 و دامنه اصلی برای نام‌های دامنه"""
+    if ':' in server:
+        try:
+            address = ipaddress.IPv6Address(server.strip('[]'))
+            return str(ipaddress.IPv6Network(f"{address}/48", strict=False))
+        except ValueError:
+            return server
+    match = _IPV4_NETWORK.fullmatch(server)
+    if match:
+        return match.group(1) + '.0/24'
+    return '.'.join(server.lower().rstrip('.').split('.')[-2:])
+
+
+def country_code(name: str) -> str:
+    """کد کشور از پرچم ایموجی در نام کانفیگ (مثلاً 🇩🇪 → DE)"""
+    match = _FLAG.search(name)
+    if not match:
+        return ''
+    return ''.join(chr(ord(char) - _REGIONAL_A + 65) for char in match.group())
+
+
+class ConfigSampler:
+    """انتخاب طبقه‌بندی‌شده کانفیگ‌ها برای تست
+
+    منابع به صورت round-robin وزن‌دار، و در هر منبع طبقه‌های (نوع، کشور)
+    به نوبت انتخاب می‌شوند. در هر طبقه کانفیگ‌ها بر اساس امتیاز UCB1 از
+    تاریخچه تست‌ها مرتب می‌شوند و شبکه‌های /24 تکراری به انتهای صف می‌روند.
+    """
+
+    def __init__(self, history: ResultHistory, exploration: float = EXPLORATION,
+                 rng: Optional[random.Random] = None):
+        self.history = history
+        self.exploration = exploration
+        self.rng = rng or random.Random()
+
+    def _ucb(self, stats: ServerStats) -> float:
+        total = max(self.history.total_attempts, 1)
+        bonus = self.exploration * math.sqrt(math.log(total + 1) / stats.attempts)
+        return stats.mean_reward + bonus
+
+    def score(self, config: 'ConfigData') -> float:
+        stats = self.history.get(config.fingerprint)
+        if stats is None or stats.attempts == 0:
+            # سرورهای تست‌نشده اولویت اکتشاف دارند
+            return math.inf
+        return self._ucb(stats)
+
+    def _order_stratum(self, configs: List['ConfigData'], limit: int) -> List['ConfigData']:
+        history_stats = self.history.stats
+        untested: List['ConfigData'] = []
+        tested: List[Tuple[float, 'ConfigData']] = []
+        for config in configs:
+            stats = history_stats.get(fingerprint_key(config.fingerprint))
+            if stats is None or stats.attempts == 0:
+                untested.append(config)
+            else:
+                tested.append((self._ucb(stats), config))
+
+        # فقط چند برابر limit بررسی می‌شود تا برای تنوع شبکه‌ها جا باشد
+        window = limit * CANDIDATE_FACTOR
+        ordered = self.rng.sample(untested, min(window, len(untested)))
+        if len(ordered) < window:
+            tested.sort(key=lambda item: item[0], reverse=True)
+            ordered.extend(config for _, config in tested[:window - len(ordered)])
+
+        # بهترین کانفیگ هر شبکه اول، سپس دومین‌ها و ...
+        seen: Dict[str, int] = defaultdict(int)
+        ranked: List[Tuple[int, int, 'ConfigData']] = []
+        for position, config in enumerate(ordered):
+            network = network_key(config.server)
+            ranked.append((seen[network], position, config))
+            seen[network] += 1
+        ranked.sort(key=lambda item: (item[0], item[1]))
+        return [config for _, _, config in ranked[:limit]]
+
+    def _sample_source(self, configs: List['ConfigData'], count: int) -> List['ConfigData']:
+        if count <= 0:
+            return []
+        strata: Dict[Tuple[str, str], List['ConfigData']] = defaultdict(list)
+        for config in configs:
+            strata[(config.type, country_code(config.name))].append(config)
+
+        queues = [queue for queue in (self._order_stratum(members, count) for members in strata.values())
+                  if queue]
+        # طبقه‌ای که بهترین امتیاز را دارد زودتر انتخاب می‌شود
+        queues.sort(key=lambda queue: self.score(queue[0]), reverse=True)
+
+        selected: List['ConfigData'] = []
+        depth = 0
+        while len(selected) < count and queues:
+            queues = [queue for queue in queues if depth < len(queue)]
+            for queue in queues:
+                if len(selected) >= count:
+                    break
+                selected.append(queue[depth])
+            depth += 1
+        return selected
+
+    def select(self, pool: 'ConfigPool', count: int) -> List['ConfigData']:
+        """انتخاب count کانفیگ از کل مجموعه با رعایت وزن و سهمیه منابع"""
+        if count <= 0:
+            return []
+        queues: Dict[str, List['ConfigData']] = {}
+        for source in pool.sources():
+            configs = list(pool.source_configs(source).values())
+            limit = min(count, pool.options(source).quota or count)
+            queue = self._sample_source(configs, limit)
+            if queue:
+                queues[source] = queue
+
+        # round-robin وزن‌دار بین منابع
+        positions = {source: 0 for source in queues}
+        current_weight = {source: 0 for source in queues}
+        selected: List['ConfigData'] = []
+        chosen: Set[str] = set()
+        while len(selected) < count and positions:
+            total = 0
+            best = None
+            for source in positions:
+                weight = pool.options(source).weight
+                current_weight[source] += weight
+                total += weight
+                if best is None or current_weight[source] > current_weight[best]:
+                    best = source
+            current_weight[best] -= total
+
+            queue = queues[best]
+            config = queue[positions[best]]
+            # خطی که در چند منبع هست فقط یک بار انتخاب می‌شود
+            if config.fingerprint not in chosen:
+                chosen.add(config.fingerprint)
+                selected.append(config)
+            positions[best] += 1
+            if positions[best] >= len(queue):
+                del positions[best]
+        return selected
@@ -1,15 +1,29 @@
 # config_tester.py
 import asyncio
+import functools
+import multiprocessing
+import os
 import aiohttp
-import time
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QTableWidget, QTableWidgetItem, QProgressBar,
-                           QLabel, QSpinBox, QMessageBox)
+                           QLabel, QSpinBox, QMessageBox, QCheckBox, QComboBox,
+                           QLineEdit)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from config_processor import ConfigData
-from PyQt6.QtCore import pyqtSignal
+from config_processor import ConfigData, IngestDiff
+from config_sampler import ConfigSampler
+from result_history import ResultHistory
+from profiler import profile_thread, run_async
+from probe_targets import (DEFAULT_TARGETS, MODE_AGGREGATE, MODE_RACE, ProbeTarget,
+                           format_targets, parse_targets, run_probe)
+from health_monitor import HealthMonitor
+from distributed import DEFAULT_CONCURRENCY, Coordinator, new_token, run_worker
+from throughput import (DEFAULT_PAYLOAD_MB, DEFAULT_PAYLOAD_URL, DEFAULT_RATE_LIMIT_MBPS,
+                        DEFAULT_STREAMS, DEFAULT_TOP_K, ThroughputResult, TokenBucket,
+                        measure_throughput, select_top_k)
+from metrics import OPEN_SESSIONS, PROBE_SECONDS, PROBE_SUCCESSES, PROBES, PROBES_IN_FLIGHT
 
 @dataclass
 class TestResult:
@@ -23,28 +37,38 @@ class ConfigTester(QThread):
     result = pyqtSignal(TestResult)
     finished = pyqtSignal()
 
-    def __init__(self, configs: List[ConfigData], max_retries: int = 3):
+    def __init__(self, configs: List[ConfigData], max_retries: int = 3,
+                 targets: Sequence[ProbeTarget] = DEFAULT_TARGETS, mode: str = MODE_RACE):
         super().__init__()
         self.configs = configs
         self.max_retries = max_retries
+        self.targets = tuple(targets) or DEFAULT_TARGETS
+        self.mode = mode
         self.stop_flag = False
 
     async def test_single_config(self, config: ConfigData) -> TestResult:
-        start_time = time.time()
-        
+        PROBES_IN_FLIGHT.inc()
+        try:
+            with PROBE_SECONDS.time():
+                result = await self._probe(config)
+        finally:
+            PROBES_IN_FLIGHT.dec()
+        PROBES.inc()
+        if result.success:
+            PROBE_SUCCESSES.inc()
+        return result
+
+    async def _probe(self, config: ConfigData) -> TestResult:
         for attempt in range(self.max_retries):
             try:
+                OPEN_SESSIONS.inc()
                 async with aiohttp.ClientSession() as session:
                     # تنظیم پروکسی بر اساس نوع کانفیگ
                     proxy_url = self._get_proxy_url(config)
                     
-                    # تست اتصال با استفاده از پروکسی
-                    async with session.get('http://www.google.com', 
-                                        proxy=proxy_url,
-                                        timeout=aiohttp.ClientTimeout(total=10)) as response:
-                        if response.status == 200:
-                            delay = (time.time() - start_time) * 1000  # تبدیل به میلی‌ثانیه
-                            return TestResult(config=config, delay=delay, success=True)
+                    # تست اتصال با مقصدهای سبک؛ فقط هدر پاسخ خوانده می‌شود
+                    delay = await run_probe(session, self.targets, proxy_url, self.mode)
+                    return TestResult(config=config, delay=delay, success=True)
             
             except asyncio.TimeoutError:
                 if attempt == self.max_retries - 1:
@@ -62,6 +86,8 @@ class ConfigTester(QThread):
                         success=False,
                         error=str(e)
                     )
+            finally:
+                OPEN_SESSIONS.dec()
             
             if self.stop_flag:
                 return TestResult(
@@ -83,13 +109,14 @@ class ConfigTester(QThread):
 
     def _get_proxy_url(self, config: ConfigData) -> str:
         # ساخت URL پروکسی بر اساس نوع کانفیگ
+        server = f"[{config.server}]" if ':' in config.server else config.server
         if config.type == "trojan":
-            return f"trojan://{config.raw_config['password']}@{config.server}:{config.port}"
+            return f"trojan://{quote(config.decode()['password'], safe='')}@{server}:{config.port}"
         elif config.type == "vmess":
             # ساخت URL برای VMess نیاز به پارامترهای بیشتری دارد
-            return f"vmess://{config.server}:{config.port}"
+            return f"vmess://{server}:{config.port}"
         elif config.type == "vless":
-            return f"vless://{config.raw_config['uuid']}@{config.server}:{config.port}"
+            return f"vless://{quote(config.decode()['uuid'], safe='')}@{server}:{config.port}"
         # می‌توان انواع دیگر را هم اضافه کرد
         return ""
 
@@ -108,10 +135,11 @@ class ConfigTester(QThread):
             
             # محدود کردن تعداد تست‌های همزمان
             if len(tasks) >= 5:
-                done, tasks = await asyncio.wait(
+                done, pending = await asyncio.wait(
                     tasks,
                     return_when=asyncio.FIRST_COMPLETED
                 )
+                tasks = list(pending)
                 
                 for task in done:
                     result = await task
@@ -129,17 +157,133 @@ class ConfigTester(QThread):
                 self.progress.emit(int((completed / total) * 100))
 
     def run(self):
-        asyncio.run(self.run_tests())
+        profile_thread(run_async, self.run_tests())
         self.finished.emit()
 
     def stop(self):
         self.stop_flag = True
 
+class ThroughputTester(ConfigTester):
+    """مرحله تست سرعت دانلود برای کانفیگ‌های برتر از نظر تاخیر"""
+    throughput_result = pyqtSignal(object)
+
+    def __init__(self, configs: List[ConfigData], payload_url: str = DEFAULT_PAYLOAD_URL,
+                 payload_mb: float = DEFAULT_PAYLOAD_MB, streams: int = DEFAULT_STREAMS,
+                 rate_limit_mbps: float = DEFAULT_RATE_LIMIT_MBPS):
+        super().__init__(configs)
+        self.payload_url = payload_url
+        self.payload_mb = payload_mb
+        self.streams = streams
+        self.rate_limit_mbps = rate_limit_mbps
+
+    async def run_tests(self):
+        # کانفیگ‌ها یکی‌یکی تست می‌شوند تا برای پهنای باند با هم رقابت نکنند
+        bucket = TokenBucket.from_mbps(self.rate_limit_mbps)
+        total = len(self.configs)
+        for completed, config in enumerate(self.configs, 1):
+            if self.stop_flag:
+                break
+            result = await measure_throughput(
+                config, self._get_proxy_url(config), self.payload_url,
+                self.payload_mb, self.streams, bucket
+            )
+            self.throughput_result.emit(result)
+            self.progress.emit(int(completed / total * 100))
+
+def run_worker_process(host: str, port: int, engine_factory: Callable[[], ConfigTester],
+                       name: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                       token: str = ''):
+    """نقطه ورود پردازش کارگر (محلی یا روی ماشین دیگر)؛ یک حلقه رویداد در هر پردازش"""
+    engine = engine_factory()
+    try:
+        run_async(run_worker(host, port, engine, name, concurrency, token=token))
+    except OSError as e:
+        print(f"Error connecting to coordinator {host}:{port}: {e}")
+
+class DistributedTester(ConfigTester):
+    """اجرای هماهنگ‌کننده و پخش تست‌ها بین پردازش‌های کارگر محلی و/یا ماشین‌های دیگر"""
+
+    def __init__(self, configs: List[ConfigData], workers: int = os.cpu_count() or 1,
+                 host: str = '127.0.0.1', port: int = 0, replicas: int = 1, max_retries: int = 3,
+                 targets: Sequence[ProbeTarget] = DEFAULT_TARGETS, mode: str = MODE_RACE,
+                 engine_factory: Optional[Callable[[], ConfigTester]] = None,
+                 token: Optional[str] = None):
+        super().__init__(configs, max_retries, targets, mode)
+        # با پورت تصادفی (0) کارگر راه دور نمی‌تواند وصل شود و فقط کارگرهای محلی هستند
+        if not port and replicas > workers:
+            raise ValueError(f"replicas ({replicas}) cannot exceed local workers ({workers}) "
+                             "without a coordinator port for remote workers")
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.replicas = replicas
+        # کارگرهای راه دور باید همین توکن را داشته باشند
+        self.token = token or new_token()
+        self.engine_factory = engine_factory or functools.partial(
+            ConfigTester, [], self.max_retries, self.targets, self.mode
+        )
+        self.coordinator = None
+
+    async def run_tests(self):
+        total = len(self.configs)
+        completed = 0
+
+        def emit(config, success, delay, error):
+            nonlocal completed
+            completed += 1
+            self.result.emit(TestResult(config=config, delay=delay, success=success, error=error))
+            self.progress.emit(int(completed / total * 100))
+
+        self.coordinator = Coordinator(self.configs, self.host, self.port, self.replicas,
+                                       on_result=emit, token=self.token)
+        await self.coordinator.start()
+        if self.stop_flag:
+            self.coordinator.stop()
+        # پردازش‌های کارگر با spawn ساخته می‌شوند تا نخ‌های Qt در fork کپی نشوند
+        context = multiprocessing.get_context('spawn')
+        connect_host = '127.0.0.1' if self.host in ('', '0.0.0.0') else self.host
+        processes = [
+            context.Process(
+                target=run_worker_process,
+                args=(connect_host, self.coordinator.port, self.engine_factory, f"local-{i + 1}"),
+                kwargs={'token': self.token},
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            # بدون کارگر محلی، فقط کارگرهای راه دور (یا توقف) اجرا را پایان می‌دهند
+            alive = (lambda: any(p.is_alive() for p in processes)) if processes else None
+            await self.coordinator.run(alive)
+        finally:
+            for process in processes:
+                await asyncio.to_thread(process.join, 5)
+                if process.is_alive():
+                    process.terminate()
+
+    def stop(self):
+        super().stop()
+        if self.coordinator is not None:
+            self.coordinator.stop()
+
 class TestTab(QWidget):
     results_updated = pyqtSignal(list)  # اضافه کردن این خط
-    def __init__(self, parent=None):
+    result_received = pyqtSignal(object)  # هر نتیجه به محض دریافت
+    results_changed = pyqtSignal(list)  # فقط نتایجی که جایگزین نتیجه قبلی همان کانفیگ شده‌اند
+    def __init__(self, parent=None, history: Optional[ResultHistory] = None):
         super().__init__(parent)
         self.test_results: List[TestResult] = []
+        self.configs: List[ConfigData] = []
+        # نتایج قبلی بر اساس fingerprint تا پس از به‌روزرسانی ساب‌اسکریپشن حفظ شوند
+        self._results_by_fp: Dict[str, TestResult] = {}
+        self._throughput_by_fp: Dict[str, ThroughputResult] = {}
+        self.throughput_tester = None
+        self.monitor = None
+        self.pool = None  # ConfigPool مشترک با تب کانفیگ‌ها
+        self.history = history or ResultHistory()
+        self.sampler = ConfigSampler(self.history)
         self.max_configs = 50
         self._init_ui()
 
@@ -150,18 +294,55 @@ class TestTab(QWidget):
         settings_layout = QHBoxLayout()
         settings_layout.addWidget(QLabel("حداکثر تعداد کانفیگ:"))
         self.max_configs_spin = QSpinBox()
-        self.max_configs_spin.setRange(1, 100)
+        self.max_configs_spin.setRange(1, 1000)
         self.max_configs_spin.setValue(self.max_configs)
         self.max_configs_spin.valueChanged.connect(self._update_max_configs)
         settings_layout.addWidget(self.max_configs_spin)
+        
+        # تعداد پردازش‌های کارگر؛ صفر یعنی تست در همین پردازش
+        settings_layout.addWidget(QLabel("پردازش‌های موازی:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(0, (os.cpu_count() or 1) * 2)
+        self.workers_spin.setValue(0)
+        settings_layout.addWidget(self.workers_spin)
+        
+        # تست سرعت اختیاری برای K کانفیگ برتر
+        self.throughput_check = QCheckBox("تست سرعت برای برترین‌ها:")
+        settings_layout.addWidget(self.throughput_check)
+        self.top_k_spin = QSpinBox()
+        self.top_k_spin.setRange(1, 50)
+        self.top_k_spin.setValue(DEFAULT_TOP_K)
+        settings_layout.addWidget(self.top_k_spin)
+        settings_layout.addWidget(QLabel("سقف (Mbps):"))
+        self.rate_limit_spin = QSpinBox()
+        self.rate_limit_spin.setRange(1, 1000)
+        self.rate_limit_spin.setValue(DEFAULT_RATE_LIMIT_MBPS)
+        settings_layout.addWidget(self.rate_limit_spin)
         settings_layout.addStretch()
         layout.addLayout(settings_layout)
         
+        # مقصدهای تست و نحوه ترکیب نتایج آن‌ها
+        targets_layout = QHBoxLayout()
+        targets_layout.addWidget(QLabel("مقصدهای تست:"))
+        self.targets_input = QLineEdit(format_targets(DEFAULT_TARGETS))
+        self.targets_input.setPlaceholderText("http://.../generate_204, HEAD https://...")
+        self.targets_input.setLayoutDirection(Qt.LayoutDirection.LeftToRight)
+        targets_layout.addWidget(self.targets_input)
+        self.probe_mode_combo = QComboBox()
+        self.probe_mode_combo.addItem("اولین پاسخ", MODE_RACE)
+        self.probe_mode_combo.addItem("همه مقصدها", MODE_AGGREGATE)
+        targets_layout.addWidget(self.probe_mode_combo)
+        # پایش پیوسته در پس‌زمینه با فاصله‌های تست مجدد بر اساس رده
+        self.monitor_check = QCheckBox("پایش خودکار")
+        self.monitor_check.toggled.connect(self._toggle_monitor)
+        targets_layout.addWidget(self.monitor_check)
+        layout.addLayout(targets_layout)
+        
         # جدول نتایج
         self.results_table = QTableWidget()
-        self.results_table.setColumnCount(5)
+        self.results_table.setColumnCount(6)
         self.results_table.setHorizontalHeaderLabels(
-            ["نام", "نوع", "سرور", "تاخیر (ms)", "وضعیت"]
+            ["نام", "نوع", "سرور", "تاخیر (ms)", "سرعت (Mbps)", "وضعیت"]
         )
         self.results_table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.results_table)
@@ -185,26 +366,105 @@ class TestTab(QWidget):
 
     def _update_max_configs(self, value):
         self.max_configs = value
+        if self.pool is not None:
+            self._select_from_pool()
+
+    def set_pool(self, pool):
+        self.pool = pool
+        self._select_from_pool()
+
+    def _select_from_pool(self):
+        # انتخاب طبقه‌بندی‌شده از همه منابع بر اساس وزن، سهمیه و تاریخچه تست‌ها
+        self.configs = self.sampler.select(self.pool, self.max_configs)
+        if self.monitor is not None:
+            self.monitor.set_configs(self.configs)
 
     def set_configs(self, configs: List[ConfigData]):
         self.configs = configs[:self.max_configs]
         self.test_results.clear()
+        self._results_by_fp.clear()
+        self._throughput_by_fp.clear()
         self.results_table.setRowCount(0)
+        if self.monitor is not None:
+            self.monitor.set_configs(self.configs)
+
+    def apply_diff(self, diff: IngestDiff):
+        """اعمال تغییرات یک ساب‌اسکریپشن بدون از دست دادن نتایج کانفیگ‌های بدون تغییر"""
+        removed = set(diff.removed)
+        if removed:
+            self.configs = [c for c in self.configs if c.fingerprint not in removed]
+            for fingerprint in removed:
+                self._results_by_fp.pop(fingerprint, None)
+                self._throughput_by_fp.pop(fingerprint, None)
+            before = len(self.test_results)
+            self.test_results = [
+                r for r in self.test_results if r.config.fingerprint not in removed
+            ]
+            if len(self.test_results) != before:
+                self._update_results_table()
+            self.results_updated.emit(self.all_results())
+
+        # کانفیگ‌های جدید در صف تست قرار می‌گیرند
+        if self.pool is not None:
+            self._select_from_pool()
+            return
+        free = self.max_configs - len(self.configs)
+        if free > 0:
+            self.configs.extend(diff.added[:free])
+
+    def all_results(self) -> List[TestResult]:
+        """آخرین نتیجه (موفق یا ناموفق) هر کانفیگ تست‌شده"""
+        return list(self._results_by_fp.values())
+
+    def probe_settings(self) -> Dict:
+        """مقصدها، حالت تست و تعداد کارگرهای انتخاب‌شده در رابط گرافیکی"""
+        return {
+            'targets': parse_targets(self.targets_input.text()) or DEFAULT_TARGETS,
+            'mode': self.probe_mode_combo.currentData(),
+            'workers': self.workers_spin.value(),
+        }
+
+    def results_by_fingerprint(self) -> Dict[str, TestResult]:
+        """کپی آخرین نتیجه هر کانفیگ بر اساس fingerprint (برای snapshot)"""
+        return dict(self._results_by_fp)
+
+    def restore_results(self, results: Sequence[tuple]):
+        """بازگردانی آخرین نتایج از snapshot؛ نتایج جدیدتر این اجرا حفظ می‌شوند"""
+        for config, success, delay, error in results:
+            self._results_by_fp.setdefault(config.fingerprint, TestResult(config, delay, success, error))
+        self.test_results = [r for r in self._results_by_fp.values() if r.success]
+        self._update_results_table()
+        self.results_updated.emit(self.all_results())
+
+    def _pending_configs(self) -> List[ConfigData]:
+        return [c for c in self.configs if c.fingerprint not in self._results_by_fp]
 
     def start_tests(self):
-        if not hasattr(self, 'configs') or not self.configs:
+        if not self.configs:
             QMessageBox.warning(self, "خطا", "هیچ کانفیگی برای تست وجود ندارد")
             return
         
-        self.test_results.clear()
-        self.results_table.setRowCount(0)
+        # فقط کانفیگ‌های تست‌نشده؛ اگر همه تست شده‌اند، تست کامل از ابتدا
+        configs = self._pending_configs()
+        if not configs:
+            configs = self.configs
+            self.test_results.clear()
+            self._results_by_fp.clear()
+            self.results_table.setRowCount(0)
+        # گزارش از نتایج باقی‌مانده شروع می‌کند و نتایج جدید را تک‌تک دریافت می‌کند
+        self.results_updated.emit(self.all_results())
         self.progress_bar.setValue(0)
         self.progress_bar.show()
         
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
         
-        self.tester = ConfigTester(self.configs)
+        probe = self.probe_settings()
+        workers = probe.pop('workers')
+        if workers > 0:
+            self.tester = DistributedTester(configs, workers=workers, **probe)
+        else:
+            self.tester = ConfigTester(configs, **probe)
         self.tester.progress.connect(self._update_progress)
         self.tester.result.connect(self._add_result)
         self.tester.finished.connect(self._testing_finished)
@@ -219,6 +479,13 @@ class TestTab(QWidget):
         self.progress_bar.setValue(value)
 
     def _add_result(self, result: TestResult):
+        if result.config.fingerprint:
+            self._results_by_fp[result.config.fingerprint] = result
+            if result.error != "Cancelled":
+                self.history.record(
+                    result.config.fingerprint, result.config.type, result.success, result.delay
+                )
+        self.result_received.emit(result)
         if not result.success:
             return
         
@@ -239,16 +506,96 @@ class TestTab(QWidget):
             self.results_table.setItem(i, 2, QTableWidgetItem(result.config.server))
             self.results_table.setItem(i, 3, QTableWidgetItem(f"{result.delay:.1f}"))
             
+            throughput = self._throughput_by_fp.get(result.config.fingerprint)
+            if throughput is None:
+                speed = ""
+            elif throughput.success:
+                speed = f"{throughput.mbps:.1f}"
+            else:
+                speed = f"خطا: {throughput.error}"
+            self.results_table.setItem(i, 4, QTableWidgetItem(speed))
+            
             status = "موفق" if result.success else f"ناموفق: {result.error}"
-            self.results_table.setItem(i, 4, QTableWidgetItem(status))
+            self.results_table.setItem(i, 5, QTableWidgetItem(status))
 
     def _testing_finished(self):
         self.progress_bar.hide()
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
+        self.history.flush()
+        self.results_updated.emit(self.all_results())
+        if self.pool is not None:
+            # نمونه بعدی با توجه به نتایج همین تست انتخاب می‌شود
+            self._select_from_pool()
+        if self.throughput_check.isChecked():
+            self.start_throughput_tests()
         
         QMessageBox.information(
             self,
             "اتمام تست",
             f"تست {len(self.test_results)} کانفیگ با موفقیت انجام شد"
         )
+
+    def start_throughput_tests(self):
+        """تست سرعت K کانفیگ با کمترین تاخیر"""
+        top = select_top_k(self.test_results, self.top_k_spin.value())
+        if not top:
+            return
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.throughput_tester = ThroughputTester(
+            top, rate_limit_mbps=self.rate_limit_spin.value()
+        )
+        self.throughput_tester.progress.connect(self._update_progress)
+        self.throughput_tester.throughput_result.connect(self._add_throughput_result)
+        self.throughput_tester.finished.connect(self._throughput_finished)
+        # دکمه توقف همان tester فعال را متوقف می‌کند
+        self.tester = self.throughput_tester
+        self.throughput_tester.start()
+
+    def _add_throughput_result(self, result: ThroughputResult):
+        self._throughput_by_fp[result.config.fingerprint] = result
+        self._update_results_table()
+
+    def _throughput_finished(self):
+        self.progress_bar.hide()
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+
+    def _toggle_monitor(self, enabled: bool):
+        if enabled:
+            engine = ConfigTester(
+                [], max_retries=1,
+                targets=parse_targets(self.targets_input.text()) or DEFAULT_TARGETS,
+                mode=self.probe_mode_combo.currentData(),
+            )
+            self.monitor = HealthMonitor(engine, self.configs)
+            self.monitor.results_probed.connect(self._monitor_probed)
+            self.monitor.state_changed.connect(self._monitor_state_changed)
+            self.monitor.start()
+        else:
+            self.stop_monitor()
+
+    def stop_monitor(self):
+        """توقف پایش سلامت و انتظار برای پایان نخ آن (مثلا هنگام بستن برنامه)"""
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor.wait()
+            self.monitor = None
+
+    def _monitor_probed(self, results: List[TestResult]):
+        for result in results:
+            self._results_by_fp[result.config.fingerprint] = result
+            self.history.record(
+                result.config.fingerprint, result.config.type, result.success, result.delay
+            )
+        self.history.flush()
+
+    def _monitor_state_changed(self, results: List[TestResult]):
+        # فقط وقتی وضعیت کانفیگی تغییر کند جدول و گزارش به‌روز می‌شوند
+        self.test_results = [r for r in self._results_by_fp.values() if r.success]
+        self._update_results_table()
+        self.results_changed.emit(results)
+
@@ -0,0 +1,387 @@
+# distributed.py
+"""تست توزیع‌شده کانفیگ‌ها بین چند پردازش یا چند ماشین
+
+هماهنگ‌کننده (Coordinator) مجموعه کانفیگ‌ها را به تکه‌هایی (shard) تقسیم
+می‌کند و هر تکه را به صورت اجاره (lease) با مهلت محدود به یک کارگر می‌دهد.
+پروتکل NDJSON روی TCP است؛ هر پیام یک شیء JSON در یک خط:
+
+    کارگر  ← hello {version, token, name, concurrency}
+    کارگر  ← request                        درخواست یک اجاره جدید
+    هماهنگ‌کننده → lease {lease, configs: [[fingerprint, uri], ...]}
+    هماهنگ‌کننده → wait {seconds}           فعلا کاری آزاد نیست
+    کارگر  ← result {lease, fingerprint, success, delay, error}
+    کارگر  ← done {lease}
+    هماهنگ‌کننده → shutdown
+
+کارگر فقط به اندازه prefetch اجاره باز نگه می‌دارد و نتایج در یک صف با
+ظرفیت محدود ادغام می‌شوند؛ وقتی صف پر است هماهنگ‌کننده از سوکت نمی‌خواند
+و ارسال نتایج در سمت کارگر (drain) متوقف می‌شود.
+
+اجاره‌ها شامل URI کامل کانفیگ‌ها (رمز trojan، UUID) هستند؛ بنابراین هر
+کارگر باید توکن مشترک را در hello بفرستد. ارتباط رمزنگاری نمی‌شود و روی
+شبکه‌های غیرقابل اعتماد باید از تونل (مثلا SSH یا WireGuard) استفاده کرد.
+"""
+import asyncio
+import hmac
+import ipaddress
+import itertools
+import json
+import secrets
+import socket
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from config_processor import ConfigData, ConfigProcessor
+
+if TYPE_CHECKING:
+    from config_tester import ConfigTester
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 8766
+DEFAULT_LEASE_SIZE = 50
+# اجاره‌ای که در این مدت نتیجه‌ای نفرستد به صف برمی‌گردد (ثانیه)
+DEFAULT_LEASE_TTL = 60.0
+DEFAULT_CONCURRENCY = 32
+DEFAULT_PREFETCH = 2
+# ظرفیت صف ادغام نتایج؛ پر شدن آن خواندن از سوکت‌ها را متوقف می‌کند
+RESULT_QUEUE_SIZE = 1024
+MAX_LINE = 1 << 20
+WAIT_SECONDS = 1.0
+
+# (موفقیت، تاخیر، خطا)
+Outcome = Tuple[bool, float, Optional[str]]
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    """خواندن یک پیام؛ None یعنی اتصال بسته شده است"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        message = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ProtocolError(f"Invalid message: {e}")
+    if not isinstance(message, dict) or 'op' not in message:
+        raise ProtocolError(f"Invalid message: {line[:100]!r}")
+    return message
+
+
+def merge_outcomes(outcomes: Sequence[Outcome]) -> Outcome:
+    """ترکیب نتایج چند نقطه دید؛ دست‌کم نیمی باید موفق باشند و میانه تاخیرها گزارش می‌شود"""
+    delays = [delay for success, delay, _ in outcomes if success]
+    if delays and len(delays) * 2 >= len(outcomes):
+        return True, statistics.median(delays), None
+    error = next((error for success, _, error in outcomes if not success and error), None)
+    return False, float('inf'), error
+
+
+@dataclass
+class Shard:
+    fingerprints: List[str]
+    holders: Dict[int, str] = field(default_factory=dict)  # اتصال ← نام کارگر
+    done_by: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class Lease:
+    id: int
+    shard: Shard
+    connection: int
+    worker: str
+    deadline: float
+
+
+class Coordinator:
+    """تقسیم کانفیگ‌ها بین کارگرها و ادغام نتایج در یک رتبه‌بندی"""
+
+    def __init__(self, configs: Sequence[ConfigData], host: str = '127.0.0.1',
+                 port: int = DEFAULT_PORT, replicas: int = 1,
+                 lease_size: int = DEFAULT_LEASE_SIZE, lease_ttl: float = DEFAULT_LEASE_TTL,
+                 on_result: Optional[Callable[[ConfigData, bool, float, Optional[str]], None]] = None,
+                 token: Optional[str] = None, queue_size: int = RESULT_QUEUE_SIZE):
+        self.host = host
+        self.port = port
+        # توکن مشترکی که کارگرها باید در hello بفرستند
+        self.token = token or new_token()
+        # هر کانفیگ باید از این تعداد کارگر با نام متفاوت نتیجه بگیرد
+        self.replicas = max(1, replicas)
+        self.lease_ttl = lease_ttl
+        self.on_result = on_result
+        self.configs: Dict[str, ConfigData] = {c.fingerprint: c for c in configs if c.fingerprint}
+        fingerprints = list(self.configs)
+        self.shards = [
+            Shard(fingerprints[i:i + lease_size]) for i in range(0, len(fingerprints), lease_size)
+        ]
+        self._first_open = 0
+        self._outcomes: Dict[str, Dict[str, Outcome]] = {}
+        self.merged: Dict[str, Outcome] = {}
+        self.leases: Dict[int, Lease] = {}
+        self._lease_ids = itertools.count(1)
+        self._connection_ids = itertools.count(1)
+        self._writers: Dict[int, asyncio.StreamWriter] = {}
+        self._handlers: Set[asyncio.Task] = set()
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.stop_flag = False
+
+    # --- وضعیت تکه‌ها ---
+
+    def _shard_complete(self, shard: Shard) -> bool:
+        return len(shard.done_by) >= self.replicas
+
+    def complete(self) -> bool:
+        while self._first_open < len(self.shards) and self._shard_complete(self.shards[self._first_open]):
+            self._first_open += 1
+        return self._first_open == len(self.shards)
+
+    def _grant(self, connection: int, worker: str) -> Optional[Lease]:
+        self.complete()
+        for shard in itertools.islice(self.shards, self._first_open, None):
+            if len(shard.done_by) + len(shard.holders) >= self.replicas:
+                continue
+            if worker in shard.done_by or worker in shard.holders.values():
+                continue
+            shard.holders[connection] = worker
+            lease = Lease(next(self._lease_ids), shard, connection, worker,
+                          time.monotonic() + self.lease_ttl)
+            self.leases[lease.id] = lease
+            return lease
+        return None
+
+    def _release(self, lease: Lease):
+        self.leases.pop(lease.id, None)
+        lease.shard.holders.pop(lease.connection, None)
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for lease in [l for l in self.leases.values() if l.deadline < now]:
+            print(f"Lease {lease.id} of {lease.worker} expired")
+            self._release(lease)
+
+    # --- ادغام نتایج ---
+
+    def _record(self, worker: str, message: dict):
+        fingerprint = message.get('fingerprint')
+        config = self.configs.get(fingerprint)
+        if config is None or fingerprint in self.merged:
+            return
+        delay = message.get('delay')
+        outcomes = self._outcomes.setdefault(fingerprint, {})
+        outcomes[worker] = (
+            bool(message.get('success')),
+            float('inf') if delay is None else float(delay),
+            message.get('error'),
+        )
+        if len(outcomes) >= self.replicas:
+            merged = self.merged[fingerprint] = merge_outcomes(list(outcomes.values()))
+            del self._outcomes[fingerprint]
+            if self.on_result is not None:
+                self.on_result(config, *merged)
+
+    async def _merge(self):
+        while True:
+            worker, message = await self._queue.get()
+            lease = self.leases.get(message.get('lease'))
+            if message['op'] == 'result':
+                if lease is not None:
+                    lease.deadline = time.monotonic() + self.lease_ttl
+                self._record(worker, message)
+            elif message['op'] == 'done' and lease is not None:
+                self._release(lease)
+                lease.shard.done_by.add(worker)
+
+    def ranking(self) -> List[Tuple[ConfigData, bool, float, Optional[str]]]:
+        """نتایج ادغام‌شده به ترتیب تاخیر"""
+        results = [(self.configs[fp], *outcome) for fp, outcome in self.merged.items()]
+        return sorted(results, key=lambda r: r[2])
+
+    # --- اتصال کارگرها ---
+
+    async def _send(self, writer: asyncio.StreamWriter, message: dict):
+        writer.write(encode_message(message))
+        await writer.drain()
+
+    async def _serve_requests(self, connection: int, worker: str,
+                              reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while not self.stop_flag:
+            message = await read_message(reader)
+            if message is None:
+                return
+            op = message['op']
+            if op in ('result', 'done'):
+                # با پر بودن صف، خواندن از این اتصال متوقف می‌شود
+                await self._queue.put((worker, message))
+            elif op == 'request':
+                lease = self._grant(connection, worker)
+                if lease is not None:
+                    configs = [[fp, self.configs[fp].uri] for fp in lease.shard.fingerprints]
+                    await self._send(writer, {'op': 'lease', 'lease': lease.id, 'configs': configs})
+                elif self.complete():
+                    await self._send(writer, {'op': 'shutdown'})
+                else:
+                    await self._send(writer, {'op': 'wait', 'seconds': WAIT_SECONDS})
+            else:
+                raise ProtocolError(f"Unknown op: {op}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = next(self._connection_ids)
+        worker = f"connection-{connection}"
+        self._handlers.add(asyncio.current_task())
+        try:
+            hello = await read_message(reader)
+            if hello is None or hello['op'] != 'hello' or hello.get('version') != PROTOCOL_VERSION:
+                raise ProtocolError("Expected hello with protocol version "
+                                    f"{PROTOCOL_VERSION}")
+            if not hmac.compare_digest(str(hello.get('token', '')).encode(), self.token.encode()):
+                raise ProtocolError("Invalid token")
+            worker = str(hello.get('name') or worker)
+            self._writers[connection] = writer
+            await self._serve_requests(connection, worker, reader, writer)
+        except (ConnectionError, ProtocolError, asyncio.IncompleteReadError, ValueError) as e:
+            print(f"Error in worker {worker}: {e}")
+        finally:
+            # اجاره‌های ناتمام این اتصال به صف برمی‌گردند؛ نتایج رسیده حفظ می‌شوند
+            for lease in [l for l in self.leases.values() if l.connection == connection]:
+                self._release(lease)
+            self._writers.pop(connection, None)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def start(self):
+        if not is_loopback(self.host):
+            print(f"Warning: coordinator listening on {self.host}; leases carry full config URIs "
+                  "and traffic is not encrypted, share the token only with trusted workers")
+        self._queue = asyncio.Queue(self._queue_size)
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def run(self, workers_alive: Optional[Callable[[], bool]] = None
+                  ) -> List[Tuple[ConfigData, bool, float, Optional[str]]]:
+        """اجرا تا تکمیل همه تکه‌ها یا توقف؛ رتبه‌بندی نهایی را برمی‌گرداند
+
+        workers_alive برای کارگرهای محلی است؛ اگر همه آن‌ها خارج شده باشند و
+        هیچ اتصالی باز نباشد، اجرا با نتایج ناقص پایان می‌یابد.
+        """
+        if self.server is None:
+            await self.start()
+        merger = asyncio.create_task(self._merge())
+        try:
+            while not self.stop_flag and not self.complete():
+                await asyncio.sleep(0.2)
+                self._expire_leases()
+                if workers_alive is not None and not workers_alive() and not self._writers:
+                    print(f"All workers exited; {len(self.merged)} of {len(self.configs)} configs tested")
+                    break
+            # نتایج باقی‌مانده در صف پیش از بستن اتصال‌ها ادغام می‌شوند
+            while not self._queue.empty():
+                await asyncio.sleep(0.05)
+        finally:
+            self.server.close()
+            self.stop_flag = True
+            for writer in list(self._writers.values()):
+                writer.write(encode_message({'op': 'shutdown'}))
+            # کارگرها پس از دریافت shutdown اتصال را می‌بندند
+            if self._handlers:
+                await asyncio.wait(self._handlers, timeout=5)
+            for writer in list(self._writers.values()):
+                writer.close()
+            merger.cancel()
+            await asyncio.gather(merger, return_exceptions=True)
+            await self.server.wait_closed()
+        return self.ranking()
+
+    def stop(self):
+        self.stop_flag = True
+
+
+async def run_worker(host: str, port: int, engine: 'ConfigTester', name: Optional[str] = None,
+                     concurrency: int = DEFAULT_CONCURRENCY, prefetch: int = DEFAULT_PREFETCH,
+                     token: str = '') -> int:
+    """اتصال به هماهنگ‌کننده و تست اجاره‌ها تا دریافت shutdown؛ تعداد تست‌ها را برمی‌گرداند"""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    processor = ConfigProcessor()
+    sockets = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    tasks = set()
+    probed = 0
+
+    async def send(message: dict):
+        writer.write(encode_message(message))
+        async with write_lock:
+            # اگر هماهنگ‌کننده کند بخواند، ارسال نتایج (و تست‌ها) اینجا متوقف می‌شود
+            await writer.drain()
+
+    async def probe(fingerprint: str, uri: str) -> Tuple[str, Optional[object]]:
+        config = processor.process_single_config(uri)
+        if config is None:
+            return fingerprint, None
+        async with sockets:
+            return fingerprint, await engine.test_single_config(config)
+
+    async def process(lease: dict):
+        nonlocal probed
+        for next_done in asyncio.as_completed([probe(fp, uri) for fp, uri in lease['configs']]):
+            fingerprint, result = await next_done
+            if result is None:
+                message = {'success': False, 'delay': None, 'error': "Parse error"}
+            elif result.error == "Cancelled":
+                continue
+            else:
+                message = {'success': result.success,
+                           'delay': result.delay if result.success else None,
+                           'error': result.error}
+            await send({'op': 'result', 'lease': lease['lease'], 'fingerprint': fingerprint, **message})
+            probed += 1
+        if not engine.stop_flag:
+            await send({'op': 'done', 'lease': lease['lease']})
+            await send({'op': 'request'})
+
+    try:
+        await send({'op': 'hello', 'version': PROTOCOL_VERSION, 'token': token,
+                    'name': name or socket.gethostname(), 'concurrency': concurrency})
+        for _ in range(prefetch):
+            await send({'op': 'request'})
+        while True:
+            message = await read_message(reader)
+            if message is None or message['op'] == 'shutdown':
+                break
+            if message['op'] == 'lease':
+                task = asyncio.create_task(process(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            elif message['op'] == 'wait':
+                await asyncio.sleep(float(message.get('seconds', WAIT_SECONDS)))
+                await send({'op': 'request'})
+    except (ConnectionError, ProtocolError) as e:
+        print(f"Error in worker connection: {e}")
+    finally:
+        engine.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+    return probed
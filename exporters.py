@@ -0,0 +1,132 @@
+# exporters.py
+import csv
+import gzip
+import io
+import json
+from typing import Callable, Iterable, Optional
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from metrics import REPORT_SECONDS
+
+try:
+    import zstandard
+except ImportError:  # فشرده‌سازی zstd اختیاری است
+    zstandard = None
+
+# بافر بزرگ تا نوشتن روی دیسک در دسته‌های درشت انجام شود
+WRITE_BUFFER_SIZE = 1024 * 1024
+# هر چند ردیف یک بار پیشرفت گزارش می‌شود
+PROGRESS_STEP = 5000
+
+CSV_HEADER = ['Name', 'Type', 'Server', 'Port', 'Delay (ms)', 'Status']
+
+ProgressCallback = Optional[Callable[[int], None]]
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def open_export(filename: str):
+    """باز کردن فایل خروجی متنی با بافر بزرگ؛ فشرده‌سازی بر اساس پسوند (.gz یا .zst)"""
+    if filename.endswith('.gz'):
+        raw = gzip.open(filename, 'wb', compresslevel=6)
+    elif filename.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("zstandard package is not installed")
+        raw = zstandard.ZstdCompressor().stream_writer(open(filename, 'wb'), closefd=True)
+    else:
+        return open(filename, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+    buffered = io.BufferedWriter(raw, buffer_size=WRITE_BUFFER_SIZE)
+    return io.TextIOWrapper(buffered, encoding='utf-8', newline='')
+
+
+def result_row(result) -> list:
+    return [
+        result.config.name,
+        result.config.type,
+        result.config.server,
+        result.config.port,
+        f"{result.delay:.1f}",
+        "Success" if result.success else f"Failed: {result.error}"
+    ]
+
+
+def result_record(result) -> dict:
+    return {
+        "name": result.config.name,
+        "type": result.config.type,
+        "server": result.config.server,
+        "port": result.config.port,
+        "delay": None if not result.success else round(result.delay, 1),
+        "success": result.success,
+        "error": result.error,
+    }
+
+
+def _report(progress: ProgressCallback, written: int):
+    if progress and written % PROGRESS_STEP == 0:
+        progress(written)
+
+
+def write_csv(results: Iterable, filename: str, progress: ProgressCallback = None) -> int:
+    written = 0
+    with open_export(filename) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for result in results:
+            writer.writerow(result_row(result))
+            written += 1
+            _report(progress, written)
+    return written
+
+
+def write_ndjson(records: Iterable[dict], filename: str, progress: ProgressCallback = None) -> int:
+    written = 0
+    with open_export(filename) as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            written += 1
+            _report(progress, written)
+    return written
+
+
+def write_json_array(records: Iterable[dict], filename: str, progress: ProgressCallback = None) -> int:
+    """آرایه JSON که عنصر به عنصر نوشته می‌شود و کل داده را در حافظه نمی‌سازد"""
+    written = 0
+    with open_export(filename) as f:
+        f.write('[')
+        for record in records:
+            f.write(',\n' if written else '\n')
+            f.write(json.dumps(record, ensure_ascii=False))
+            written += 1
+            _report(progress, written)
+        f.write('\n]\n')
+    return written
+
+
+class ExportWorker(QThread):
+    """اجرای یک خروجی‌گیری جریانی در پس‌زمینه"""
+    progress = pyqtSignal(int)  # درصد پیشرفت
+    finished = pyqtSignal(bool, str)  # موفقیت، نام فایل یا پیام خطا
+
+    def __init__(self, job: Callable[[ProgressCallback], int], filename: str, total: int):
+        super().__init__()
+        self.job = job
+        self.filename = filename
+        self.total = max(total, 1)
+
+    def _progress(self, written: int):
+        self.progress.emit(min(100, int(written * 100 / self.total)))
+
+    def run(self):
+        try:
+            with REPORT_SECONDS.time():
+                self.job(self._progress)
+            self.progress.emit(100)
+            self.finished.emit(True, self.filename)
+        except Exception as e:
+            print(f"Error exporting {self.filename}: {e}")
+            self.finished.emit(False, str(e))
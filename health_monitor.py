@@ -0,0 +1,195 @@
+# health_monitor.py
+import asyncio
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from config_processor import ConfigData
+from profiler import run_async
+
+if TYPE_CHECKING:
+    from config_tester import ConfigTester, TestResult
+
+TIER_NEW = 'new'
+TIER_TOP = 'top'
+TIER_MID = 'mid'
+TIER_DEAD = 'dead'
+
+# فاصله تست مجدد هر رده (ثانیه)
+DEFAULT_INTERVALS = {
+    TIER_NEW: 0.0,
+    TIER_TOP: 60.0,
+    TIER_MID: 300.0,
+    TIER_DEAD: 1800.0,
+}
+# تعداد کانفیگ‌های سریع‌تر که در رده برتر قرار می‌گیرند
+TOP_COUNT = 20
+# پس از این تعداد شکست پشت سر هم کانفیگ مرده حساب می‌شود
+DEAD_AFTER_FAILURES = 3
+# سقف اتصال‌های همزمان و سهم CPU (کسری از یک هسته)
+DEFAULT_MAX_SOCKETS = 8
+DEFAULT_CPU_BUDGET = 0.25
+TICK_SECONDS = 0.25
+# تغییرات در دسته‌های حداقل این فاصله ارسال می‌شوند
+EMIT_INTERVAL = 1.0
+
+
+@dataclass
+class MonitorEntry:
+    config: ConfigData
+    tier: str = TIER_NEW
+    failures: int = 0
+    result: Optional['TestResult'] = None
+    generation: int = 0
+
+
+class HealthMonitor(QThread):
+    """تست مجدد پیوسته کانفیگ‌ها با زمان‌بندی اولویت‌دار (heap) و بودجه منابع ثابت"""
+    results_probed = pyqtSignal(list)   # همه نتایج جدید (برای تاریخچه)
+    state_changed = pyqtSignal(list)    # فقط نتایجی که وضعیت یا رده آن‌ها تغییر کرده
+
+    def __init__(self, tester: 'ConfigTester', configs: Sequence[ConfigData] = (),
+                 max_sockets: int = DEFAULT_MAX_SOCKETS, cpu_budget: float = DEFAULT_CPU_BUDGET,
+                 intervals: Optional[Dict[str, float]] = None, top_count: int = TOP_COUNT):
+        super().__init__()
+        self.max_sockets = max_sockets
+        self.cpu_budget = cpu_budget
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.top_count = top_count
+        # موتور تست async (ConfigTester)؛ فقط test_single_config آن استفاده می‌شود
+        self.tester = tester
+        self.entries: Dict[str, MonitorEntry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._pending_configs: Optional[List[ConfigData]] = list(configs)
+        self._probed: List['TestResult'] = []
+        self._changed: List['TestResult'] = []
+        # مرز رده برتر؛ در هر دور حلقه یک بار محاسبه می‌شود نه برای هر نتیجه
+        self._threshold = float('inf')
+        self.stop_flag = False
+
+    # --- فراخوانی از نخ رابط گرافیکی ---
+
+    def set_configs(self, configs: Sequence[ConfigData]):
+        """جایگزینی مجموعه کانفیگ‌های پایش‌شده؛ در حلقه پایش اعمال می‌شود"""
+        with self._lock:
+            self._pending_configs = list(configs)
+
+    def stop(self):
+        self.stop_flag = True
+        self.tester.stop()
+
+    # --- حلقه پایش ---
+
+    def _schedule(self, entry: MonitorEntry, delay: float):
+        # شماره یکتا؛ ورودی‌های قدیمی‌تر همین کانفیگ در heap نادیده گرفته می‌شوند
+        self._seq += 1
+        entry.generation = self._seq
+        heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, entry.config.fingerprint))
+
+    def _apply_configs(self):
+        with self._lock:
+            configs, self._pending_configs = self._pending_configs, None
+        if configs is None:
+            return
+        current = {c.fingerprint: c for c in configs if c.fingerprint}
+        for fingerprint in list(self.entries):
+            if fingerprint not in current:
+                # ورودی‌های حذف‌شده در heap با نسخه قدیمی نادیده گرفته می‌شوند
+                del self.entries[fingerprint]
+        for fingerprint, config in current.items():
+            if fingerprint not in self.entries:
+                entry = self.entries[fingerprint] = MonitorEntry(config)
+                self._schedule(entry, self.intervals[TIER_NEW])
+
+    def _top_threshold(self) -> float:
+        delays = [e.result.delay for e in self.entries.values() if e.result and e.result.success]
+        if len(delays) <= self.top_count:
+            return float('inf')
+        return heapq.nsmallest(self.top_count, delays)[-1]
+
+    def _classify(self, entry: MonitorEntry, result: 'TestResult', threshold: float) -> str:
+        if result.success:
+            return TIER_TOP if result.delay <= threshold else TIER_MID
+        return TIER_DEAD if entry.failures >= DEAD_AFTER_FAILURES else TIER_MID
+
+    def _record(self, entry: MonitorEntry, result: 'TestResult'):
+        previous = entry.result
+        entry.result = result
+        entry.failures = 0 if result.success else entry.failures + 1
+        tier = self._classify(entry, result, self._threshold)
+        changed = (previous is None or previous.success != result.success or tier != entry.tier)
+        entry.tier = tier
+        self._schedule(entry, self.intervals[tier])
+        self._probed.append(result)
+        if changed:
+            self._changed.append(result)
+
+    async def _probe(self, entry: MonitorEntry, sockets: asyncio.Semaphore):
+        try:
+            result = await self.tester.test_single_config(entry.config)
+        finally:
+            sockets.release()
+        if result.error == "Cancelled":
+            return
+        # کانفیگ ممکن است در حین تست از مجموعه حذف شده باشد
+        if self.entries.get(entry.config.fingerprint) is entry:
+            self._record(entry, result)
+
+    def _flush(self):
+        if self._probed:
+            self.results_probed.emit(self._probed)
+            self._probed = []
+        if self._changed:
+            self.state_changed.emit(self._changed)
+            self._changed = []
+
+    async def _throttle_cpu(self, cpu_start: float, wall_start: float):
+        """اگر مصرف CPU از بودجه بیشتر شود، حلقه به اندازه مازاد مکث می‌کند"""
+        # فقط CPU همین نخ؛ بقیه نخ‌های برنامه (رابط گرافیکی، تست‌ها) حساب نمی‌شوند
+        cpu = time.thread_time() - cpu_start
+        wall = time.monotonic() - wall_start
+        excess = cpu / self.cpu_budget - wall
+        if excess > 0:
+            await asyncio.sleep(min(excess, 5.0))
+
+    async def _run(self):
+        sockets = asyncio.Semaphore(self.max_sockets)
+        tasks = set()
+        last_emit = time.monotonic()
+        while not self.stop_flag:
+            cpu_start, wall_start = time.thread_time(), time.monotonic()
+            self._apply_configs()
+            self._threshold = self._top_threshold()
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now and not self.stop_flag:
+                _, generation, fingerprint = self._heap[0]
+                entry = self.entries.get(fingerprint)
+                if entry is None or entry.generation != generation:
+                    heapq.heappop(self._heap)
+                    continue
+                if sockets.locked():
+                    break
+                heapq.heappop(self._heap)
+                await sockets.acquire()
+                task = asyncio.create_task(self._probe(entry, sockets))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if time.monotonic() - last_emit >= EMIT_INTERVAL:
+                self._flush()
+                last_emit = time.monotonic()
+            await asyncio.sleep(TICK_SECONDS)
+            await self._throttle_cpu(cpu_start, wall_start)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._flush()
+
+    def run(self):
+        run_async(self._run())
@@ -1,44 +1,92 @@
 # main.py
+import argparse
+import os
 import sys
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtWidgets import QApplication
 
-# Import local modules
-from subscription_manager import SubscriptionTab
-from config_processor import ConfigsTab
-from config_tester import TestTab
-from report_generator import ReportTab
+from app_manager import AppManager
+from metrics import METRICS, MetricsServer
+from config_tester import ConfigTester, run_worker_process
+from pipeline import run_pipeline, run_profiled_pipeline
+from probe_targets import DEFAULT_TARGETS, MODE_RACE, PROBE_MODES, parse_targets
+from profiler import ProfileSession
 
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("مدیریت کانفیگ‌های شبکه")
-        self.setMinimumSize(800, 600)
-        
-        # Create central widget and main layout
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QVBoxLayout(central_widget)
-        
-        # Create tab widget
-        self.tabs = QTabWidget()
-        self.tabs.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
-        main_layout.addWidget(self.tabs)
-        
-        # Create individual tabs
-        self.subscription_tab = SubscriptionTab()
-        self.configs_tab = ConfigsTab()
-        self.test_tab = TestTab()
-        self.report_tab = ReportTab()
-        
-        # Add tabs to tab widget
-        self.tabs.addTab(self.subscription_tab, "مدیریت لینک‌ها")
-        self.tabs.addTab(self.configs_tab, "کانفیگ‌ها")
-        self.tabs.addTab(self.test_tab, "تست")
-        self.tabs.addTab(self.report_tab, "گزارش‌ها")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="مدیریت کانفیگ‌های شبکه")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="فعال‌سازی متریک‌ها و ارائه /metrics روی این پورت")
+    parser.add_argument('--headless', action='store_true',
+                        help="اجرای دانلود، تست و گزارش بدون رابط گرافیکی")
+    parser.add_argument('--profile', action='store_true',
+                        help="ثبت cProfile، callbackهای کند asyncio و tracemalloc در ~/.config_manager/profiles")
+    parser.add_argument('--probe-target', action='append', default=[],
+                        help="مقصد تست (قابل تکرار)؛ مثلا 'HEAD https://example.com'")
+    parser.add_argument('--probe-mode', choices=PROBE_MODES, default=MODE_RACE,
+                        help="race: اولین پاسخ موفق، aggregate: موفقیت دست‌کم نیمی از مقصدها")
+    parser.add_argument('--subscription-port', type=int, default=None,
+                        help="انتشار ساب‌اسکریپشن کانفیگ‌های برتر روی این پورت")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="تعداد پردازش‌های کارگر محلی برای تست در حالت headless")
+    parser.add_argument('--coordinator', metavar='HOST:PORT', default=None,
+                        help="پذیرش کارگرهای ماشین‌های دیگر روی این آدرس در حالت headless")
+    parser.add_argument('--replicas', type=int, default=1,
+                        help="تعداد کارگرهای متفاوتی که هر کانفیگ را تست می‌کنند")
+    parser.add_argument('--worker', metavar='HOST:PORT', default=None,
+                        help="اجرا به عنوان کارگر و اتصال به هماهنگ‌کننده")
+    parser.add_argument('--token', default=os.environ.get('CONFIG_MANAGER_TOKEN'),
+                        help="توکن مشترک هماهنگ‌کننده و کارگرها (پیش‌فرض: CONFIG_MANAGER_TOKEN یا تصادفی)")
+    parser.add_argument('--worker-name', default=None,
+                        help="نام این کارگر (پیش‌فرض: نام ماشین)")
+    parser.add_argument('--max-configs', type=int, default=100,
+                        help="حداکثر تعداد کانفیگ برای تست در حالت headless")
+    return parser.parse_args(argv)
+
+def parse_address(value: str):
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
 
 def main():
-    app = QApplication(sys.argv)
+    args = parse_args()
+    if args.headless and not args.coordinator and args.replicas > max(args.workers, 1):
+        sys.exit("--replicas cannot exceed --workers without --coordinator for remote workers")
+    probe = {
+        'targets': parse_targets(','.join(args.probe_target)) or DEFAULT_TARGETS,
+        'mode': args.probe_mode,
+    }
+    
+    if args.worker:
+        if not args.token:
+            sys.exit("--worker requires --token (printed by the coordinator)")
+        host, port = parse_address(args.worker)
+        run_worker_process(host, port, lambda: ConfigTester([], **probe), args.worker_name,
+                           token=args.token)
+        return
+    
+    metrics_server = None
+    if args.metrics_port is not None:
+        METRICS.enable()
+        metrics_server = MetricsServer(args.metrics_port)
+        metrics_server.start()
+        print(f"Metrics available at http://127.0.0.1:{metrics_server.port}/metrics")
+    
+    if args.headless:
+        probe['workers'] = args.workers
+        probe['replicas'] = args.replicas
+        if args.coordinator:
+            probe['coordinator'] = parse_address(args.coordinator)
+            probe['token'] = args.token
+        app = QCoreApplication(sys.argv[:1])
+        if args.profile:
+            directory = run_profiled_pipeline(args.max_configs, **probe)
+            print(f"Profile written to {directory}")
+        else:
+            run_pipeline(max_configs=args.max_configs, **probe)
+        if metrics_server is not None:
+            metrics_server.stop()
+        return
+    
+    app = QApplication(sys.argv[:1])
     
     # Set default font for Persian support
     font = app.font()
@@ -46,8 +94,16 @@ def main():
     font.setPointSize(10)
     app.setFont(font)
     
-    window = MainWindow()
+    window = AppManager()
+    if args.subscription_port is not None:
+        window.set_publishing(True, args.subscription_port)
     window.show()
+    if args.profile:
+        # پروفایل کل نشست رابط گرافیکی تا زمان بستن برنامه
+        with ProfileSession('gui_session') as session:
+            code = app.exec()
+        print(f"Profile written to {session.directory}")
+        sys.exit(code)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
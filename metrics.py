@@ -0,0 +1,263 @@
+# metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+# مرزهای پیش‌فرض سطل‌های هیستوگرام (ثانیه)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """تایمر بی‌اثر برای وقتی که متریک‌ها غیرفعال‌اند"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help_text: str):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.name = name
+        self.help = help_text
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text)
+        self.value = 0.0
+
+    def set(self, value: float):
+        if self._registry.enabled:
+            self.value = value
+
+    def inc(self, amount: float = 1.0):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: 'Histogram'):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """زمان‌سنجی یک بلوک با with؛ در حالت غیرفعال هزینه‌ای ندارد"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """تخمین صدک از روی سطل‌ها (کران بالای سطل)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self.started = time.time()
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(self, name, help_text, **kwargs)
+        return metric
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = '') -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = '',
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def to_json(self) -> Dict:
+        data = {'uptime_seconds': time.time() - self.started}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Histogram):
+                data[name] = {
+                    'count': metric.count,
+                    'sum': metric.sum,
+                    'buckets': dict(zip([str(b) for b in metric.buckets] + ['+Inf'], metric.counts)),
+                    'p50': metric.quantile(0.5),
+                    'p90': metric.quantile(0.9),
+                    'p99': metric.quantile(0.99),
+                }
+            else:
+                data[name] = metric.value
+        return data
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets, metric.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {metric.count}')
+                lines.append(f"{name}_sum {metric.sum}")
+                lines.append(f"{name}_count {metric.count}")
+            else:
+                lines.append(f"{name} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+class RateTracker:
+    """محاسبه نرخ در ثانیه شمارنده‌ها بین دو فراخوانی"""
+
+    def __init__(self, counters: Sequence[Counter]):
+        self.counters = list(counters)
+        self._last_time = time.perf_counter()
+        self._last_values = [c.value for c in self.counters]
+
+    def rates(self) -> Dict[str, float]:
+        now = time.perf_counter()
+        elapsed = max(now - self._last_time, 1e-9)
+        rates = {}
+        for i, counter in enumerate(self.counters):
+            rates[counter.name] = (counter.value - self._last_values[i]) / elapsed
+            self._last_values[i] = counter.value
+        self._last_time = now
+        return rates
+
+
+# رجیستری سراسری؛ با متغیر محیطی CONFIG_MANAGER_METRICS=1 یا پرچم خط فرمان فعال می‌شود
+METRICS = MetricsRegistry(enabled=os.environ.get('CONFIG_MANAGER_METRICS') == '1')
+
+DOWNLOADS = METRICS.counter('subscription_downloads_total', 'Subscription downloads')
+DOWNLOAD_BYTES = METRICS.counter('subscription_download_bytes_total', 'Downloaded subscription bytes')
+DOWNLOAD_SECONDS = METRICS.histogram('subscription_download_seconds', 'Subscription download time')
+DECODE_SECONDS = METRICS.histogram('subscription_decode_seconds', 'Subscription body decode time')
+INGEST_SECONDS = METRICS.histogram('subscription_ingest_seconds', 'Diff, dedup and parse time per subscription')
+PARSE_LINES = METRICS.counter('config_parse_lines_total', 'Config lines parsed')
+PARSE_FAILURES = METRICS.counter('config_parse_failures_total', 'Config lines that failed to parse')
+PROBES = METRICS.counter('probes_total', 'Config probes finished')
+PROBE_SUCCESSES = METRICS.counter('probe_successes_total', 'Successful config probes')
+PROBES_IN_FLIGHT = METRICS.gauge('probes_in_flight', 'Config probes currently running')
+OPEN_SESSIONS = METRICS.gauge('open_sessions', 'HTTP client sessions currently open by the tester')
+PROBE_SECONDS = METRICS.histogram('probe_seconds', 'Config probe latency')
+REPORT_SECONDS = METRICS.histogram('report_seconds', 'Report, export and chart generation time')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body = json.dumps(self.registry.to_json()).encode()
+            content_type = 'application/json'
+        elif self.path.startswith('/metrics'):
+            body = self.registry.to_prometheus().encode()
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """سرور HTTP محلی برای /metrics (Prometheus) و /metrics.json"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1'):
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,174 @@
+# pdf_report.py
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fpdf import FPDF, FPDF_VERSION
+
+FONT_FILE = 'DejaVuSansCondensed.ttf'
+FONT_DIRS = (
+    Path(__file__).resolve().parent,
+    Path.cwd(),
+    Path('/usr/share/fonts/truetype/dejavu'),
+    Path('/usr/share/fonts/dejavu'),
+    Path('C:/Windows/Fonts'),
+)
+
+COLUMNS = (('Name', 55), ('Type', 20), ('Server', 50), ('Port', 15), ('Delay', 20), ('Status', 30))
+ROW_HEIGHT = 7
+
+# ردیف گزارش: (نام، نوع، سرور، پورت، تاخیر، موفقیت)
+ReportRow = Tuple[str, str, str, int, float, bool]
+
+
+@lru_cache(maxsize=1)
+def font_path() -> Optional[str]:
+    """مسیر فونت یونیکد فقط یک بار جستجو می‌شود"""
+    custom = os.environ.get('CONFIG_MANAGER_FONT')
+    if custom and Path(custom).exists():
+        return custom
+    for directory in FONT_DIRS:
+        candidate = directory / FONT_FILE
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+def result_to_row(result) -> ReportRow:
+    config = result.config
+    return (config.name, config.type, config.server, config.port, result.delay, result.success)
+
+
+class PaginatedReport(FPDF):
+    """PDF با هدر جدول تکرارشونده در هر صفحه"""
+
+    def __init__(self):
+        super().__init__()
+        self.set_auto_page_break(True, margin=15)
+        path = font_path()
+        if path:
+            # fpdf2 همه فونت‌های TTF را یونیکد می‌داند و uni را منسوخ کرده است؛
+            # PyFPDF 1.x هنوز به آن نیاز دارد
+            if FPDF_VERSION.startswith('1.'):
+                self.add_font('DejaVu', '', path, uni=True)
+            else:
+                self.add_font('DejaVu', '', path)
+            self.font_family_name = 'DejaVu'
+            self.unicode_font = True
+        else:
+            # بدون فونت یونیکد، فونت داخلی PDF استفاده می‌شود
+            self.font_family_name = 'Helvetica'
+            self.unicode_font = False
+        self.in_table = False
+
+    def safe_text(self, value) -> str:
+        value = str(value)
+        if self.unicode_font:
+            return value
+        return value.encode('latin-1', 'replace').decode('latin-1')
+
+    def use_font(self, size: int = 10):
+        self.set_font(self.font_family_name, '', size)
+
+    def header(self):
+        if self.in_table:
+            self.table_header()
+
+    def footer(self):
+        self.set_y(-12)
+        self.use_font(8)
+        self.cell(0, 8, f'Page {self.page_no()}', 0, 0, 'C')
+
+    def table_header(self):
+        self.use_font(10)
+        for title, width in COLUMNS:
+            self.cell(width, ROW_HEIGHT, title, 1, 0, 'C')
+        self.ln()
+
+    def fit(self, value, width: float) -> str:
+        """کوتاه کردن متن بر اساس عرض واقعی ستون به جای تعداد کاراکتر ثابت"""
+        value = self.safe_text(value)
+        limit = width - 2
+        if self.get_string_width(value) <= limit:
+            return value
+        while value and self.get_string_width(value + '...') > limit:
+            value = value[:-1]
+        return value + '...'
+
+    def row(self, row: ReportRow):
+        name, config_type, server, port, delay, success = row
+        values = (
+            name, config_type, server, port,
+            f"{delay:.1f}" if success else "-",
+            "Success" if success else "Failed",
+        )
+        for value, (_, width) in zip(values, COLUMNS):
+            self.cell(width, ROW_HEIGHT, self.fit(value, width), 1)
+        self.ln()
+
+
+def _write_summary(pdf: PaginatedReport, summary: Dict):
+    pdf.use_font(11)
+    lines = [
+        f"Total Configs: {summary['total_configs']}",
+        f"Successful Configs: {summary['successful_configs']} ({summary['success_rate']:.1f}%)",
+        f"Average Delay: {summary['avg_delay']:.1f} ms (std {summary.get('std_delay', 0):.1f})",
+        f"Min / Max Delay: {summary['min_delay']:.1f} / {summary['max_delay']:.1f} ms",
+    ]
+    if 'p50_delay' in summary:
+        lines.append(f"P50 / P90 / P99 Delay: {summary['p50_delay']:.1f} / "
+                     f"{summary['p90_delay']:.1f} / {summary['p99_delay']:.1f} ms")
+    for line in lines:
+        pdf.cell(0, 8, pdf.safe_text(line), 0, 1)
+
+    if summary.get('type_stats'):
+        pdf.ln(4)
+        for config_type, stats in summary['type_stats'].items():
+            rate = stats['successful'] / stats['total'] * 100 if stats['total'] else 0
+            pdf.cell(0, 7, pdf.safe_text(f"{config_type}: {stats['successful']}/{stats['total']} ({rate:.1f}%)"), 0, 1)
+
+
+def build_pdf_report(rows: Sequence[ReportRow], summary: Dict, filename: str,
+                     top_n: Optional[int] = None) -> bool:
+    """ساخت گزارش PDF؛ با top_n فقط خلاصه و N کانفیگ سریع‌تر نوشته می‌شود"""
+    pdf = PaginatedReport()
+    pdf.add_page()
+    pdf.use_font(14)
+    pdf.cell(0, 10, 'Configuration Test Report', 0, 1, 'C')
+    pdf.ln(4)
+    _write_summary(pdf, summary)
+    pdf.ln(6)
+
+    if top_n:
+        successful = (row for row in rows if row[5])
+        table: List[ReportRow] = heapq.nsmallest(top_n, successful, key=lambda row: row[4])
+        pdf.use_font(12)
+        pdf.cell(0, 8, f'Top {len(table)} configs by delay', 0, 1)
+    else:
+        table = rows
+
+    pdf.table_header()
+    pdf.in_table = True
+    for row in table:
+        pdf.row(row)
+    pdf.in_table = False
+
+    pdf.output(filename)
+    return True
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def submit_pdf_report(rows: Sequence[ReportRow], summary: Dict, filename: str,
+                      top_n: Optional[int] = None):
+    """ساخت گزارش در یک پروسه جداگانه؛ یک Future برمی‌گرداند"""
+    global _executor
+    if _executor is None:
+        # fork از یک پروسه چندنخی Qt ناامن است؛ پروسه تمیز با spawn ساخته می‌شود
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    return _executor.submit(build_pdf_report, list(rows), summary, filename, top_n)
@@ -0,0 +1,136 @@
+# pipeline.py
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from config_pool import ConfigPool
+from config_processor import ConfigProcessor
+from config_sampler import ConfigSampler
+from config_tester import ConfigTester, DistributedTester, TestResult
+from probe_targets import DEFAULT_TARGETS, MODE_RACE, ProbeTarget
+from profiler import ProfileSession, checkpoint, run_async
+from report_generator import ReportGenerator
+from result_history import ResultHistory
+from subscription_manager import DownloadError, SubscriptionManager, download_subscription
+
+
+def download_all(processor: ConfigProcessor, links: List[str]) -> int:
+    """دانلود همه لینک‌ها و افزودن کانفیگ‌ها به مجموعه مشترک"""
+    added = 0
+    for link in links:
+        try:
+            content = download_subscription(link)
+        except (DownloadError, requests.exceptions.RequestException) as e:
+            print(f"Error downloading {link}: {e}")
+            continue
+        added += len(processor.ingest_subscription(link, content).added)
+    return added
+
+
+def run_tests(configs, max_retries: int = 3, targets: Sequence[ProbeTarget] = DEFAULT_TARGETS,
+              mode: str = MODE_RACE, workers: int = 0,
+              coordinator: Optional[Tuple[str, int]] = None, replicas: int = 1,
+              token: Optional[str] = None) -> List[TestResult]:
+    """اجرای تست‌ها بدون رابط گرافیکی؛ نتایج از سیگنال result جمع می‌شوند
+
+    با workers یا coordinator تست‌ها بین پردازش‌های کارگر محلی و کارگرهای
+    متصل از ماشین‌های دیگر (روی آدرس coordinator) پخش می‌شوند.
+    """
+    results: List[TestResult] = []
+    if workers > 0 or coordinator is not None:
+        host, port = coordinator or ('127.0.0.1', 0)
+        tester = DistributedTester(configs, workers=workers, host=host, port=port, replicas=replicas,
+                                   max_retries=max_retries, targets=targets, mode=mode, token=token)
+        if coordinator is not None:
+            print(f"Coordinator on {host}:{port}; join with --worker HOST:{port} --token {tester.token}")
+    else:
+        tester = ConfigTester(configs, max_retries=max_retries, targets=targets, mode=mode)
+    tester.result.connect(results.append)
+    run_async(tester.run_tests())
+    return results
+
+
+def run_pipeline(max_configs: int = 100, report_dir: Optional[Path] = None,
+                 targets: Sequence[ProbeTarget] = DEFAULT_TARGETS, mode: str = MODE_RACE,
+                 pool: Optional[ConfigPool] = None, history: Optional[ResultHistory] = None,
+                 **distributed) -> Dict:
+    """اجرای کامل دانلود، پارس، نمونه‌برداری، تست و گزارش بدون رابط گرافیکی
+
+    با pool (مجموعه کانفیگ‌های رابط گرافیکی) دانلود دوباره انجام نمی‌شود و
+    با history نتایج در همان تاریخچه مشترک رابط گرافیکی ثبت می‌شوند.
+    """
+    if pool is None:
+        manager = SubscriptionManager()
+        processor = ConfigProcessor()
+        links = manager.get_links()
+        for link in links:
+            weight, quota = manager.get_link_options(link)
+            processor.pool.set_source_options(link, weight, quota)
+        download_all(processor, links)
+        pool = processor.pool
+        checkpoint('download_parse')
+    links = pool.sources()
+
+    history = history or ResultHistory()
+    configs = ConfigSampler(history).select(pool, max_configs)
+    results = run_tests(configs, targets=targets, mode=mode, **distributed)
+    for result in results:
+        if result.config.fingerprint and result.error != "Cancelled":
+            history.record(result.config.fingerprint, result.config.type,
+                           result.success, result.delay)
+    history.flush()
+    checkpoint('test')
+
+    generator = ReportGenerator()
+    report_dir = Path(report_dir) if report_dir else generator.report_dir
+    report_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    summary = generator.generate_summary(results)
+    generator.generate_csv(results, str(report_dir / f'report_{stamp}.csv'))
+    with open(report_dir / f'summary_{stamp}.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    checkpoint('report')
+
+    print(f"{len(links)} links, {len(pool)} configs, {len(results)} tested, "
+          f"{summary['successful_configs']} successful")
+    return summary
+
+
+def run_profiled_pipeline(max_configs: int = 100, label: str = 'pipeline',
+                          all_threads: bool = True, **kwargs) -> Path:
+    """اجرای کامل pipeline در حالت پروفایل؛ مسیر پوشه خروجی را برمی‌گرداند"""
+    with ProfileSession(label, all_threads=all_threads) as session:
+        run_pipeline(max_configs, **kwargs)
+    return session.directory
+
+
+class PipelineWorker(QThread):
+    """اجرای یک چرخه کامل با پروفایل از رابط گرافیکی
+
+    روی همان مجموعه کانفیگ‌ها و تنظیمات تست رابط گرافیکی اجرا می‌شود و
+    فقط همین نخ پروفایل می‌شود، نه تست‌های دیگری که همزمان در حال اجرا هستند.
+    pool باید کپی گرفته‌شده در نخ رابط گرافیکی باشد (ConfigPool.copy)، چون
+    مجموعه اصلی با به‌روزرسانی ساب‌اسکریپشن‌ها تغییر می‌کند.
+    """
+    finished = pyqtSignal(bool, str)  # موفقیت، مسیر پوشه پروفایل یا پیام خطا
+
+    def __init__(self, max_configs: int = 100, pool: Optional[ConfigPool] = None,
+                 history: Optional[ResultHistory] = None, **probe):
+        super().__init__()
+        self.max_configs = max_configs
+        self.pool = pool
+        self.history = history
+        self.probe = probe
+
+    def run(self):
+        try:
+            directory = run_profiled_pipeline(self.max_configs, label='gui', all_threads=False,
+                                              pool=self.pool, history=self.history, **self.probe)
+            self.finished.emit(True, str(directory))
+        except Exception as e:
+            print(f"Error running profiled pipeline: {e}")
+            self.finished.emit(False, str(e))
@@ -0,0 +1,213 @@
+# pool_snapshot.py
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from config_processor import ConfigData
+from result_history import TYPE_CODES, TYPE_NAMES, fingerprint_key
+
+SNAPSHOT_PATH = Path.home() / '.config_manager' / 'pool.snap'
+MAGIC = b'CMSNAP01'
+VERSION = 2
+
+# magic، نسخه، تعداد رکورد، آفست جدول رشته‌ها، اندازه جدول رشته‌ها
+HEADER = struct.Struct('<8sIIQQ')
+# کلید fingerprint، تاخیر، پورت، کد نوع، وضعیت تست و پنج رشته (آفست، طول)
+RECORD = struct.Struct('<QfHBB10I')
+STRING_FIELDS = ('name', 'server', 'uri', 'source', 'error')
+
+STATE_UNTESTED = 0
+STATE_SUCCESS = 1
+STATE_FAILED = 2
+
+SNAPSHOT_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('delay', '<f4'),
+    ('port', '<u2'),
+    ('type', 'u1'),
+    ('state', 'u1'),
+    ('strings', '<u4', (len(STRING_FIELDS), 2)),
+])
+assert SNAPSHOT_DTYPE.itemsize == RECORD.size
+
+
+class _StringTable:
+    def __init__(self):
+        self.data = bytearray()
+        self._index: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, value: str) -> Tuple[int, int]:
+        ref = self._index.get(value)
+        if ref is None:
+            encoded = value.encode('utf-8')
+            ref = self._index[value] = (len(self.data), len(encoded))
+            self.data += encoded
+        return ref
+
+
+def save_snapshot(configs: Iterable[ConfigData], results: Dict[str, object],
+                  path: Path = SNAPSHOT_PATH) -> int:
+    """نوشتن مجموعه کانفیگ‌ها و آخرین نتیجه هر کدام؛ فایل به صورت اتمی جایگزین می‌شود"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    strings = _StringTable()
+    tmp = path.with_suffix('.tmp')
+    count = 0
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        for config in configs:
+            # رکوردی که در قالب ثابت جا نمی‌شود (مثلا پورت خارج از بازه) ذخیره نمی‌شود
+            if not isinstance(config.port, int) or not 0 < config.port <= 0xFFFF:
+                continue
+            result = results.get(config.fingerprint)
+            if result is None:
+                state, delay, error = STATE_UNTESTED, 0.0, ''
+            elif result.success:
+                state, delay, error = STATE_SUCCESS, result.delay, ''
+            else:
+                state, delay, error = STATE_FAILED, -1.0, result.error or ''
+            # جزئیات با decode() از روی URI دوباره ساخته می‌شوند و ذخیره نمی‌شوند
+            refs = []
+            for value in (config.name, config.server, config.uri, config.source, error):
+                refs.extend(strings.add(value))
+            try:
+                record = RECORD.pack(fingerprint_key(config.fingerprint), delay, config.port,
+                                     TYPE_CODES.get(config.type, 0), state, *refs)
+            except (struct.error, OverflowError, ValueError) as e:
+                print(f"Error saving snapshot record {config.fingerprint}: {e}")
+                continue
+            f.write(record)
+            count += 1
+        offset = f.tell()
+        f.write(strings.data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, count, offset, len(strings.data)))
+    os.replace(tmp, path)
+    return count
+
+
+class ConfigSnapshot:
+    """دسترسی فقط‌خواندنی به snapshot از طریق mmap؛ هر رکورد فقط هنگام دسترسی ساخته می‌شود"""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count, offset, size = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Unsupported snapshot format: {self.path}")
+        except Exception:
+            self._file.close()
+            raise
+        # ستون‌ها بدون کپی روی همان حافظه نگاشت‌شده قرار می‌گیرند
+        self.records = np.frombuffer(self._mmap, dtype=SNAPSHOT_DTYPE, count=count, offset=HEADER.size)
+        self._strings_offset = offset
+
+    @classmethod
+    def open(cls, path: Path = SNAPSHOT_PATH) -> Optional['ConfigSnapshot']:
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            if Path(path).exists():
+                print(f"Error loading snapshot: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _string(self, index: int, field: int) -> str:
+        offset, length = self.records['strings'][index, field]
+        start = self._strings_offset + int(offset)
+        return self._mmap[start:start + int(length)].decode('utf-8')
+
+    def fingerprint(self, index: int) -> str:
+        return f"{int(self.records['key'][index]):016x}"
+
+    def config(self, index: int) -> ConfigData:
+        record = self.records[index]
+        return ConfigData(
+            type=TYPE_NAMES.get(int(record['type']), 'unknown'),
+            name=self._string(index, 0),
+            server=self._string(index, 1),
+            port=int(record['port']),
+            uri=self._string(index, 2),
+            fingerprint=self.fingerprint(index),
+            source=self._string(index, 3),
+        )
+
+    def result(self, index: int) -> Optional[Tuple[bool, float, Optional[str]]]:
+        """(موفقیت، تاخیر، خطا) آخرین تست یا None برای کانفیگ تست‌نشده"""
+        state = int(self.records['state'][index])
+        if state == STATE_UNTESTED:
+            return None
+        if state == STATE_SUCCESS:
+            return True, float(self.records['delay'][index]), None
+        return False, float('inf'), self._string(index, 4) or None
+
+    def indices_of_type(self, config_type: Optional[str] = None) -> np.ndarray:
+        if config_type is None:
+            return np.arange(len(self))
+        return np.flatnonzero(self.records['type'] == TYPE_CODES.get(config_type, 0))
+
+    def close(self):
+        self.records = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # هنوز آرایه‌ای به حافظه نگاشت‌شده اشاره می‌کند؛ با آزاد شدن آن بسته می‌شود
+            pass
+        self._file.close()
+
+
+class SnapshotView(Sequence):
+    """دنباله‌ای از کانفیگ‌های snapshot برای مدل جدول؛ رکوردها هنگام نمایش ساخته می‌شوند"""
+
+    def __init__(self, snapshot: ConfigSnapshot, indices: Optional[np.ndarray] = None):
+        self.snapshot = snapshot
+        self.indices = snapshot.indices_of_type() if indices is None else indices
+        self._cache: Dict[int, ConfigData] = {}
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        index = int(self.indices[position])
+        config = self._cache.get(index)
+        if config is None:
+            config = self._cache[index] = self.snapshot.config(index)
+        return config
+
+    def of_type(self, config_type: Optional[str]) -> 'SnapshotView':
+        return SnapshotView(self.snapshot, self.snapshot.indices_of_type(config_type))
+
+
+class SnapshotLoader(QThread):
+    """ساخت کامل مجموعه کانفیگ‌ها و نتایج از snapshot در پس‌زمینه"""
+    finished = pyqtSignal(object, object)  # {منبع: {fingerprint: ConfigData}}، [(config, success, delay, error)]
+
+    def __init__(self, snapshot: ConfigSnapshot):
+        super().__init__()
+        self.snapshot = snapshot
+
+    def run(self):
+        sources: Dict[str, Dict[str, ConfigData]] = {}
+        results: List[Tuple[ConfigData, bool, float, Optional[str]]] = []
+        try:
+            for index in range(len(self.snapshot)):
+                config = self.snapshot.config(index)
+                sources.setdefault(config.source, {})[config.fingerprint] = config
+                result = self.snapshot.result(index)
+                if result is not None:
+                    results.append((config, *result))
+        except Exception as e:
+            print(f"Error loading snapshot: {e}")
+        self.finished.emit(sources, results)
@@ -0,0 +1,121 @@
+# probe_targets.py
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import aiohttp
+
+# اولین پاسخ موفق پذیرفته می‌شود
+MODE_RACE = 'race'
+# همه مقصدها تست می‌شوند و دست‌کم نیمی باید موفق باشند
+MODE_AGGREGATE = 'aggregate'
+PROBE_MODES = (MODE_RACE, MODE_AGGREGATE)
+
+
+@dataclass(frozen=True)
+class ProbeTarget:
+    url: str
+    method: str = 'GET'
+    # کدهای وضعیت قابل قبول؛ خالی یعنی هر پاسخ 2xx یا 3xx
+    expected_status: Tuple[int, ...] = ()
+
+    def accepts(self, status: int) -> bool:
+        if self.expected_status:
+            return status in self.expected_status
+        return 200 <= status < 400
+
+    def __str__(self) -> str:
+        return self.url if self.method == 'GET' else f"{self.method} {self.url}"
+
+
+# مقصدهای سبک: پاسخ 204 بدون بدنه یا فقط هدر
+DEFAULT_TARGETS = (
+    ProbeTarget('http://www.gstatic.com/generate_204', expected_status=(204,)),
+    ProbeTarget('http://cp.cloudflare.com/generate_204', expected_status=(204,)),
+)
+
+
+class ProbeError(Exception):
+    pass
+
+
+def parse_targets(text: str) -> List[ProbeTarget]:
+    """خواندن مقصدها از متن؛ هر مورد با کاما یا خط جدا و پیشوند اختیاری HEAD"""
+    targets = []
+    for item in text.replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        method, _, url = item.partition(' ')
+        if url and method.upper() in ('GET', 'HEAD'):
+            item = url.strip()
+            method = method.upper()
+        else:
+            method = 'GET'
+        if not item.startswith(('http://', 'https://')):
+            continue
+        expected = (204,) if item.rstrip('/').endswith('generate_204') else ()
+        targets.append(ProbeTarget(item, method, expected))
+    return targets
+
+
+def format_targets(targets: Sequence[ProbeTarget]) -> str:
+    return ', '.join(str(target) for target in targets)
+
+
+async def probe_target(session: aiohttp.ClientSession, target: ProbeTarget, proxy: str,
+                       timeout: float) -> float:
+    """یک درخواست از طریق پروکسی؛ فقط هدرها خوانده و تاخیر (ms) برگردانده می‌شود"""
+    start = time.perf_counter()
+    response = await session.request(
+        target.method, target.url, proxy=proxy, allow_redirects=False,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+    delay = (time.perf_counter() - start) * 1000
+    status = response.status
+    # بدنه خوانده نمی‌شود؛ اتصال بسته می‌شود
+    response.close()
+    if not target.accepts(status):
+        raise ProbeError(f"HTTP {status} from {target.url}")
+    return delay
+
+
+async def race_targets(session: aiohttp.ClientSession, targets: Sequence[ProbeTarget],
+                       proxy: str, timeout: float) -> float:
+    """اولین مقصد موفق برنده است؛ بقیه درخواست‌ها لغو می‌شوند"""
+    if len(targets) == 1:
+        return await probe_target(session, targets[0], proxy, timeout)
+    tasks = [asyncio.ensure_future(probe_target(session, t, proxy, timeout)) for t in targets]
+    error = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except Exception as e:
+                error = error or e
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def aggregate_targets(session: aiohttp.ClientSession, targets: Sequence[ProbeTarget],
+                            proxy: str, timeout: float) -> float:
+    """همه مقصدها تست می‌شوند؛ اگر دست‌کم نیمی موفق باشند میانه تاخیرها برگردانده می‌شود"""
+    results = await asyncio.gather(
+        *(probe_target(session, t, proxy, timeout) for t in targets), return_exceptions=True
+    )
+    delays = [r for r in results if not isinstance(r, BaseException)]
+    if not delays or len(delays) * 2 < len(targets):
+        raise next(r for r in results if isinstance(r, BaseException))
+    return statistics.median(delays)
+
+
+async def run_probe(session: aiohttp.ClientSession, targets: Sequence[ProbeTarget], proxy: str,
+                    mode: str = MODE_RACE, timeout: float = 10) -> float:
+    if mode == MODE_AGGREGATE:
+        return await aggregate_targets(session, targets, proxy, timeout)
+    return await race_targets(session, targets, proxy, timeout)
@@ -0,0 +1,195 @@
+# profiler.py
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROFILE_ROOT = Path.home() / '.config_manager' / 'profiles'
+# callbackهایی که بیش از این مدت event loop را مسدود کنند ثبت می‌شوند (ثانیه)
+SLOW_CALLBACK_SECONDS = 0.05
+TRACEMALLOC_FRAMES = 10
+TOP_STATS = 40
+
+# جلسه‌ای که همه نخ‌ها را پوشش می‌دهد (مثلا --profile برای کل رابط گرافیکی)
+_active: Optional['ProfileSession'] = None
+# جلسه محدود به یک نخ (مثلا pipeline پروفایل‌شده از رابط گرافیکی)
+_local = threading.local()
+
+
+def active_session() -> Optional['ProfileSession']:
+    """جلسه نخ فعلی؛ در غیر این صورت جلسه سراسری"""
+    return getattr(_local, 'session', None) or _active
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """جمع‌آوری هشدارهای حالت debug asyncio (Executing ... took ... seconds)"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.records: List[str] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(f"{datetime.fromtimestamp(record.created).isoformat()} {record.getMessage()}")
+
+
+class ProfileSession:
+    """پروفایل یک چرخه کامل: cProfile، callbackهای کند asyncio و tracemalloc
+
+    خروجی در یک پوشه زمان‌دار زیر ~/.config_manager/profiles نوشته می‌شود.
+    با all_threads=False فقط نخی که جلسه را باز کرده پروفایل می‌شود و نخ‌های
+    تست دیگر به آن نمی‌پیوندند؛ tracemalloc در هر حال کل پروسه را می‌بیند.
+    """
+
+    def __init__(self, label: str = 'pipeline', root: Optional[Path] = None,
+                 slow_callback: float = SLOW_CALLBACK_SECONDS, all_threads: bool = True):
+        self.label = label
+        self.all_threads = all_threads
+        self.root = Path(root) if root else PROFILE_ROOT
+        self.slow_callback = slow_callback
+        self.directory: Optional[Path] = None
+        self.profiler = cProfile.Profile()
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._slow = _SlowCallbackHandler()
+        self._stages: List[Dict] = []
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+        self._stage_started = 0.0
+        self._closing = False
+
+    def __enter__(self) -> 'ProfileSession':
+        global _active
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.directory = self.root / f"{stamp}_{self.label}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        logging.getLogger('asyncio').addHandler(self._slow)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._started = self._stage_started = time.perf_counter()
+        if self.all_threads:
+            _active = self
+        else:
+            _local.session = self
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.profiler.disable()
+        if self.all_threads:
+            _active = None
+        else:
+            _local.session = None
+        self._closing = True
+        self.checkpoint('end')
+        tracemalloc.stop()
+        logging.getLogger('asyncio').removeHandler(self._slow)
+        try:
+            self._write()
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+        return False
+
+    def checkpoint(self, stage: str):
+        """ثبت زمان و اوج حافظه مرحله فعلی و ذخیره snapshot تخصیص‌ها"""
+        if not tracemalloc.is_tracing():
+            return
+        now = time.perf_counter()
+        current, peak = tracemalloc.get_traced_memory()
+        # هزینه گرفتن snapshot نباید در آمار cProfile دیده شود
+        profiling = not self._closing
+        if profiling:
+            self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        lines = [f"stage: {stage}", f"current: {current / 1024 / 1024:.2f} MB",
+                 f"peak: {peak / 1024 / 1024:.2f} MB", "", "Top allocations:"]
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:TOP_STATS]]
+        if self._snapshot is not None:
+            lines += ["", "Growth since previous stage:"]
+            lines += [str(stat) for stat in snapshot.compare_to(self._snapshot, 'lineno')[:TOP_STATS]]
+        index = len(self._stages) + 1
+        (self.directory / f"memory_{index:02d}_{stage}.txt").write_text("\n".join(lines), encoding='utf-8')
+        self._stages.append({
+            'stage': stage,
+            'seconds': round(now - self._stage_started, 4),
+            'current_mb': round(current / 1024 / 1024, 2),
+            'peak_mb': round(peak / 1024 / 1024, 2),
+        })
+        self._snapshot = snapshot
+        # اوج حافظه هر مرحله جداگانه اندازه‌گیری می‌شود
+        tracemalloc.reset_peak()
+        if profiling:
+            self.profiler.enable()
+        self._stage_started = time.perf_counter()
+
+    def profile_thread(self, func, *args):
+        """اجرای تابع در نخ فعلی با یک cProfile جداگانه که در پایان ادغام می‌شود"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # از پایتون ۳.۱۲ فقط یک پروفایلر فعال مجاز است و همان همه نخ‌ها را پوشش می‌دهد
+            return func(*args)
+        with self._lock:
+            self._thread_profiles.append(profile)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+
+    async def _debug_run(self, coro):
+        asyncio.get_running_loop().slow_callback_duration = self.slow_callback
+        return await coro
+
+    def _write(self):
+        stats = pstats.Stats(self.profiler)
+        for profile in self._thread_profiles:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # نخی که هیچ فراخوانی ثبت نکرده است
+                pass
+        stats.dump_stats(str(self.directory / 'cprofile.prof'))
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(TOP_STATS)
+        stats.sort_stats('tottime').print_stats(TOP_STATS)
+        (self.directory / 'cprofile.txt').write_text(text.getvalue(), encoding='utf-8')
+        (self.directory / 'asyncio_slow.log').write_text("\n".join(self._slow.records), encoding='utf-8')
+        summary = {
+            'label': self.label,
+            'seconds': round(time.perf_counter() - self._started, 4),
+            'slow_callbacks': len(self._slow.records),
+            'slow_callback_threshold': self.slow_callback,
+            'stages': self._stages,
+        }
+        (self.directory / 'summary.json').write_text(json.dumps(summary, indent=2), encoding='utf-8')
+
+
+def run_async(coro):
+    """asyncio.run؛ در حالت پروفایل با debug و تشخیص callbackهای کند"""
+    session = active_session()
+    if session is None:
+        return asyncio.run(coro)
+    return asyncio.run(session._debug_run(coro), debug=True)
+
+
+def checkpoint(stage: str):
+    session = active_session()
+    if session is not None:
+        session.checkpoint(stage)
+
+
+def profile_thread(func, *args):
+    """اجرای کار یک نخ پس‌زمینه؛ در حالت پروفایل در آمار جلسه فعال ادغام می‌شود"""
+    session = active_session()
+    if session is None:
+        return func(*args)
+    return session.profile_thread(func, *args)
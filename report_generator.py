@@ -1,152 +1,167 @@
 # report_generator.py
-import csv
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
-import matplotlib.pyplot as plt
-from fpdf import FPDF
+from typing import List, Dict, Optional
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QTextEdit, QFileDialog, QComboBox, QLabel,
-                           QTableWidget, QTableWidgetItem)
-from PyQt6.QtCore import Qt
+                           QTableWidget, QTableWidgetItem, QProgressBar, QMessageBox,
+                           QCheckBox, QSpinBox)
+from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
+import numpy as np
 from config_processor import ConfigData
 from config_tester import TestResult
+from report_stats import StatsAccumulator
+from analytics import HistoryAnalytics
+from result_history import ResultHistory
+from exporters import ExportWorker, result_record, write_csv, write_ndjson, zstd_available
+from pdf_report import build_pdf_report, result_to_row, submit_pdf_report
+from charts import (CHART_BOXPLOT, CHART_ECDF, CHART_HISTOGRAM, CHART_TIMESERIES,
+                    ChartData, ChartRenderer)
+from metrics import REPORT_SECONDS
 
 class ReportGenerator:
     def __init__(self):
         self.report_dir = Path.home() / '.config_manager' / 'reports'
         self.report_dir.mkdir(parents=True, exist_ok=True)
+        self.chart_renderer = ChartRenderer()
 
-    def generate_csv(self, results: List[TestResult], filename: str) -> bool:
+    def generate_csv(self, results: List[TestResult], filename: str, progress=None) -> bool:
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                # نوشتن هدر
-                writer.writerow(['Name', 'Type', 'Server', 'Port', 'Delay (ms)', 'Status'])
-                
-                # نوشتن داده‌ها
-                for result in results:
-                    writer.writerow([
-                        result.config.name,
-                        result.config.type,
-                        result.config.server,
-                        result.config.port,
-                        f"{result.delay:.1f}",
-                        "Success" if result.success else f"Failed: {result.error}"
-                    ])
+            # نوشتن ردیف به ردیف؛ پسوند .gz یا .zst فایل را فشرده می‌کند
+            with REPORT_SECONDS.time():
+                write_csv(results, filename, progress)
             return True
         except Exception as e:
             print(f"Error generating CSV: {e}")
             return False
 
-    def generate_pdf(self, results: List[TestResult], filename: str) -> bool:
+    def generate_ndjson(self, results: List[TestResult], filename: str, progress=None) -> bool:
         try:
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # تنظیم فونت و استایل
-            pdf.add_font('DejaVu', '', 'DejaVuSansCondensed.ttf', uni=True)
-            pdf.set_font('DejaVu', '', 12)
-            
-            # عنوان گزارش
-            pdf.cell(0, 10, 'Configuration Test Report', 0, 1, 'C')
-            pdf.ln(10)
-            
-            # اطلاعات کلی
-            total_configs = len(results)
-            successful_configs = len([r for r in results if r.success])
-            avg_delay = sum(r.delay for r in results if r.success) / successful_configs if successful_configs > 0 else 0
-            
-            pdf.cell(0, 10, f'Total Configs: {total_configs}', 0, 1)
-            pdf.cell(0, 10, f'Successful Configs: {successful_configs}', 0, 1)
-            pdf.cell(0, 10, f'Average Delay: {avg_delay:.1f} ms', 0, 1)
-            pdf.ln(10)
-            
-            # جدول نتایج
-            col_widths = [40, 30, 40, 20, 30, 30]
-            headers = ['Name', 'Type', 'Server', 'Port', 'Delay', 'Status']
-            
-            # هدر جدول
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 10, header, 1)
-            pdf.ln()
-            
-            # داده‌های جدول
-            for result in results:
-                pdf.cell(col_widths[0], 10, result.config.name[:20], 1)
-                pdf.cell(col_widths[1], 10, result.config.type, 1)
-                pdf.cell(col_widths[2], 10, result.config.server[:20], 1)
-                pdf.cell(col_widths[3], 10, str(result.config.port), 1)
-                pdf.cell(col_widths[4], 10, f"{result.delay:.1f}", 1)
-                status = "Success" if result.success else "Failed"
-                pdf.cell(col_widths[5], 10, status, 1)
-                pdf.ln()
-            
-            # ذخیره فایل
-            pdf.output(filename)
+            with REPORT_SECONDS.time():
+                write_ndjson((result_record(r) for r in results), filename, progress)
             return True
+        except Exception as e:
+            print(f"Error generating NDJSON: {e}")
+            return False
+
+    def generate_pdf(self, results: List[TestResult], filename: str,
+                     summary: Optional[Dict] = None, top_n: Optional[int] = None) -> bool:
+        try:
+            # اطلاعات کلی (در صورت وجود، از آمار تجمعی آماده استفاده می‌شود)
+            if summary is None:
+                summary = self.generate_summary(results)
+            rows = [result_to_row(r) for r in results]
+            with REPORT_SECONDS.time():
+                return build_pdf_report(rows, summary, filename, top_n)
         except Exception as e:
             print(f"Error generating PDF: {e}")
             return False
 
     def generate_summary(self, results: List[TestResult]) -> Dict:
-        total_configs = len(results)
-        successful_configs = len([r for r in results if r.success])
-        
-        type_stats = {}
-        for result in results:
-            config_type = result.config.type
-            if config_type not in type_stats:
-                type_stats[config_type] = {'total': 0, 'successful': 0}
-            type_stats[config_type]['total'] += 1
-            if result.success:
-                type_stats[config_type]['successful'] += 1
-        
-        delays = [r.delay for r in results if r.success]
-        avg_delay = sum(delays) / len(delays) if delays else 0
-        min_delay = min(delays) if delays else 0
-        max_delay = max(delays) if delays else 0
-        
-        return {
-            'total_configs': total_configs,
-            'successful_configs': successful_configs,
-            'success_rate': (successful_configs / total_configs * 100) if total_configs > 0 else 0,
-            'type_stats': type_stats,
-            'avg_delay': avg_delay,
-            'min_delay': min_delay,
-            'max_delay': max_delay
-        }
-
-    def generate_delay_chart(self, results: List[TestResult], filename: str) -> bool:
+        # همه آمارها در یک گذر روی نتایج محاسبه می‌شوند
+        stats = StatsAccumulator()
+        stats.extend(results)
+        return stats.summary()
+
+    def generate_delay_chart(self, results: List[TestResult], filename: str,
+                             kind: str = CHART_HISTOGRAM) -> bool:
+        with REPORT_SECONDS.time():
+            return self.chart_renderer.render(kind, ChartData.from_results(results), filename)
+
+class AnalyticsWorker(QThread):
+    """محاسبه تحلیل تاریخچه تست‌ها در پس‌زمینه"""
+    finished = pyqtSignal(dict)
+
+    def __init__(self, history: ResultHistory):
+        super().__init__()
+        self.history = history
+
+    def run(self):
         try:
-            successful_results = [r for r in results if r.success]
-            if not successful_results:
-                return False
-            
-            delays = [r.delay for r in successful_results]
-            names = [r.config.name for r in successful_results]
-            
-            plt.figure(figsize=(12, 6))
-            plt.bar(names, delays)
-            plt.xticks(rotation=45, ha='right')
-            plt.xlabel('Config Name')
-            plt.ylabel('Delay (ms)')
-            plt.title('Config Delays')
-            plt.tight_layout()
-            
-            plt.savefig(filename)
-            plt.close()
-            return True
+            analytics = HistoryAnalytics.from_history(self.history)
+            if not len(analytics):
+                self.finished.emit({})
+                return
+            availability = analytics.server_availability()
+            self.finished.emit({
+                'samples': len(analytics),
+                'type_percentiles': analytics.grouped_percentiles(),
+                'servers': len(availability.keys),
+                'availability': availability.availability,
+                'jitter': availability.jitter,
+                'trend': analytics.trend(3600, 24),
+            })
         except Exception as e:
-            print(f"Error generating chart: {e}")
-            return False
+            print(f"Error computing analytics: {e}")
+            self.finished.emit({})
+
+class PdfReportWorker(QThread):
+    """ساخت گزارش PDF در پروسه جداگانه و انتظار برای نتیجه در پس‌زمینه"""
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, results: List[TestResult], summary: Dict, filename: str,
+                 top_n: Optional[int] = None):
+        super().__init__()
+        self.rows = [result_to_row(r) for r in results]
+        self.summary = summary
+        self.filename = filename
+        self.top_n = top_n
+
+    def run(self):
+        try:
+            with REPORT_SECONDS.time():
+                submit_pdf_report(self.rows, self.summary, self.filename, self.top_n).result()
+            self.finished.emit(True, self.filename)
+        except Exception as e:
+            print(f"Error generating PDF: {e}")
+            self.finished.emit(False, str(e))
+
+class ChartWorker(QThread):
+    """رسم نمودار در پس‌زمینه"""
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, renderer: ChartRenderer, kind: str, data: ChartData,
+                 filename: str, history: Optional[ResultHistory] = None):
+        super().__init__()
+        self.renderer = renderer
+        self.kind = kind
+        self.data = data
+        self.filename = filename
+        self.history = history
+
+    def run(self):
+        try:
+            if self.kind == CHART_TIMESERIES and self.history is not None:
+                self.data.trend = HistoryAnalytics.from_history(self.history).trend(3600, 24)
+            with REPORT_SECONDS.time():
+                success = self.renderer.render(self.kind, self.data, self.filename)
+        except Exception as e:
+            print(f"Error rendering chart: {e}")
+            success = False
+        self.finished.emit(success, self.filename)
 
 class ReportTab(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, history: Optional[ResultHistory] = None):
         super().__init__(parent)
         self.report_generator = ReportGenerator()
         self.test_results = []
+        # جایگاه نتیجه هر کانفیگ در test_results برای جایگزینی نتایج تکراری
+        self._positions: Dict[str, int] = {}
+        self._stats_dirty = False
+        self.stats = StatsAccumulator()
+        # همان نمونه تب تست تا رکوردهای ذخیره‌نشده هم در تحلیل دیده شوند
+        self.history = history or ResultHistory()
+        self.analytics_worker = None
+        # درخواست تحلیل در حین اجرای تحلیل قبلی پس از پایان آن اجرا می‌شود
+        self._analytics_pending = False
+        self._analytics_busy = False
+        self.export_worker = None
+        self.chart_worker = None
+        # به‌روزرسانی خلاصه حداکثر چند بار در ثانیه هنگام دریافت نتایج
+        self._summary_timer = QTimer(self)
+        self._summary_timer.setSingleShot(True)
+        self._summary_timer.setInterval(250)
+        self._summary_timer.timeout.connect(self._update_summary)
         self._init_ui()
 
     def _init_ui(self):
@@ -156,8 +171,15 @@ class ReportTab(QWidget):
         format_layout = QHBoxLayout()
         format_layout.addWidget(QLabel("فرمت گزارش:"))
         self.format_combo = QComboBox()
-        self.format_combo.addItems(["CSV", "PDF"])
+        self.format_combo.addItems(["CSV", "NDJSON", "PDF"])
         format_layout.addWidget(self.format_combo)
+        # حالت خلاصه برای PDF: آمار کلی و فقط N کانفیگ برتر
+        self.pdf_top_check = QCheckBox("PDF: فقط خلاصه و کانفیگ‌های برتر")
+        self.pdf_top_spin = QSpinBox()
+        self.pdf_top_spin.setRange(1, 10000)
+        self.pdf_top_spin.setValue(100)
+        format_layout.addWidget(self.pdf_top_check)
+        format_layout.addWidget(self.pdf_top_spin)
         format_layout.addStretch()
         layout.addLayout(format_layout)
         
@@ -166,27 +188,125 @@ class ReportTab(QWidget):
         self.summary_text.setReadOnly(True)
         layout.addWidget(self.summary_text)
         
+        # تحلیل تاریخچه تست‌ها
+        self.analytics_text = QTextEdit()
+        self.analytics_text.setReadOnly(True)
+        layout.addWidget(self.analytics_text)
+        
         # دکمه‌های کنترل
         buttons_layout = QHBoxLayout()
         self.generate_button = QPushButton("ایجاد گزارش")
         self.generate_button.clicked.connect(self._generate_report)
+        self.chart_combo = QComboBox()
+        self.chart_combo.addItem("هیستوگرام تاخیر", CHART_HISTOGRAM)
+        self.chart_combo.addItem("توزیع تجمعی تاخیر (ECDF)", CHART_ECDF)
+        self.chart_combo.addItem("تاخیر بر اساس نوع", CHART_BOXPLOT)
+        self.chart_combo.addItem("روند زمانی", CHART_TIMESERIES)
         self.export_chart_button = QPushButton("نمودار تاخیر")
         self.export_chart_button.clicked.connect(self._export_chart)
         
         buttons_layout.addWidget(self.generate_button)
+        buttons_layout.addWidget(self.chart_combo)
         buttons_layout.addWidget(self.export_chart_button)
         layout.addLayout(buttons_layout)
+        
+        # نوار پیشرفت خروجی‌گیری
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
 
     def set_results(self, results: List[TestResult]):
         self.test_results = results
+        self._positions = {r.config.fingerprint: i for i, r in enumerate(results)}
+        self.stats = StatsAccumulator()
+        self.stats.extend(results)
+        self._stats_dirty = False
         self._update_summary()
+        self._update_analytics()
+
+    def _update_analytics(self):
+        if self._analytics_busy:
+            self._analytics_pending = True
+            return
+        if self.analytics_worker is not None:
+            # نتیجه دور قبل رسیده و نخ آن در حال خروج است
+            self.analytics_worker.wait()
+        self._analytics_busy = True
+        self._analytics_pending = False
+        self.analytics_worker = AnalyticsWorker(self.history)
+        self.analytics_worker.finished.connect(self._show_analytics)
+        self.analytics_worker.start()
+
+    def _show_analytics(self, analytics: Dict):
+        self._analytics_busy = False
+        if self._analytics_pending:
+            # نتیجه این دور قدیمی است؛ یک دور دیگر با داده‌های جدید
+            self._update_analytics()
+        if not analytics:
+            self.analytics_text.setText("تاریخچه‌ای برای تحلیل وجود ندارد")
+            return
+        
+        availability = analytics['availability']
+        jitter = analytics['jitter']
+        trend = analytics['trend']
+        
+        text = f"تحلیل تاریخچه ({analytics['samples']} تست، {analytics['servers']} سرور):\n\n"
+        text += "صدک‌های ۵۰ / ۹۰ / ۹۹ تاخیر بر اساس نوع:\n"
+        for config_type, (p50, p90, p99) in analytics['type_percentiles'].items():
+            text += f"{config_type}: {p50:.1f} / {p90:.1f} / {p99:.1f} ms\n"
+        
+        text += "\nدسترس‌پذیری سرورها:\n"
+        text += f"بالای ۹۰٪: {int((availability >= 0.9).sum())}\n"
+        text += f"بین ۵۰ تا ۹۰٪: {int(((availability >= 0.5) & (availability < 0.9)).sum())}\n"
+        text += f"زیر ۵۰٪: {int((availability < 0.5).sum())}\n"
+        measured = jitter[jitter > 0]
+        if len(measured):
+            text += f"میانه jitter: {float(np.median(measured)):.1f} ms\n"
+        
+        text += "\nروند ۲۴ ساعت اخیر (ساعتی):\n"
+        for start, tests, rate, delay in zip(trend['start'], trend['tests'],
+                                             trend['success_rate'], trend['mean_delay']):
+            if tests:
+                hour = datetime.fromtimestamp(start).strftime('%H:%M')
+                delay_text = f"{delay:.1f} ms" if np.isfinite(delay) else "-"
+                text += f"{hour}: {int(tests)} تست، موفقیت {rate * 100:.1f}٪، تاخیر {delay_text}\n"
+        text += f"شیب تغییر تاخیر: {trend['slope']:+.2f} ms در ساعت"
+        
+        self.analytics_text.setText(text)
+
+    def _put_result(self, result: TestResult):
+        position = self._positions.get(result.config.fingerprint)
+        if position is None:
+            self._positions[result.config.fingerprint] = len(self.test_results)
+            self.test_results.append(result)
+            self.stats.add(result)
+        else:
+            # آمار تجمعی حذف ندارد؛ در به‌روزرسانی بعدی خلاصه بازسازی می‌شود
+            self.test_results[position] = result
+            self._stats_dirty = True
+
+    def add_result(self, result: TestResult):
+        self._put_result(result)
+        if not self._summary_timer.isActive():
+            self._summary_timer.start()
+
+    def update_results(self, results: List[TestResult]):
+        """اعمال فقط نتایج تغییرکرده (پایش سلامت) به جای کل مجموعه"""
+        for result in results:
+            self._put_result(result)
+        if not self._summary_timer.isActive():
+            self._summary_timer.start()
 
     def _update_summary(self):
+        if self._stats_dirty:
+            self.stats = StatsAccumulator()
+            self.stats.extend(self.test_results)
+            self._stats_dirty = False
         if not self.test_results:
             self.summary_text.setText("هیچ نتیجه‌ای موجود نیست")
             return
         
-        summary = self.report_generator.generate_summary(self.test_results)
+        summary = self.stats.summary()
         
         text = "خلاصه نتایج:\n\n"
         text += f"تعداد کل کانفیگ‌ها: {summary['total_configs']}\n"
@@ -198,9 +318,17 @@ class ReportTab(QWidget):
             success_rate = (stats['successful'] / stats['total'] * 100) if stats['total'] > 0 else 0
             text += f"{config_type}: {stats['successful']}/{stats['total']} ({success_rate:.1f}%)\n"
         
+        if summary['source_stats']:
+            text += "\nآمار بر اساس منبع:\n"
+            for source, stats in summary['source_stats'].items():
+                success_rate = (stats['successful'] / stats['total'] * 100) if stats['total'] > 0 else 0
+                text += f"{source}: {stats['successful']}/{stats['total']} ({success_rate:.1f}%)\n"
+        
         text += f"\nمیانگین تاخیر: {summary['avg_delay']:.1f} ms\n"
+        text += f"انحراف معیار تاخیر: {summary['std_delay']:.1f} ms\n"
         text += f"کمترین تاخیر: {summary['min_delay']:.1f} ms\n"
-        text += f"بیشترین تاخیر: {summary['max_delay']:.1f} ms"
+        text += f"بیشترین تاخیر: {summary['max_delay']:.1f} ms\n"
+        text += f"صدک ۵۰ / ۹۰ / ۹۹: {summary['p50_delay']:.1f} / {summary['p90_delay']:.1f} / {summary['p99_delay']:.1f} ms"
         
         self.summary_text.setText(text)
 
@@ -208,8 +336,11 @@ class ReportTab(QWidget):
         if not self.test_results:
             return
         
+        if self.export_worker and self.export_worker.isRunning():
+            return
+        
         report_format = self.format_combo.currentText()
-        filters = "CSV Files (*.csv)" if report_format == "CSV" else "PDF Files (*.pdf)"
+        filters = self._export_filters(report_format)
         filename, _ = QFileDialog.getSaveFileName(
             self,
             "ذخیره گزارش",
@@ -217,20 +348,67 @@ class ReportTab(QWidget):
             filters
         )
         
-        if filename:
-            if report_format == "CSV":
-                success = self.report_generator.generate_csv(self.test_results, filename)
-            else:  # PDF
-                success = self.report_generator.generate_pdf(self.test_results, filename)
-            
-            if success:
-                self.parent().parent().statusBar().showMessage(
-                    f"گزارش با موفقیت در {filename} ذخیره شد",
-                    5000
-                )
+        if not filename:
+            return
+        
+        if report_format == "PDF":
+            # PDF در پروسه جداگانه ساخته می‌شود تا رابط کاربری قفل نشود
+            top_n = self.pdf_top_spin.value() if self.pdf_top_check.isChecked() else None
+            self.generate_button.setEnabled(False)
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.show()
+            self.export_worker = PdfReportWorker(
+                self.test_results, self.stats.summary(), filename, top_n
+            )
+            self.export_worker.finished.connect(self._export_finished)
+            self.export_worker.start()
+            return
+        
+        # CSV و NDJSON در پس‌زمینه و به صورت جریانی نوشته می‌شوند
+        results = list(self.test_results)
+        if report_format == "CSV":
+            job = lambda progress: write_csv(results, filename, progress)
+        else:
+            job = lambda progress: write_ndjson((result_record(r) for r in results), filename, progress)
+        
+        self.generate_button.setEnabled(False)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.export_worker = ExportWorker(job, filename, len(results))
+        self.export_worker.progress.connect(self.progress_bar.setValue)
+        self.export_worker.finished.connect(self._export_finished)
+        self.export_worker.start()
+
+    @staticmethod
+    def _export_filters(report_format: str) -> str:
+        if report_format == "PDF":
+            return "PDF Files (*.pdf)"
+        extension = "csv" if report_format == "CSV" else "ndjson"
+        filters = [
+            f"{report_format} Files (*.{extension})",
+            f"Gzip {report_format} (*.{extension}.gz)",
+        ]
+        if zstd_available():
+            filters.append(f"Zstd {report_format} (*.{extension}.zst)")
+        return ";;".join(filters)
+
+    def _export_finished(self, success: bool, message: str):
+        self.progress_bar.hide()
+        self.generate_button.setEnabled(True)
+        if success:
+            self._show_status(f"گزارش با موفقیت در {message} ذخیره شد")
+        else:
+            QMessageBox.warning(self, "خطا", f"خطا در ذخیره گزارش: {message}")
+
+    def _show_status(self, message: str):
+        self.window().statusBar().showMessage(message, 5000)
 
     def _export_chart(self):
-        if not self.test_results:
+        kind = self.chart_combo.currentData()
+        if not self.test_results and kind != CHART_TIMESERIES:
+            return
+        if self.chart_worker and self.chart_worker.isRunning():
             return
         
         filename, _ = QFileDialog.getSaveFileName(
@@ -241,8 +419,21 @@ class ReportTab(QWidget):
         )
         
         if filename:
-            if self.report_generator.generate_delay_chart(self.test_results, filename):
-                self.parent().parent().statusBar().showMessage(
-                    f"نمودار با موفقیت در {filename} ذخیره شد",
-                    5000
-                )
+            # رسم در پس‌زمینه؛ فقط آرایه‌های عددی به worker داده می‌شود
+            self.export_chart_button.setEnabled(False)
+            self.chart_worker = ChartWorker(
+                self.report_generator.chart_renderer,
+                kind,
+                ChartData.from_results(self.test_results),
+                filename,
+                self.history
+            )
+            self.chart_worker.finished.connect(self._chart_finished)
+            self.chart_worker.start()
+
+    def _chart_finished(self, success: bool, filename: str):
+        self.export_chart_button.setEnabled(True)
+        if success:
+            self._show_status(f"نمودار با موفقیت در {filename} ذخیره شد")
+        else:
+            QMessageBox.warning(self, "خطا", "داده‌ای برای رسم این نمودار وجود ندارد")
@@ -0,0 +1,112 @@
+# report_stats.py
+import math
+from typing import Dict, Iterable, Optional
+
+# دقت نسبی هیستوگرام لگاریتمی (۱٪)؛ حافظه مستقل از تعداد نتایج است
+HISTOGRAM_PRECISION = 0.01
+
+
+class LatencyHistogram:
+    """هیستوگرام با سطل‌های لگاریتمی (شبیه HDR) برای صدک‌های جریانی"""
+
+    def __init__(self, precision: float = HISTOGRAM_PRECISION):
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+
+    def add(self, value: float):
+        # مقادیر کمتر از ۱ میلی‌ثانیه در یک سطل قرار می‌گیرند
+        index = int(math.log(value) / self._log_base) if value > 1.0 else 0
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+
+    def _bucket_value(self, index: int) -> float:
+        # نقطه میانی سطل
+        return math.exp((index + 0.5) * self._log_base) if index else 1.0
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= target:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self._buckets))
+
+
+class StatsAccumulator:
+    """آمار تجمعی نتایج تست در یک گذر؛ هر نتیجه فقط یک بار پردازش می‌شود"""
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.type_stats: Dict[str, Dict[str, int]] = {}
+        self.source_stats: Dict[str, Dict[str, int]] = {}
+        # میانگین و واریانس به روش Welford
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min_delay: Optional[float] = None
+        self.max_delay: Optional[float] = None
+        self.histogram = LatencyHistogram()
+
+    @staticmethod
+    def _count(stats: Dict[str, Dict[str, int]], key: str, success: bool):
+        entry = stats.get(key)
+        if entry is None:
+            entry = stats[key] = {'total': 0, 'successful': 0}
+        entry['total'] += 1
+        if success:
+            entry['successful'] += 1
+
+    def add(self, result):
+        self.total += 1
+        config = result.config
+        self._count(self.type_stats, config.type, result.success)
+        if config.source:
+            self._count(self.source_stats, config.source, result.success)
+        if not result.success:
+            return
+
+        delay = result.delay
+        self.successful += 1
+        delta = delay - self._mean
+        self._mean += delta / self.successful
+        self._m2 += delta * (delay - self._mean)
+        if self.min_delay is None or delay < self.min_delay:
+            self.min_delay = delay
+        if self.max_delay is None or delay > self.max_delay:
+            self.max_delay = delay
+        self.histogram.add(delay)
+
+    def extend(self, results: Iterable):
+        for result in results:
+            self.add(result)
+
+    @property
+    def mean_delay(self) -> float:
+        return self._mean if self.successful else 0.0
+
+    @property
+    def std_delay(self) -> float:
+        return math.sqrt(self._m2 / (self.successful - 1)) if self.successful > 1 else 0.0
+
+    def summary(self) -> Dict:
+        summary = {
+            'total_configs': self.total,
+            'successful_configs': self.successful,
+            'success_rate': (self.successful / self.total * 100) if self.total > 0 else 0,
+            # کپی تا گزارش‌های در حال ساخت با ادامه add تغییر نکنند
+            'type_stats': {key: dict(entry) for key, entry in self.type_stats.items()},
+            'source_stats': {key: dict(entry) for key, entry in self.source_stats.items()},
+            'avg_delay': self.mean_delay,
+            'std_delay': self.std_delay,
+            'min_delay': self.min_delay or 0,
+            'max_delay': self.max_delay or 0,
+        }
+        for percent in self.PERCENTILES:
+            summary[f'p{percent}_delay'] = self.histogram.percentile(percent)
+        return summary
@@ -0,0 +1,177 @@
+# result_history.py
+import math
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# کد عددی نوع کانفیگ در رکوردهای تاریخچه
+TYPE_CODES = {"trojan": 1, "vmess": 2, "vless": 3}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+# timestamp، کلید fingerprint، تاخیر (ms، برای خطا -1)، موفقیت، کد نوع
+RECORD = struct.Struct('<dQfBB2x')
+
+# ضریب میانگین متحرک نمایی تاخیر
+LATENCY_ALPHA = 0.3
+
+# رکوردهای قدیمی‌تر از این مدت هنگام فشرده‌سازی حذف می‌شوند (ثانیه)
+RETENTION_SECONDS = 30 * 24 * 3600
+# با عبور فایل از این تعداد رکورد، فشرده‌سازی انجام و حداکثر سه‌چهارم آن نگه داشته می‌شود
+MAX_RECORDS = 2_000_000
+
+
+def fingerprint_key(fingerprint: str) -> int:
+    return int(fingerprint, 16) if fingerprint else 0
+
+
+def result_reward(success: bool, delay: float) -> float:
+    """امتیاز یک تست بین صفر و یک؛ تاخیر کمتر امتیاز بیشتر"""
+    if not success or math.isinf(delay):
+        return 0.0
+    return 1.0 / (1.0 + delay / 1000.0)
+
+
+@dataclass(slots=True)
+class ServerStats:
+    attempts: int = 0
+    successes: int = 0
+    reward_sum: float = 0.0
+    latency_ewma: float = 0.0
+    last_tested: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def mean_reward(self) -> float:
+        return self.reward_sum / self.attempts if self.attempts else 0.0
+
+    def update(self, success: bool, delay: float, timestamp: float):
+        self.attempts += 1
+        self.last_tested = timestamp
+        if success:
+            self.successes += 1
+            if self.successes == 1:
+                self.latency_ewma = delay
+            else:
+                self.latency_ewma += LATENCY_ALPHA * (delay - self.latency_ewma)
+        self.reward_sum += result_reward(success, delay)
+
+
+class ResultHistory:
+    """تاریخچه نتایج تست‌ها در یک فایل باینری فقط-افزودنی با رکوردهای ثابت
+
+    فایل پس از رسیدن به max_records فشرده می‌شود: رکوردهای قدیمی‌تر از
+    retention حذف و فقط جدیدترین رکوردها نگه داشته می‌شوند.
+    """
+
+    def __init__(self, path: Optional[Path] = None, retention: float = RETENTION_SECONDS,
+                 max_records: int = MAX_RECORDS):
+        self.path = path or Path.home() / '.config_manager' / 'history.bin'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention = retention
+        self.max_records = max_records
+        self._stats: Optional[Dict[int, ServerStats]] = None
+        self._pending: List[bytes] = []
+        # یک نمونه بین تب‌ها و نخ‌های تحلیل مشترک است
+        self._lock = threading.RLock()
+        self.total_attempts = 0
+
+    @property
+    def stats(self) -> Dict[int, ServerStats]:
+        with self._lock:
+            if self._stats is None:
+                self._load()
+            return self._stats
+
+    def _load(self):
+        self._stats = {}
+        self.total_attempts = 0
+        try:
+            data = self.path.read_bytes() if self.path.exists() else b''
+            usable = len(data) - len(data) % RECORD.size
+            # رکوردهای ذخیره‌نشده هم در آمار لحاظ می‌شوند
+            for chunk in (memoryview(data)[:usable], b''.join(self._pending)):
+                for timestamp, key, delay, success, _ in RECORD.iter_unpack(chunk):
+                    self._apply(key, bool(success), delay if success else float('inf'), timestamp)
+        except Exception as e:
+            print(f"Error loading test history: {e}")
+
+    def _apply(self, key: int, success: bool, delay: float, timestamp: float):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ServerStats()
+        stats.update(success, delay, timestamp)
+        self.total_attempts += 1
+
+    def get(self, fingerprint: str) -> Optional[ServerStats]:
+        return self.stats.get(fingerprint_key(fingerprint))
+
+    def record(self, fingerprint: str, config_type: str, success: bool, delay: float,
+               timestamp: Optional[float] = None):
+        if not fingerprint:
+            return
+        timestamp = timestamp or time.time()
+        key = fingerprint_key(fingerprint)
+        stored_delay = delay if success and not math.isinf(delay) else -1.0
+        record = RECORD.pack(
+            timestamp, key, stored_delay, 1 if success else 0, TYPE_CODES.get(config_type, 0)
+        )
+        with self._lock:
+            self._pending.append(record)
+            if self._stats is not None:
+                self._apply(key, success, delay, timestamp)
+
+    def flush(self) -> bool:
+        """نوشتن رکوردهای جدید با یک بار دسترسی به فایل"""
+        with self._lock:
+            if not self._pending:
+                return True
+            try:
+                with open(self.path, 'ab') as f:
+                    f.write(b''.join(self._pending))
+                    size = f.tell()
+                self._pending.clear()
+            except Exception as e:
+                print(f"Error saving test history: {e}")
+                return False
+            if size > self.max_records * RECORD.size:
+                self.compact()
+            return True
+
+    def compact(self) -> int:
+        """حذف رکوردهای منقضی و قدیمی‌ترین رکوردهای اضافه؛ تعداد رکوردهای باقی‌مانده"""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        try:
+            data = self.path.read_bytes() if self.path.exists() else b''
+        except OSError as e:
+            print(f"Error compacting test history: {e}")
+            return 0
+        usable = len(data) - len(data) % RECORD.size
+        cutoff = time.time() - self.retention
+        keep = [
+            index for index, (timestamp, *_) in enumerate(RECORD.iter_unpack(memoryview(data)[:usable]))
+            if timestamp >= cutoff
+        ]
+        # حاشیه تا فشرده‌سازی در هر flush تکرار نشود
+        keep = keep[max(0, len(keep) - max(1, self.max_records * 3 // 4)):]
+        compacted = b''.join(data[i * RECORD.size:(i + 1) * RECORD.size] for i in keep)
+        tmp = self.path.with_suffix('.tmp')
+        try:
+            tmp.write_bytes(compacted)
+            # نسخه‌های نگاشت‌شده قبلی (تحلیل‌ها) تا بسته شدن همان فایل قدیمی را می‌بینند
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error compacting test history: {e}")
+            return usable // RECORD.size
+        # آمار از روی رکوردهای باقی‌مانده دوباره ساخته می‌شود
+        self._stats = None
+        return len(keep)
@@ -0,0 +1,110 @@
+# subscription_decoder.py
+import binascii
+from typing import Union
+
+BytesLike = Union[bytes, bytearray, memoryview, str]
+
+# فقط ابتدای محتوا برای تشخیص نوع کدگذاری بررسی می‌شود
+SAMPLE_SIZE = 512
+
+_STD_ALPHABET = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=')
+_URLSAFE_ONLY = frozenset(b'-_')
+_WHITESPACE = frozenset(b' \t\r\n')
+
+_URLSAFE_TABLE = bytes.maketrans(b'-_', b'+/')
+_URLSAFE_STR_TABLE = str.maketrans('-_', '+/')
+
+ENCODING_PLAIN = 'plain'
+ENCODING_BASE64 = 'base64'
+ENCODING_BASE64_URLSAFE = 'base64url'
+
+
+def _sample(data: BytesLike) -> bytes:
+    sample = data[:SAMPLE_SIZE]
+    if isinstance(sample, str):
+        try:
+            return sample.encode('ascii')
+        except UnicodeEncodeError:
+            # کاراکتر غیر ASCII یعنی قطعاً base64 نیست
+            return b':'
+    return bytes(sample)
+
+
+def _has_urlsafe(data: BytesLike) -> bool:
+    if isinstance(data, str):
+        return data.find('-') != -1 or data.find('_') != -1
+    if isinstance(data, memoryview):
+        # memoryview متد find ندارد
+        data = data.tobytes()
+    return data.find(b'-') != -1 or data.find(b'_') != -1
+
+
+def detect_encoding(data: BytesLike) -> str:
+    """تشخیص نوع کدگذاری محتوا از روی نمونه‌ای از ابتدای آن
+
+    اگر نمونه base64 معمولی باشد، کل محتوا برای '-' یا '_' جستجو می‌شود؛
+    a2b_base64 این کاراکترها را بی‌صدا دور می‌ریزد و خروجی خراب می‌شود.
+    """
+    sample = _sample(data)
+    urlsafe = False
+    has_data = False
+    for byte in sample:
+        if byte in _WHITESPACE:
+            continue
+        if byte in _URLSAFE_ONLY:
+            urlsafe = True
+        elif byte not in _STD_ALPHABET:
+            # مثلاً ':' در "vmess://" یعنی متن ساده است
+            return ENCODING_PLAIN
+        has_data = True
+    if not has_data:
+        return ENCODING_PLAIN
+    if not urlsafe and len(data) > SAMPLE_SIZE:
+        urlsafe = _has_urlsafe(data)
+    return ENCODING_BASE64_URLSAFE if urlsafe else ENCODING_BASE64
+
+
+def decode_base64(data: BytesLike, urlsafe: bool = False) -> bytes:
+    """رمزگشایی base64 معمولی یا URL-safe، با یا بدون padding
+
+    فاصله‌ها و شکستن خطوط نادیده گرفته می‌شوند. ورودی base64 معمولی با
+    padding مستقیم از روی بافر رمزگشایی می‌شود؛ تبدیل URL-safe و تلاش
+    دوباره برای ورودی بدون padding هر کدام یک کپی از ورودی می‌سازند.
+    """
+    if urlsafe:
+        if isinstance(data, str):
+            data = data.translate(_URLSAFE_STR_TABLE)
+        else:
+            data = bytes(data).translate(_URLSAFE_TABLE)
+    try:
+        return binascii.a2b_base64(data)
+    except binascii.Error:
+        # ورودی بدون padding؛ padding اضافه توسط a2b_base64 نادیده گرفته می‌شود
+        if isinstance(data, str):
+            return binascii.a2b_base64(data + '==')
+        return binascii.a2b_base64(bytes(data) + b'==')
+
+
+def decode_base64_token(token: str) -> bytes:
+    """رمزگشایی یک توکن کوتاه (مثلاً بدنه vmess) با تشخیص خودکار URL-safe"""
+    token = token.strip()
+    return decode_base64(token, urlsafe='-' in token or '_' in token)
+
+
+def decode_subscription(data: BytesLike) -> str:
+    """تبدیل بدنه ساب‌اسکریپشن به متن در یک مرحله
+
+    محتوای متنی بدون هیچ پردازش اضافه برگردانده می‌شود و محتوای base64
+    تنها یک بار رمزگشایی می‌شود.
+    """
+    encoding = detect_encoding(data)
+    if encoding != ENCODING_PLAIN:
+        try:
+            decoded = decode_base64(data, urlsafe=encoding == ENCODING_BASE64_URLSAFE)
+            return decoded.decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            pass
+
+    if isinstance(data, str):
+        return data
+    return str(data, 'utf-8', errors='replace')
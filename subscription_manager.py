@@ -2,14 +2,40 @@
 import json
 import base64
 from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QLineEdit, QListWidget, QMessageBox, QProgressBar)
+                           QLineEdit, QListWidget, QMessageBox, QProgressBar,
+                           QFileDialog, QApplication, QLabel, QSpinBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 import requests
 
+from subscription_decoder import decode_subscription
+from metrics import DECODE_SECONDS, DOWNLOAD_BYTES, DOWNLOAD_SECONDS, DOWNLOADS
+
+# Add headers to mimic a browser request
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class DownloadError(Exception):
+    pass
+
+def download_subscription(link: str, timeout: float = 10) -> str:
+    """دانلود و رمزگشایی یک ساب‌اسکریپشن؛ در صورت پاسخ ناموفق DownloadError"""
+    with DOWNLOAD_SECONDS.time():
+        response = requests.get(link, headers=REQUEST_HEADERS, timeout=timeout)
+    DOWNLOADS.inc()
+    if response.status_code != 200:
+        raise DownloadError(f"خطا در دانلود: {response.status_code}")
+    DOWNLOAD_BYTES.inc(len(response.content))
+    # Decode straight from the raw bytes (base64 or plain text)
+    with DECODE_SECONDS.time():
+        return decode_subscription(response.content)
+
 class LinkDownloader(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(bool, str, str)  # Success, Message, Content
@@ -20,26 +46,10 @@ class LinkDownloader(QThread):
 
     def run(self):
         try:
-            # Add headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            # Download the content
-            response = requests.get(self.link, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                content = response.text
-                # Try to decode if it's base64 encoded
-                try:
-                    decoded_content = base64.b64decode(content).decode('utf-8')
-                    self.finished.emit(True, "دانلود با موفقیت انجام شد", decoded_content)
-                except:
-                    # If not base64, use the content as is
-                    self.finished.emit(True, "دانلود با موفقیت انجام شد", content)
-            else:
-                self.finished.emit(False, f"خطا در دانلود: {response.status_code}", "")
-                
+            content = download_subscription(self.link)
+            self.finished.emit(True, "دانلود با موفقیت انجام شد", content)
+        except DownloadError as e:
+            self.finished.emit(False, str(e), "")
         except requests.exceptions.Timeout:
             self.finished.emit(False, "خطا: زمان دانلود به پایان رسید", "")
         except requests.exceptions.RequestException as e:
@@ -47,13 +57,37 @@ class LinkDownloader(QThread):
         except Exception as e:
             self.finished.emit(False, f"خطای غیرمنتظره: {str(e)}", "")
 
+def normalize_link(link: str) -> Optional[str]:
+    """اعتبارسنجی و یکسان‌سازی یک لینک ساب‌اسکریپشن؛ در صورت نامعتبر بودن None برمی‌گرداند"""
+    link = link.strip().strip('\'"<>')
+    if not link:
+        return None
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return None
+    # حروف کوچک برای scheme و host؛ fragment در دانلود نقشی ندارد
+    netloc = parts.netloc.rsplit('@', 1)
+    netloc[-1] = netloc[-1].lower()
+    return urlunsplit((parts.scheme.lower(), '@'.join(netloc), parts.path or '/', parts.query, ''))
+
+def split_links(text: str) -> List[str]:
+    """جداسازی لینک‌ها از متن فایل یا کلیپ‌بورد (هر خط یا هر کلمه یک لینک)"""
+    return text.split()
+
 class SubscriptionManager:
     def __init__(self):
         self.config_path = Path.home() / '.config_manager'
         self.config_path.mkdir(exist_ok=True)
         self.links_file = self.config_path / 'links.enc'
         self._init_encryption()
+        # وزن و سهمیه هر لینک در مجموعه ادغام‌شده کانفیگ‌ها
+        self.link_options = {}
         self.links = self._load_links()
+        # مجموعه لینک‌های یکسان‌سازی‌شده برای بررسی تکراری بودن در O(1)
+        self._link_set = {normalize_link(link) or link for link in self.links}
 
     def _init_encryption(self):
         try:
@@ -77,14 +111,43 @@ class SubscriptionManager:
         try:
             encrypted_data = self.links_file.read_bytes()
             decrypted_data = self.cipher_suite.decrypt(encrypted_data)
-            return json.loads(decrypted_data)
+            data = json.loads(decrypted_data)
+            # فایل‌های قدیمی فقط شامل لیست لینک‌ها هستند
+            if isinstance(data, list):
+                links = data
+            else:
+                self.link_options = data.get('options', {})
+                links = data.get('links', [])
         except Exception as e:
             print(f"Error loading links: {e}")
             return []
+        return self._normalize_stored(links)
+
+    def _normalize_stored(self, links: List[str]) -> List[str]:
+        """یکسان‌سازی لینک‌های ذخیره‌شده با نسخه‌های قبلی تا با لینک‌های جدید قابل مقایسه باشند
+
+        لینک‌های نامعتبر دست نمی‌خورند، تکراری‌ها حذف می‌شوند و تنظیمات
+        هر لینک به کلید جدید منتقل می‌شود.
+        """
+        normalized: List[str] = []
+        seen = set()
+        options = {}
+        for link in links:
+            key = normalize_link(link) or link
+            if link in self.link_options and key not in options:
+                options[key] = self.link_options[link]
+            if key not in seen:
+                seen.add(key)
+                normalized.append(key)
+        if normalized != links or options != self.link_options:
+            self.links, self.link_options = normalized, options
+            self.save_links()
+        return normalized
 
     def save_links(self):
         try:
-            encrypted_data = self.cipher_suite.encrypt(json.dumps(self.links).encode())
+            data = {'links': self.links, 'options': self.link_options}
+            encrypted_data = self.cipher_suite.encrypt(json.dumps(data).encode())
             self.links_file.write_bytes(encrypted_data)
             return True
         except Exception as e:
@@ -92,22 +155,75 @@ class SubscriptionManager:
             return False
 
     def add_link(self, link):
-        if link not in self.links:
-            self.links.append(link)
-            return self.save_links()
-        return False
+        added, _, _ = self.add_links([link])
+        return bool(added)
+
+    def add_links(self, links: Iterable[str]) -> Tuple[List[str], int, int]:
+        """افزودن دسته‌ای لینک‌ها با یک بار ذخیره‌سازی
+
+        خروجی: (لینک‌های اضافه‌شده، تعداد تکراری، تعداد نامعتبر)
+        """
+        added = []
+        duplicates = 0
+        invalid = 0
+        for link in links:
+            normalized = normalize_link(link)
+            if normalized is None:
+                invalid += 1
+            elif normalized in self._link_set:
+                duplicates += 1
+            else:
+                self._link_set.add(normalized)
+                added.append(normalized)
+
+        if added:
+            self.links.extend(added)
+            if not self.save_links():
+                # بازگرداندن وضعیت در صورت خطای ذخیره‌سازی
+                del self.links[-len(added):]
+                self._link_set.difference_update(added)
+                return [], duplicates, invalid
+        return added, duplicates, invalid
+
+    def import_links(self, text: str) -> Tuple[List[str], int, int]:
+        return self.add_links(split_links(text))
+
+    def export_links(self, filename: str) -> bool:
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.links))
+                f.write('\n')
+            return True
+        except Exception as e:
+            print(f"Error exporting links: {e}")
+            return False
 
     def remove_link(self, link):
         if link in self.links:
             self.links.remove(link)
+            self._link_set.discard(normalize_link(link) or link)
+            self.link_options.pop(link, None)
             return self.save_links()
         return False
 
+    def get_link_options(self, link) -> Tuple[int, int]:
+        options = self.link_options.get(link, {})
+        return options.get('weight', 1), options.get('quota', 0)
+
+    def set_link_options(self, link, weight: int, quota: int) -> bool:
+        if link not in self.links:
+            return False
+        self.link_options[link] = {'weight': weight, 'quota': quota}
+        return self.save_links()
+
     def get_links(self):
         return self.links.copy()
 
 class SubscriptionTab(QWidget):
     configs_updated = pyqtSignal(list)  # Signal for updating configs
+    subscription_updated = pyqtSignal(str, list)  # لینک و خطوط کانفیگ آن
+    link_removed = pyqtSignal(str)
+    link_options_changed = pyqtSignal(str, int, int)  # لینک، وزن، سهمیه
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -130,11 +246,42 @@ class SubscriptionTab(QWidget):
         input_layout.addWidget(self.add_button)
         layout.addLayout(input_layout)
 
+        # ورود و خروج دسته‌ای لینک‌ها
+        bulk_layout = QHBoxLayout()
+        self.import_file_button = QPushButton("وارد کردن از فایل")
+        self.import_file_button.clicked.connect(self._import_from_file)
+        self.import_clipboard_button = QPushButton("وارد کردن از کلیپ‌بورد")
+        self.import_clipboard_button.clicked.connect(self._import_from_clipboard)
+        self.export_button = QPushButton("خروجی لینک‌ها")
+        self.export_button.clicked.connect(self._export_links)
+
+        bulk_layout.addWidget(self.import_file_button)
+        bulk_layout.addWidget(self.import_clipboard_button)
+        bulk_layout.addWidget(self.export_button)
+        layout.addLayout(bulk_layout)
+
         # لیست لینک‌ها
         self.links_list = QListWidget()
         self.links_list.setLayoutDirection(Qt.LayoutDirection.LeftToRight)
+        self.links_list.currentTextChanged.connect(self._show_link_options)
         layout.addWidget(self.links_list)
 
+        # وزن و سهمیه لینک انتخاب‌شده در انتخاب کانفیگ‌ها برای تست
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("وزن:"))
+        self.weight_spin = QSpinBox()
+        self.weight_spin.setRange(1, 100)
+        options_layout.addWidget(self.weight_spin)
+        options_layout.addWidget(QLabel("سهمیه (۰ = نامحدود):"))
+        self.quota_spin = QSpinBox()
+        self.quota_spin.setRange(0, 100000)
+        options_layout.addWidget(self.quota_spin)
+        self.apply_options_button = QPushButton("اعمال")
+        self.apply_options_button.clicked.connect(self._apply_link_options)
+        options_layout.addWidget(self.apply_options_button)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+
         # دکمه‌های مدیریت
         buttons_layout = QHBoxLayout()
         self.remove_button = QPushButton("حذف")
@@ -153,21 +300,81 @@ class SubscriptionTab(QWidget):
 
     def _load_saved_links(self):
         self.links_list.clear()
-        for link in self.subscription_manager.get_links():
-            self.links_list.addItem(link)
+        self.links_list.addItems(self.subscription_manager.get_links())
 
     def _add_link(self):
-        link = self.link_input.text().strip()
-        if not link:
+        text = self.link_input.text().strip()
+        if not text:
             QMessageBox.warning(self, "خطا", "لطفاً یک لینک وارد کنید")
             return
 
-        if self.subscription_manager.add_link(link):
-            self.links_list.addItem(link)
+        # یک لینک؛ برخلاف وارد کردن متن، روی فاصله شکسته نمی‌شود
+        added, duplicates, invalid = self.subscription_manager.add_links([text])
+        if added:
+            self._append_links(added)
             self.link_input.clear()
-            QMessageBox.information(self, "موفق", "لینک با موفقیت اضافه شد")
-        else:
+        elif duplicates:
             QMessageBox.warning(self, "خطا", "این لینک قبلاً اضافه شده است")
+        elif invalid:
+            QMessageBox.warning(self, "خطا", "لینک وارد شده معتبر نیست")
+
+    def _append_links(self, links: List[str]):
+        # به‌روزرسانی یکباره لیست به جای افزودن تک‌تک آیتم‌ها
+        self.links_list.setUpdatesEnabled(False)
+        self.links_list.addItems(links)
+        self.links_list.setUpdatesEnabled(True)
+
+    def _import_text(self, text: str):
+        added, duplicates, invalid = self.subscription_manager.import_links(text)
+        self._append_links(added)
+        QMessageBox.information(
+            self,
+            "وارد کردن لینک‌ها",
+            f"{len(added)} لینک اضافه شد\n"
+            f"{duplicates} لینک تکراری\n"
+            f"{invalid} لینک نامعتبر"
+        )
+
+    def _import_from_file(self):
+        filename, _ = QFileDialog.getOpenFileName(
+            self,
+            "وارد کردن لینک‌ها",
+            "",
+            "Text Files (*.txt);;All Files (*.*)"
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, 'r', encoding='utf-8-sig', errors='ignore') as f:
+                text = f.read()
+        except Exception as e:
+            QMessageBox.warning(self, "خطا", f"خطا در خواندن فایل: {str(e)}")
+            return
+        self._import_text(text)
+
+    def _import_from_clipboard(self):
+        text = QApplication.clipboard().text()
+        if not text.strip():
+            QMessageBox.warning(self, "خطا", "کلیپ‌بورد خالی است")
+            return
+        self._import_text(text)
+
+    def _export_links(self):
+        if not self.subscription_manager.get_links():
+            QMessageBox.warning(self, "خطا", "هیچ لینکی برای خروجی وجود ندارد")
+            return
+
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "خروجی لینک‌ها",
+            "",
+            "Text Files (*.txt);;All Files (*.*)"
+        )
+        if filename:
+            if self.subscription_manager.export_links(filename):
+                QMessageBox.information(self, "موفق", "لینک‌ها با موفقیت ذخیره شدند")
+            else:
+                QMessageBox.warning(self, "خطا", "خطا در ذخیره‌سازی لینک‌ها")
 
     def _remove_link(self):
         current_item = self.links_list.currentItem()
@@ -178,8 +385,26 @@ class SubscriptionTab(QWidget):
         link = current_item.text()
         if self.subscription_manager.remove_link(link):
             self.links_list.takeItem(self.links_list.row(current_item))
+            self.link_removed.emit(link)
             QMessageBox.information(self, "موفق", "لینک با موفقیت حذف شد")
 
+    def _show_link_options(self, link):
+        weight, quota = self.subscription_manager.get_link_options(link)
+        self.weight_spin.setValue(weight)
+        self.quota_spin.setValue(quota)
+
+    def _apply_link_options(self):
+        current_item = self.links_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "خطا", "لطفاً یک لینک را انتخاب کنید")
+            return
+
+        link = current_item.text()
+        weight = self.weight_spin.value()
+        quota = self.quota_spin.value()
+        if self.subscription_manager.set_link_options(link, weight, quota):
+            self.link_options_changed.emit(link, weight, quota)
+
     def _update_links(self):
         if self.links_list.count() == 0:
             QMessageBox.warning(self, "خطا", "هیچ لینکی برای به‌روزرسانی وجود ندارد")
@@ -210,6 +435,7 @@ class SubscriptionTab(QWidget):
                 # تقسیم محتوا به خطوط جداگانه برای پردازش هر کانفیگ
                 configs = [line.strip() for line in content.split('\n') if line.strip()]
                 self.configs_updated.emit(configs)  # ارسال لیست کانفیگ‌ها
+                self.subscription_updated.emit(self.current_downloader.link, configs)
                 QMessageBox.information(self, "موفق", f"{len(configs)} کانفیگ با موفقیت دریافت شد")
             except Exception as e:
                 QMessageBox.warning(self, "خطا", f"خطا در پردازش داده‌ها: {str(e)}")
@@ -0,0 +1,165 @@
+# subscription_server.py
+import base64
+import gzip
+import hashlib
+import heapq
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 8765
+DEFAULT_TOP_N = 50
+FORMAT_BASE64 = 'base64'
+FORMAT_PLAIN = 'plain'
+
+
+class SubscriptionBody:
+    """بدنه‌های از پیش ساخته‌شده یک رتبه‌بندی؛ پس از ساخت تغییر نمی‌کند"""
+    __slots__ = ('uris', 'bodies')
+
+    def __init__(self, uris: Tuple[str, ...]):
+        self.uris = uris
+        plain = "\n".join(uris).encode('utf-8')
+        encoded = base64.b64encode(plain)
+        digest = hashlib.blake2b(plain, digest_size=12).hexdigest()
+        # هر نمایش (قالب و فشرده‌سازی) ETag جداگانه دارد
+        self.bodies: Dict[Tuple[str, bool], Tuple[str, bytes]] = {}
+        for fmt, data in ((FORMAT_PLAIN, plain), (FORMAT_BASE64, encoded)):
+            self.bodies[(fmt, False)] = (f'"{digest}-{fmt}"', data)
+            self.bodies[(fmt, True)] = (f'"{digest}-{fmt}-gz"', gzip.compress(data, 6))
+
+
+class SubscriptionPublisher:
+    """نگهداری N کانفیگ برتر زنده؛ بدنه فقط با تغییر رتبه‌بندی دوباره ساخته می‌شود"""
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.body = SubscriptionBody(())
+        self._lock = threading.Lock()
+        # آخرین نتیجه هر کانفیگ برای اعمال تغییرات جزئی
+        self._latest: Dict[str, object] = {}
+
+    def update(self, results: Sequence) -> bool:
+        """به‌روزرسانی از روی نتایج تست؛ اگر رتبه‌بندی تغییر کرده باشد True"""
+        self._latest = {r.config.fingerprint: r for r in results}
+        return self._publish()
+
+    def apply(self, changed: Sequence) -> bool:
+        """اعمال فقط نتایج تغییرکرده (مثلا از پایش سلامت) روی آخرین نتایج"""
+        for result in changed:
+            self._latest[result.config.fingerprint] = result
+        return self._publish()
+
+    def _publish(self) -> bool:
+        live = heapq.nsmallest(
+            self.top_n,
+            (r for r in self._latest.values() if r.success and r.config.uri),
+            key=lambda r: r.delay,
+        )
+        uris = tuple(r.config.uri for r in live)
+        with self._lock:
+            if uris == self.body.uris:
+                return False
+            # جایگزینی یکجای شیء؛ درخواست‌های در حال اجرا نسخه قبلی را کامل می‌خوانند
+            self.body = SubscriptionBody(uris)
+        return True
+
+
+def accepts_gzip(header: str) -> bool:
+    """آیا هدر Accept-Encoding فشرده‌سازی gzip را با q بزرگ‌تر از صفر می‌پذیرد
+
+    کدگذاری نام‌برده بر '*' مقدم است؛ مثلا "gzip;q=0, *" یعنی gzip نه.
+    """
+    gzip_q = star_q = None
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ('gzip', 'x-gzip'):
+            gzip_q = q
+        elif coding == '*':
+            star_q = q
+    if gzip_q is not None:
+        return gzip_q > 0
+    return star_q is not None and star_q > 0
+
+
+class _SubscriptionHandler(BaseHTTPRequestHandler):
+    publisher: SubscriptionPublisher = None
+
+    def _respond(self, include_body: bool):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') not in ('', '/sub'):
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        fmt = query.get('format', [FORMAT_BASE64])[0]
+        if fmt not in (FORMAT_BASE64, FORMAT_PLAIN):
+            self.send_error(400, "format must be base64 or plain")
+            return
+
+        compressed = accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag, data = self.publisher.body.bodies[(fmt, compressed)]
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if include_body:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SubscriptionServer:
+    """سرور HTTP محلی که ساب‌اسکریپشن کانفیگ‌های برتر را در /sub ارائه می‌کند"""
+
+    def __init__(self, publisher: SubscriptionPublisher, port: int = DEFAULT_PORT,
+                 host: str = '127.0.0.1'):
+        handler = type('SubscriptionHandler', (_SubscriptionHandler,), {'publisher': publisher})
+        self.publisher = publisher
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        host = self.server.server_address[0]
+        return f"http://{host}:{self.port}/sub"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,55 @@
+from config_processor import ConfigProcessor
+
+LINE_A = "trojan://a@1.1.1.1:443#a"
+LINE_SHARED = "trojan://x@2.2.2.2:443#x"
+LINE_B = "trojan://b@3.3.3.3:443#b"
+
+
+def shared_processor():
+    processor = ConfigProcessor()
+    processor.ingest_subscription('A', [LINE_A, LINE_SHARED])
+    diff = processor.ingest_subscription('B', [LINE_SHARED, LINE_B])
+    return processor, diff
+
+
+def fingerprints(configs):
+    return sorted(config.fingerprint for config in configs)
+
+
+def test_line_in_two_sources_is_added_once():
+    processor, diff = shared_processor()
+    assert [config.name for config in diff.added] == ['b']
+    assert len(processor.pool) == 3
+    assert len(processor.configs) == 3
+
+
+def test_reingest_keeps_line_held_by_other_source():
+    processor, _ = shared_processor()
+    diff = processor.ingest_subscription('A', [LINE_A])
+    assert diff.removed == []
+    assert len(processor.pool) == 3
+
+    diff = processor.ingest_subscription('B', [LINE_B])
+    shared = processor.process_single_config(LINE_SHARED)
+    assert diff.removed == [shared.fingerprint]
+    assert shared.fingerprint not in processor.pool
+
+
+def test_remove_source_reports_only_orphaned_lines():
+    processor, _ = shared_processor()
+    diff = processor.remove_source('A')
+    assert diff.removed == [processor.process_single_config(LINE_A).fingerprint]
+    assert fingerprints(processor.configs) == fingerprints(
+        processor.process_single_config(line) for line in (LINE_SHARED, LINE_B))
+
+
+def test_copy_is_independent_of_later_ingests():
+    processor, _ = shared_processor()
+    processor.pool.set_source_options('B', weight=3, quota=1)
+    copied = processor.pool.copy()
+    before = fingerprints(copied)
+    processor.ingest_subscription('A', [])
+    assert len(processor.pool) == 2
+    assert fingerprints(copied) == before and len(copied) == 3
+    assert copied.sources() == ['A', 'B']
+    assert (copied.options('B').weight, copied.options('B').quota) == (3, 1)
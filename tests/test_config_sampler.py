@@ -0,0 +1,74 @@
+import random
+
+from config_pool import ConfigPool
+from config_processor import ConfigProcessor
+from config_sampler import ConfigSampler
+from result_history import ResultHistory
+
+processor = ConfigProcessor()
+
+
+def make_config(index, kind='trojan', flag=''):
+    # هر کانفیگ در شبکه /24 جداگانه
+    if kind == 'vless':
+        return processor.process_single_config(f"vless://id{index}@10.{index}.0.1:443#{flag}v{index}")
+    return processor.process_single_config(f"trojan://pw{index}@10.{index}.0.1:443#{flag}t{index}")
+
+
+def make_pool(**sources):
+    pool = ConfigPool()
+    for source, configs in sources.items():
+        pool.replace_source(source, {config.fingerprint: config for config in configs})
+    return pool
+
+
+def make_sampler(tmp_path):
+    return ConfigSampler(ResultHistory(tmp_path / 'history.bin'), rng=random.Random(1))
+
+
+def test_sources_are_interleaved_by_weight(tmp_path):
+    pool = make_pool(A=[make_config(i) for i in range(10)], B=[make_config(i) for i in range(10, 20)])
+    pool.set_source_options('A', weight=2)
+    selected = make_sampler(tmp_path).select(pool, 6)
+    sources = ['A' if int(config.name[1:]) < 10 else 'B' for config in selected]
+    assert sorted(sources) == ['A'] * 4 + ['B'] * 2
+
+
+def test_source_quota_is_respected(tmp_path):
+    pool = make_pool(A=[make_config(i) for i in range(10)], B=[make_config(i) for i in range(10, 20)])
+    pool.set_source_options('B', quota=1)
+    selected = make_sampler(tmp_path).select(pool, 8)
+    assert len(selected) == 8
+    assert sum(int(config.name[1:]) >= 10 for config in selected) == 1
+
+
+def test_strata_take_turns(tmp_path):
+    configs = ([make_config(i, 'trojan', '🇩🇪') for i in range(5)]
+               + [make_config(i, 'vless', '🇩🇪') for i in range(5, 10)]
+               + [make_config(i, 'trojan', '🇫🇷') for i in range(10, 15)])
+    selected = make_sampler(tmp_path).select(make_pool(A=configs), 3)
+    assert sorted(config.name[:3] for config in selected) == ['🇩🇪t', '🇩🇪v', '🇫🇷t']
+
+
+def test_untested_then_best_ucb_first(tmp_path):
+    good, fair, bad, new = (make_config(i) for i in range(4))
+    sampler = make_sampler(tmp_path)
+    for _ in range(5):
+        sampler.history.record(good.fingerprint, good.type, True, 50.0)
+        sampler.history.record(fair.fingerprint, fair.type, True, 900.0)
+        sampler.history.record(bad.fingerprint, bad.type, False, float('inf'))
+    assert sampler.score(new) == float('inf')
+    assert sampler.score(good) > sampler.score(fair) > sampler.score(bad)
+    assert sampler.select(make_pool(A=[bad, fair, good, new]), 4) == [new, good, fair, bad]
+    assert sampler.select(make_pool(A=[bad, fair, good, new]), 2) == [new, good]
+
+
+def test_zero_count_and_empty_sources(tmp_path):
+    sampler = make_sampler(tmp_path)
+    pool = make_pool(A=[], B=[make_config(1)])
+    assert sampler.select(pool, 0) == []
+    assert sampler.select(pool, -1) == []
+    assert sampler.select(ConfigPool(), 5) == []
+    assert [config.name for config in sampler.select(pool, 5)] == ['t1']
+    assert sampler._sample_source([], 5) == []
+    assert sampler._sample_source([make_config(1)], 0) == []
@@ -0,0 +1,54 @@
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+import config_tester
+from config_processor import ConfigProcessor
+from pool_snapshot import ConfigSnapshot, SnapshotLoader, save_snapshot
+from report_generator import ReportTab
+from result_history import ResultHistory
+from subscription_server import SubscriptionPublisher
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return QApplication.instance() or QApplication([])
+
+
+def test_restore_snapshot_with_results(app, tmp_path):
+    processor = ConfigProcessor()
+    good = processor.process_single_config("trojan://pw@1.2.3.4:443#good")
+    bad = processor.process_single_config("trojan://pw@5.6.7.8:443#bad")
+    path = tmp_path / 'pool.snap'
+    results = {good.fingerprint: config_tester.TestResult(good, 42.0, True),
+               bad.fingerprint: config_tester.TestResult(bad, float('inf'), False, 'Timeout')}
+    save_snapshot([good, bad], results, path)
+    snapshot = ConfigSnapshot(path)
+    try:
+        loader = SnapshotLoader(snapshot)
+        loaded = []
+        loader.finished.connect(lambda sources, results: loaded.append(results))
+        loader.run()
+    finally:
+        snapshot.close()
+
+    history = ResultHistory(tmp_path / 'history.bin')
+    tab = config_tester.TestTab(history=history)
+    report = ReportTab(history=history)
+    publisher = SubscriptionPublisher()
+    tab.results_updated.connect(report.set_results)
+    tab.results_updated.connect(publisher.update)
+    tab.results_changed.connect(report.update_results)
+    tab.results_changed.connect(publisher.apply)
+    try:
+        tab.restore_results(loaded[0])
+    finally:
+        if report.analytics_worker is not None:
+            report.analytics_worker.wait()
+
+    restored = {r.config.name: r for r in tab.all_results()}
+    assert restored['good'].success and restored['good'].delay == pytest.approx(42.0)
+    assert not restored['bad'].success and restored['bad'].error == 'Timeout'
+    assert [r.config.name for r in tab.test_results] == ['good']
+    assert len(report.test_results) == 2
+    assert publisher.body.uris == (good.uri,)
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config_processor import ConfigProcessor
+from distributed import (PROTOCOL_VERSION, Coordinator, encode_message, merge_outcomes,
+                         read_message, run_worker)
+
+TOKEN = 'secret'
+
+
+def make_configs(count):
+    processor = ConfigProcessor()
+    return [processor.process_single_config(f"trojan://pw{i}@10.0.{i // 250}.{i % 250 + 1}:443#c{i}")
+            for i in range(count)]
+
+
+async def connect(coordinator, name='w1', token=TOKEN):
+    reader, writer = await asyncio.open_connection('127.0.0.1', coordinator.port)
+    writer.write(encode_message({'op': 'hello', 'version': PROTOCOL_VERSION, 'token': token,
+                                 'name': name, 'concurrency': 1}))
+    await writer.drain()
+    return reader, writer
+
+
+async def request(reader, writer):
+    writer.write(encode_message({'op': 'request'}))
+    await writer.drain()
+    return await asyncio.wait_for(read_message(reader), 5)
+
+
+async def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_merge_outcomes_majority_and_median():
+    assert merge_outcomes([(True, 30.0, None), (True, 10.0, None), (False, float('inf'), 'x')]) \
+        == (True, 20.0, None)
+    assert merge_outcomes([(True, 10.0, None), (False, float('inf'), 'Timeout')]) == (True, 10.0, None)
+    success, delay, error = merge_outcomes([(True, 10.0, None), (False, float('inf'), None),
+                                            (False, float('inf'), 'Timeout')])
+    assert (success, delay, error) == (False, float('inf'), 'Timeout')
+
+
+def test_expired_lease_is_requeued():
+    coordinator = Coordinator(make_configs(4), lease_size=2, token=TOKEN)
+    first = coordinator._grant(1, 'w1')
+    second = coordinator._grant(1, 'w1')
+    assert coordinator._grant(2, 'w2') is None
+    first.deadline = time.monotonic() - 1
+    coordinator._expire_leases()
+    assert first.id not in coordinator.leases and second.id in coordinator.leases
+    again = coordinator._grant(2, 'w2')
+    assert again.shard is first.shard and again.worker == 'w2'
+
+
+def test_replicas_use_distinct_workers():
+    coordinator = Coordinator(make_configs(2), lease_size=2, replicas=2, token=TOKEN)
+    assert coordinator._grant(1, 'w1') is not None
+    # اتصال دوم با همان نام نباید نسخه دوم را بگیرد
+    assert coordinator._grant(2, 'w1') is None
+    assert coordinator._grant(3, 'w2') is not None
+
+
+def test_disconnect_releases_leases():
+    async def scenario():
+        coordinator = Coordinator(make_configs(4), host='127.0.0.1', port=0, lease_size=4, token=TOKEN)
+        await coordinator.start()
+        try:
+            reader, writer = await connect(coordinator, 'w1')
+            lease = await request(reader, writer)
+            assert lease['op'] == 'lease' and len(coordinator.leases) == 1
+            writer.close()
+            await wait_until(lambda: not coordinator.leases)
+
+            reader, writer = await connect(coordinator, 'w2')
+            again = await request(reader, writer)
+            assert again['op'] == 'lease' and again['configs'] == lease['configs']
+            writer.close()
+        finally:
+            coordinator.server.close()
+            await coordinator.server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_invalid_token_is_rejected():
+    async def scenario():
+        coordinator = Coordinator(make_configs(1), host='127.0.0.1', port=0, token=TOKEN)
+        await coordinator.start()
+        try:
+            reader, writer = await connect(coordinator, token='wrong')
+            writer.write(encode_message({'op': 'request'}))
+            assert await asyncio.wait_for(reader.read(), 5) == b''
+            assert not coordinator.leases
+            writer.close()
+        finally:
+            coordinator.server.close()
+            await coordinator.server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_full_result_queue_stops_reading():
+    async def scenario():
+        coordinator = Coordinator(make_configs(8), host='127.0.0.1', port=0, lease_size=4,
+                                  token=TOKEN, queue_size=1)
+        await coordinator.start()
+        try:
+            reader, writer = await connect(coordinator)
+            lease = await request(reader, writer)
+            for fingerprint, _ in lease['configs']:
+                writer.write(encode_message({'op': 'result', 'lease': lease['lease'],
+                                             'fingerprint': fingerprint, 'success': True,
+                                             'delay': 10.0}))
+            writer.write(encode_message({'op': 'request'}))
+            await writer.drain()
+            # بدون ادغام‌کننده صف پر می‌ماند و درخواست بعدی خوانده نمی‌شود
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(read_message(reader), 0.3)
+            assert coordinator._queue.full() and not coordinator.merged
+
+            merger = asyncio.create_task(coordinator._merge())
+            reply = await asyncio.wait_for(read_message(reader), 5)
+            assert reply['op'] == 'lease'
+            await wait_until(lambda: len(coordinator.merged) == 4)
+            merger.cancel()
+            writer.close()
+        finally:
+            coordinator.server.close()
+            await coordinator.server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_run_ends_when_local_workers_exit():
+    async def scenario():
+        coordinator = Coordinator(make_configs(2), host='127.0.0.1', port=0, token=TOKEN)
+        return await asyncio.wait_for(coordinator.run(lambda: False), 5)
+
+    assert asyncio.run(scenario()) == []
+
+
+class StubEngine:
+    def __init__(self):
+        self.stop_flag = False
+
+    async def test_single_config(self, config):
+        await asyncio.sleep(0)
+        success = config.name != 'c0'
+        return SimpleNamespace(success=success, delay=float(len(config.name)) if success else float('inf'),
+                               error=None if success else 'Timeout')
+
+    def stop(self):
+        self.stop_flag = True
+
+
+def test_workers_produce_merged_ranking():
+    async def scenario():
+        configs = make_configs(10)
+        coordinator = Coordinator(configs, host='127.0.0.1', port=0, replicas=2, lease_size=3, token=TOKEN)
+        await coordinator.start()
+        workers = [asyncio.create_task(run_worker('127.0.0.1', coordinator.port, StubEngine(),
+                                                  f"w{i}", token=TOKEN)) for i in range(2)]
+        ranking = await asyncio.wait_for(coordinator.run(), 10)
+        probed = await asyncio.gather(*workers)
+        return ranking, probed
+
+    ranking, probed = asyncio.run(scenario())
+    assert len(ranking) == 10 and sum(probed) == 20
+    assert [config.name for config, success, _, _ in ranking if not success] == ['c0']
+    assert ranking[0][2] == 2.0
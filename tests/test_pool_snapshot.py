@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from config_processor import ConfigData, ConfigProcessor
+from pool_snapshot import ConfigSnapshot, save_snapshot
+
+
+def test_results_round_trip(tmp_path):
+    config = ConfigProcessor().process_single_config("trojan://pw@1.2.3.4:443#n")
+    failed = SimpleNamespace(success=False, delay=float('inf'), error='Timeout')
+    path = tmp_path / 'pool.snap'
+    save_snapshot([config], {config.fingerprint: failed}, path)
+    snapshot = ConfigSnapshot(path)
+    try:
+        assert snapshot.config(0).uri == config.uri
+        assert snapshot.result(0) == (False, float('inf'), 'Timeout')
+    finally:
+        snapshot.close()
+
+
+def test_out_of_range_port_is_skipped(tmp_path):
+    processor = ConfigProcessor()
+    good = processor.process_single_config("trojan://pw@1.2.3.4:443#good")
+    bad = ConfigData(type="vmess", name="bad", server="5.6.7.8", port=70000,
+                     uri="vmess://x", fingerprint="00" * 8)
+    path = tmp_path / 'pool.snap'
+    assert save_snapshot([good, bad], {}, path) == 1
+    snapshot = ConfigSnapshot(path)
+    try:
+        assert len(snapshot) == 1
+        assert snapshot.config(0).name == 'good'
+    finally:
+        snapshot.close()
@@ -0,0 +1,81 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import probe_targets
+from benchmarks.standin_server import StandInServer
+from probe_targets import (MODE_AGGREGATE, ProbeError, ProbeTarget, aggregate_targets,
+                           parse_targets, race_targets, run_probe)
+
+
+def test_parse_targets_skips_bad_specs():
+    targets = parse_targets("HEAD https://a.test/x, ftp://b.test\n\n, not a url,"
+                            " http://c.test/generate_204/ ,POST http://d.test,head http://e.test")
+    assert targets == [
+        ProbeTarget('https://a.test/x', 'HEAD'),
+        ProbeTarget('http://c.test/generate_204/', 'GET', (204,)),
+        ProbeTarget('http://e.test', 'HEAD'),
+    ]
+    assert parse_targets("") == [] and parse_targets(" , \n") == []
+
+
+def fake_probe(outcomes, cancelled):
+    """خروجی هر مقصد: (تاخیر شبیه‌سازی‌شده به ثانیه، موفق)"""
+    async def probe(session, target, proxy, timeout):
+        delay, success = outcomes[target.url]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(target.url)
+            raise
+        if not success:
+            raise ProbeError(f"failed {target.url}")
+        return delay * 1000
+    return probe
+
+
+def run_with(monkeypatch, function, outcomes):
+    cancelled = []
+    monkeypatch.setattr(probe_targets, 'probe_target', fake_probe(outcomes, cancelled))
+    targets = [ProbeTarget(url) for url in outcomes]
+    return asyncio.run(function(None, targets, 'http://proxy', 5)), cancelled
+
+
+def test_race_returns_first_success_and_cancels_rest(monkeypatch):
+    outcomes = {'fail': (0.01, False), 'fast': (0.05, True), 'slow': (1.0, True)}
+    delay, cancelled = run_with(monkeypatch, race_targets, outcomes)
+    assert delay == pytest.approx(50)
+    assert cancelled == ['slow']
+
+
+def test_race_raises_first_error_when_all_fail(monkeypatch):
+    with pytest.raises(ProbeError, match='failed a'):
+        run_with(monkeypatch, race_targets, {'a': (0.01, False), 'b': (0.02, False)})
+
+
+def test_aggregate_needs_half_and_returns_median(monkeypatch):
+    outcomes = {'a': (0.01, True), 'b': (0.03, True), 'c': (0.02, False), 'd': (0.05, True)}
+    delay, _ = run_with(monkeypatch, aggregate_targets, outcomes)
+    assert delay == pytest.approx(30)
+
+    with pytest.raises(ProbeError, match='failed b'):
+        run_with(monkeypatch, aggregate_targets,
+                 {'a': (0.01, True), 'b': (0.02, False), 'c': (0.03, False)})
+
+
+def test_probe_through_standin_proxy():
+    ok = ProbeTarget('http://probe.test/generate_204', expected_status=(204,))
+    wrong_status = ProbeTarget('http://probe.test/page', expected_status=(204,))
+
+    async def scenario(proxy):
+        async with aiohttp.ClientSession() as session:
+            raced = await run_probe(session, [wrong_status, ok], proxy)
+            # یک موفق از سه مقصد کمتر از نصف است
+            with pytest.raises(ProbeError, match='HTTP 200'):
+                await run_probe(session, [wrong_status, wrong_status, ok], proxy,
+                                mode=MODE_AGGREGATE)
+            return raced
+
+    with StandInServer(latency_ms=1, jitter_ms=0) as server:
+        assert asyncio.run(scenario(server.proxy_url)) > 0
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from report_stats import StatsAccumulator
+
+
+def result(config_type, success, delay=100.0, source='s'):
+    return SimpleNamespace(config=SimpleNamespace(type=config_type, source=source),
+                           success=success, delay=delay)
+
+
+def test_summary_is_not_mutated_by_later_results():
+    stats = StatsAccumulator()
+    stats.add(result('vless', True))
+    summary = stats.summary()
+    stats.add(result('vless', False))
+    stats.add(result('trojan', True))
+    assert summary['type_stats'] == {'vless': {'total': 1, 'successful': 1}}
+    assert summary['source_stats'] == {'s': {'total': 1, 'successful': 1}}
+    assert stats.summary()['type_stats']['vless'] == {'total': 2, 'successful': 1}
+
+
+def test_summary_delays():
+    stats = StatsAccumulator()
+    stats.extend([result('vless', True, delay) for delay in (100.0, 200.0, 300.0)])
+    summary = stats.summary()
+    assert summary['avg_delay'] == 200.0 and summary['std_delay'] == 100.0
+    assert (summary['min_delay'], summary['max_delay']) == (100.0, 300.0)
+    assert abs(summary['p50_delay'] - 200.0) / 200.0 < 0.01
@@ -0,0 +1,49 @@
+import time
+
+from result_history import RECORD, ResultHistory
+
+FP = "00000000000000aa"
+
+
+def test_history_round_trip(tmp_path):
+    history = ResultHistory(tmp_path / 'history.bin')
+    history.record(FP, 'vless', True, 100.0)
+    history.record(FP, 'vless', False, float('inf'))
+    assert history.flush()
+    stats = ResultHistory(tmp_path / 'history.bin').get(FP)
+    assert (stats.attempts, stats.successes, stats.latency_ewma) == (2, 1, 100.0)
+
+
+def test_compaction_drops_expired_and_oldest_records(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = ResultHistory(path, retention=3600, max_records=8)
+    now = time.time()
+    history.record(FP, 'vless', True, 1.0, timestamp=now - 7200)
+    for i in range(8):
+        history.record(FP, 'vless', True, 10.0 + i, timestamp=now - 100 + i)
+    assert history.flush()
+    # ۹ رکورد از سقف ۸ بیشتر است؛ رکورد منقضی و قدیمی‌ترین‌ها حذف می‌شوند
+    assert path.stat().st_size == 6 * RECORD.size
+    stats = history.get(FP)
+    assert stats.attempts == 6
+    assert [timestamp for timestamp, *_ in RECORD.iter_unpack(path.read_bytes())][0] == now - 98
+
+
+def test_small_history_is_not_compacted(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = ResultHistory(path, retention=3600, max_records=100)
+    history.record(FP, 'vless', True, 1.0, timestamp=time.time() - 7200)
+    assert history.flush()
+    assert path.stat().st_size == RECORD.size
+
+
+def test_tiny_max_records_still_caps_history(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = ResultHistory(path, retention=3600, max_records=1)
+    now = time.time()
+    for i in range(3):
+        history.record(FP, 'vless', True, 10.0 + i, timestamp=now - 10 + i)
+    assert history.flush()
+    # سه‌چهارم سقف صفر می‌شود؛ دست‌کم جدیدترین رکورد باید بماند
+    assert path.stat().st_size == RECORD.size
+    assert [timestamp for timestamp, *_ in RECORD.iter_unpack(path.read_bytes())] == [now - 8]
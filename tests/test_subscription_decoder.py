@@ -0,0 +1,22 @@
+import base64
+
+from subscription_decoder import (ENCODING_BASE64_URLSAFE, SAMPLE_SIZE, decode_subscription,
+                                  detect_encoding)
+
+
+def test_urlsafe_character_after_sample_is_detected():
+    # متنی که کدگذاری معمولی آن فقط بعد از نمونه ابتدایی '+' یا '/' دارد
+    text = "a" * (SAMPLE_SIZE * 2) + "\xff\xfe?>"
+    encoded = base64.urlsafe_b64encode(text.encode('utf-8'))
+    assert b'-' in encoded[SAMPLE_SIZE:] or b'_' in encoded[SAMPLE_SIZE:]
+    assert b'-' not in encoded[:SAMPLE_SIZE] and b'_' not in encoded[:SAMPLE_SIZE]
+    for data in (encoded, bytearray(encoded), memoryview(encoded), encoded.decode()):
+        assert detect_encoding(data) == ENCODING_BASE64_URLSAFE
+    assert decode_subscription(memoryview(encoded)) == text
+
+
+def test_unpadded_body_is_decoded():
+    text = "vless://id@1.2.3.4:443#n\n"
+    encoded = base64.b64encode(text.encode()).rstrip(b'=')
+    assert decode_subscription(encoded) == text
+    assert decode_subscription(encoded.decode()) == text
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from subscription_manager import SubscriptionManager, normalize_link
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
+
+
+def test_normalize_link():
+    assert normalize_link(" HTTPS://Example.COM ") == "https://example.com/"
+    assert normalize_link("https://User@Host.com/Sub?A=1#x") == "https://User@host.com/Sub?A=1"
+    assert normalize_link("ftp://host/x") is None
+    assert normalize_link("not a link") is None
+
+
+def test_stored_links_are_normalized_on_load(home):
+    manager = SubscriptionManager()
+    data = {'links': ["https://Example.com", "https://example.com/", "bogus"],
+            'options': {"https://Example.com": {'weight': 3, 'quota': 5}}}
+    manager.links_file.write_bytes(manager.cipher_suite.encrypt(json.dumps(data).encode()))
+
+    reloaded = SubscriptionManager()
+    assert reloaded.get_links() == ["https://example.com/", "bogus"]
+    assert reloaded.get_link_options("https://example.com/") == (3, 5)
+    assert not reloaded.add_link("https://EXAMPLE.com/")
+    # نسخه یکسان‌سازی‌شده ذخیره شده است
+    assert SubscriptionManager().get_links() == ["https://example.com/", "bogus"]
+
+
+def test_add_links_reports_duplicates_and_invalid(home):
+    manager = SubscriptionManager()
+    added, duplicates, invalid = manager.add_links(
+        ["https://a.com/x", "https://A.com/x", "nope", "https://b.com"])
+    assert (added, duplicates, invalid) == (["https://a.com/x", "https://b.com/"], 1, 1)
@@ -0,0 +1,83 @@
+import base64
+import gzip
+import http.client
+from types import SimpleNamespace
+
+import pytest
+
+from subscription_server import SubscriptionPublisher, SubscriptionServer, accepts_gzip
+
+URIS = ("trojan://a@1.1.1.1:443#a", "trojan://b@2.2.2.2:443#b")
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("deflate, GZIP;q=0.5")
+    assert accepts_gzip("*")
+    assert accepts_gzip("x-gzip")
+    assert not accepts_gzip("")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.0, *")
+    assert not accepts_gzip("x-gzip-foo, br")
+    assert not accepts_gzip("*;q=0")
+    assert not accepts_gzip("gzip;q=abc")
+
+
+@pytest.fixture
+def server():
+    publisher = SubscriptionPublisher()
+    publisher.update([SimpleNamespace(config=SimpleNamespace(fingerprint=str(i), uri=uri),
+                                      success=True, delay=float(i)) for i, uri in enumerate(URIS)])
+    server = SubscriptionServer(publisher, port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def get(server, path='/sub', **headers):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    try:
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+def test_formats_and_compression(server):
+    plain = "\n".join(URIS).encode()
+    response, body = get(server, '/sub?format=plain')
+    assert response.status == 200 and body == plain
+    assert response.getheader('Content-Encoding') is None
+
+    response, body = get(server)
+    assert base64.b64decode(body) == plain
+
+    response, body = get(server, '/sub?format=plain', **{'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert gzip.decompress(body) == plain
+
+    response, body = get(server, **{'Accept-Encoding': 'gzip;q=0, *'})
+    assert response.getheader('Content-Encoding') is None
+    assert base64.b64decode(body) == plain
+
+    assert get(server, '/sub?format=yaml')[0].status == 400
+    assert get(server, '/other')[0].status == 404
+
+
+def test_matching_etag_returns_not_modified(server):
+    response, _ = get(server, **{'Accept-Encoding': 'gzip'})
+    etag = response.getheader('ETag')
+    response, body = get(server, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status == 304 and body == b'' and response.getheader('ETag') == etag
+
+    # نمایش بدون فشرده‌سازی ETag دیگری دارد
+    response, _ = get(server, **{'If-None-Match': etag})
+    assert response.status == 200 and response.getheader('ETag') != etag
+
+    # با تغییر رتبه‌بندی ETag قبلی دیگر معتبر نیست
+    server.publisher.apply([SimpleNamespace(config=SimpleNamespace(fingerprint='0', uri=URIS[0]),
+                                            success=False, delay=float('inf'))])
+    response, body = get(server, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status == 200 and response.getheader('ETag') != etag
+    assert base64.b64decode(gzip.decompress(body)) == URIS[1].encode()
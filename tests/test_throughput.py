@@ -0,0 +1,99 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from benchmarks.standin_server import StandInServer
+from config_processor import ConfigProcessor
+from config_tester import ThroughputTester
+from throughput import TokenBucket, measure_throughput, select_top_k
+
+PAYLOAD_URL = 'http://payload.test/__down?bytes={bytes}'
+processor = ConfigProcessor()
+CONFIG = processor.process_single_config("trojan://pw@1.2.3.4:443#speed")
+
+
+def test_burst_is_not_delayed():
+    bucket = TokenBucket(rate=1000, burst=500)
+    assert bucket.reserve(200) == 0.0
+    assert bucket.reserve(300) == 0.0
+
+
+def test_each_caller_waits_only_for_its_own_slot():
+    bucket = TokenBucket(rate=1000, burst=100)
+    delays = [bucket.reserve(100) for _ in range(4)]
+    # ۱۰۰ بایت در burst جا می‌شود؛ بقیه هر کدام ۰.۱ ثانیه بعد از قبلی
+    assert delays[0] == 0.0
+    for expected, delay in zip((0.1, 0.2, 0.3), delays[1:]):
+        assert abs(delay - expected) < 0.01
+
+
+def test_shared_rate_across_streams():
+    bucket = TokenBucket(rate=100_000, burst=1000)
+
+    async def stream():
+        for _ in range(10):
+            await bucket.take(1000)
+
+    async def scenario():
+        start = time.monotonic()
+        await asyncio.gather(*(stream() for _ in range(4)))
+        return time.monotonic() - start
+
+    # ۴۰ کیلوبایت با نرخ ۱۰۰ کیلوبایت بر ثانیه (منهای burst)
+    elapsed = asyncio.run(scenario())
+    assert 0.35 <= elapsed < 0.6
+
+
+def measure(server, **kwargs):
+    return asyncio.run(measure_throughput(CONFIG, server.proxy_url, PAYLOAD_URL, **kwargs))
+
+
+def test_payload_is_fully_downloaded_within_byte_cap():
+    with StandInServer(latency_ms=1, jitter_ms=0) as server:
+        result = measure(server, payload_mb=1, streams=2)
+    assert result.success and result.streams == 2
+    assert result.bytes_received == 1024 * 1024
+    assert result.mbps > 0 and server.requests == 2
+
+
+def test_download_stops_at_time_cap():
+    # ۸ Mbps برای هر اتصال؛ ۵۰ مگابایت در ۰.۳ ثانیه تمام نمی‌شود
+    with StandInServer(latency_ms=1, jitter_ms=0, bandwidth_mbps=8) as server:
+        start = time.monotonic()
+        result = measure(server, payload_mb=50, streams=2, max_duration=0.3)
+        elapsed = time.monotonic() - start
+    assert result.success
+    assert 0 < result.bytes_received < 50 * 1024 * 1024
+    assert elapsed < 1.5
+
+
+def test_failed_streams_report_error():
+    with StandInServer(latency_ms=1, jitter_ms=0, failure_rate=1.0) as server:
+        result = measure(server, payload_mb=1, streams=2)
+    assert not result.success and result.bytes_received == 0
+    assert '503' in result.error
+
+
+def test_top_k_picks_fastest_successful_configs():
+    configs = [SimpleNamespace(name=f"c{i}") for i in range(5)]
+    results = [SimpleNamespace(config=configs[0], success=True, delay=300.0),
+               SimpleNamespace(config=configs[1], success=False, delay=float('inf')),
+               SimpleNamespace(config=configs[2], success=True, delay=100.0),
+               SimpleNamespace(config=configs[3], success=True, delay=200.0),
+               SimpleNamespace(config=configs[4], success=False, delay=1.0)]
+    assert select_top_k(results, 2) == [configs[2], configs[3]]
+    assert select_top_k(results, 10) == [configs[2], configs[3], configs[0]]
+    assert select_top_k(results, 0) == []
+
+
+def test_throughput_tester_measures_each_top_config():
+    configs = [processor.process_single_config(f"trojan://pw{i}@1.2.3.{i}:443#c{i}") for i in range(3)]
+    with StandInServer(latency_ms=1, jitter_ms=0) as server:
+        tester = ThroughputTester(configs, payload_url=PAYLOAD_URL, payload_mb=0.5, streams=2,
+                                  rate_limit_mbps=0)
+        tester._get_proxy_url = lambda config: server.proxy_url
+        measured = []
+        tester.throughput_result.connect(measured.append)
+        asyncio.run(tester.run_tests())
+    assert [result.config for result in measured] == configs
+    assert all(result.success and result.bytes_received == 512 * 1024 for result in measured)
@@ -0,0 +1,79 @@
+import pytest
+
+from config_processor import TrojanParser, VlessParser, _parse_query
+from transport_profile import TransportProfile, profile_from_params
+
+trojan = TrojanParser()
+vless = VlessParser()
+
+
+@pytest.mark.parametrize('uri, expected', [
+    ("trojan://pw@Example.COM:443", ('pw', 'example.com', 443, '', '')),
+    ("trojan://pw@1.2.3.4:8443/?sni=a#name", ('pw', '1.2.3.4', 8443, 'sni=a', 'name')),
+    ("trojan://p%40ss%3Aw@h:1", ('p@ss:w', 'h', 1, '', '')),
+    ("trojan://a@b@h:65535", ('a@b', 'h', 65535, '', '')),
+    ("trojan://pw@[2001:DB8:0:0::1]:443?x=1#n", ('pw', '2001:db8::1', 443, 'x=1', 'n')),
+    ("trojan://pw@h:443#a#b", ('pw', 'h', 443, '', 'a#b')),
+])
+def test_split(uri, expected):
+    assert trojan._split(uri) == expected
+
+
+@pytest.mark.parametrize('uri', [
+    "trojan://pw@h:0",
+    "trojan://pw@h:65536",
+    "trojan://pw@h:-1",
+    "trojan://pw@h:",
+    "trojan://pw@h",
+    "trojan://pw@h:44x",
+    "trojan://h:443",
+    "trojan://@h:443",
+    "trojan://pw@[2001:db8::1]",
+    "trojan://pw@2001:db8::1:443",
+])
+def test_split_rejects_invalid(uri):
+    assert trojan._split(uri) is None
+    assert trojan.scan(uri) is None
+
+
+def test_split_rejects_invalid_ipv6():
+    assert trojan.scan("trojan://pw@[not:an:ip]:443") is None
+
+
+def test_scan_name_from_fragment():
+    assert trojan.scan("trojan://pw@h:443#%F0%9F%87%A9%F0%9F%87%AA%20DE").name == "\U0001F1E9\U0001F1EA DE"
+    assert trojan.scan("trojan://pw@h:443#a+b").name == "a+b"
+    assert trojan.scan("trojan://pw@h:443").name == "Trojan-h"
+    assert vless.scan("vless://id@[::1]:443").server == "::1"
+
+
+def test_parse_query():
+    assert _parse_query("a=1&b=x%2By+z&&c&path=%2Fws%3Fed%3D2048") == {
+        'a': '1', 'b': 'x+y+z', 'c': '', 'path': '/ws?ed=2048'}
+    assert _parse_query("") == {}
+    assert _parse_query("k=a=b") == {'k': 'a=b'}
+
+
+def test_profile_from_params():
+    profile = profile_from_params({'type': 'ws', 'security': 'tls', 'sni': 's.com',
+                                   'alpn': 'h2, http/1.1,', 'fp': 'chrome', 'path': '/x'})
+    assert profile == TransportProfile(network='ws', security='tls', sni='s.com', path='/x',
+                                       alpn=('h2', 'http/1.1'), fingerprint='chrome')
+    # پروفایل‌های برابر یک نمونه مشترک هستند
+    assert profile_from_params({'type': 'ws', 'security': 'tls', 'sni': 's.com', 'alpn': 'h2,http/1.1',
+                                'fp': 'chrome', 'path': '/x'}) is profile
+
+
+def test_profile_defaults_per_scheme():
+    assert profile_from_params({}) == TransportProfile()
+    assert profile_from_params({}, 'tls', 'h.com') == TransportProfile(security='tls', sni='h.com')
+    assert profile_from_params({'security': 'none'}, 'tls', 'h.com') == TransportProfile()
+    assert trojan.decode("trojan://pw@h.com:443")['transport'].security == 'tls'
+    assert vless.decode("vless://id@h.com:443")['transport'].security == 'none'
+
+
+def test_decode_keeps_extra_params():
+    raw = vless.decode("vless://id@h:443?type=grpc&serviceName=svc&encryption=none&flow=xtls-rprx-vision")
+    assert raw['uuid'] == 'id' and raw['port'] == 443
+    assert raw['transport'].service_name == 'svc'
+    assert raw['params'] == {'encryption': 'none', 'flow': 'xtls-rprx-vision'}
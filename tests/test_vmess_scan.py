@@ -0,0 +1,48 @@
+import base64
+import json
+
+import pytest
+
+from config_processor import VmessParser
+
+
+def vmess(payload) -> str:
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    return "vmess://" + base64.b64encode(payload.encode()).decode()
+
+
+def scan(payload):
+    return VmessParser().scan(vmess(payload))
+
+
+def test_key_is_not_matched_inside_values():
+    config = scan('{"ps":"add","v":"9.9.9.9","add":"1.2.3.4","port":"443"}')
+    assert (config.server, config.port, config.name) == ('1.2.3.4', 443, 'add')
+
+
+def test_escaped_key_inside_string_is_ignored():
+    config = scan('{"ps":"x,\\"add\\":\\"6.6.6.6\\"","add":"1.2.3.4","port":443}')
+    assert config.server == '1.2.3.4' and config.name == 'x,"add":"6.6.6.6"'
+
+
+def test_nested_object_falls_back_to_json():
+    config = scan({"x": {"add": "6.6.6.6"}, "add": "1.2.3.4", "port": 8443, "ps": "n"})
+    assert (config.server, config.port) == ('1.2.3.4', 8443)
+
+
+@pytest.mark.parametrize('payload', [
+    {"ps": "n", "port": 443},
+    {"add": "1.2.3.4", "ps": "n"},
+    {"add": "", "port": 443},
+    {"add": "1.2.3.4", "port": 70000},
+    {"add": "1.2.3.4", "port": 0},
+    {"add": "1.2.3.4", "port": True},
+])
+def test_incomplete_or_invalid_payload_is_rejected(payload):
+    assert scan(payload) is None
+
+
+def test_null_name_uses_default():
+    config = scan({"ps": None, "add": "1.2.3.4", "port": 443})
+    assert config.name == "Vmess-1.2.3.4"
@@ -0,0 +1,144 @@
+# throughput.py
+import asyncio
+import heapq
+import statistics
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from config_processor import ConfigData
+
+# مقصد پیش‌فرض دانلود؛ {bytes} با حجم هر جریان جایگزین می‌شود
+DEFAULT_PAYLOAD_URL = 'http://speed.cloudflare.com/__down?bytes={bytes}'
+DEFAULT_PAYLOAD_MB = 10
+DEFAULT_STREAMS = 4
+DEFAULT_TOP_K = 5
+# سقف پهنای باند کل تست سرعت تا خط اینترنت اشباع نشود
+DEFAULT_RATE_LIMIT_MBPS = 50
+CHUNK_SIZE = 64 * 1024
+# فاصله بیش از این مقدار بین دو بسته دریافتی توقف حساب می‌شود (ثانیه)
+STALL_SECONDS = 0.5
+MAX_DURATION = 15.0
+
+
+@dataclass
+class ThroughputResult:
+    config: ConfigData
+    success: bool
+    mbps: float = 0.0
+    bytes_received: int = 0
+    duration: float = 0.0     # ثانیه، از اولین بایت تا آخرین بایت
+    stall_time: float = 0.0   # مجموع زمان‌هایی که هیچ جریانی داده دریافت نکرد
+    jitter_ms: float = 0.0    # انحراف معیار فاصله بین بسته‌های هر جریان
+    streams: int = 0
+    error: Optional[str] = None
+
+
+class TokenBucket:
+    """محدودکننده نرخ مشترک بین همه جریان‌ها (بایت بر ثانیه)
+
+    هر فراخوانی take یک بازه زمانی به اندازه سهم خودش رزرو می‌کند
+    (الگوریتم GCRA) و فقط تا رسیدن همان بازه منتظر می‌ماند.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        # ظرفیت کوچک (حدود ۵۰ms) تا جهش ابتدایی از سقف عبور نکند
+        self.capacity = burst if burst is not None else max(rate / 20, CHUNK_SIZE)
+        # زمانی که همه بایت‌های رزروشده تا آن لحظه مجاز می‌شوند
+        self._next_free = time.monotonic()
+
+    @classmethod
+    def from_mbps(cls, mbps: float) -> Optional['TokenBucket']:
+        return cls(mbps * 1_000_000 / 8) if mbps > 0 else None
+
+    def reserve(self, amount: int) -> float:
+        """رزرو بازه برای amount بایت؛ مدت انتظار همین فراخوانی را برمی‌گرداند"""
+        now = time.monotonic()
+        # بسته‌های بزرگ‌تر از ظرفیت سطل هم پذیرفته می‌شوند و فقط خودشان منتظر می‌مانند
+        self._next_free = max(self._next_free, now) + amount / self.rate
+        return max(0.0, self._next_free - self.capacity / self.rate - now)
+
+    async def take(self, amount: int):
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def select_top_k(results: Sequence, k: int) -> List[ConfigData]:
+    """k کانفیگ موفق با کمترین تاخیر برای مرحله تست سرعت"""
+    fastest = heapq.nsmallest(k, (r for r in results if r.success), key=lambda r: r.delay)
+    return [r.config for r in fastest]
+
+
+async def _read_stream(session: aiohttp.ClientSession, url: str, proxy: str,
+                       bucket: Optional[TokenBucket], deadline: float) -> List[Tuple[float, int]]:
+    """دانلود یک جریان و ثبت زمان دریافت هر بسته"""
+    arrivals: List[Tuple[float, int]] = []
+    async with session.get(url, proxy=proxy) as response:
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(
+                response.request_info, response.history, status=response.status
+            )
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            arrivals.append((time.perf_counter(), len(chunk)))
+            if bucket is not None:
+                await bucket.take(len(chunk))
+            if time.perf_counter() >= deadline:
+                break
+    return arrivals
+
+
+def summarize(config: ConfigData, streams: List[List[Tuple[float, int]]]) -> ThroughputResult:
+    timeline = sorted(arrival for stream in streams for arrival in stream)
+    if len(timeline) < 2:
+        return ThroughputResult(config, False, streams=len(streams), error="No data received")
+    total = sum(size for _, size in timeline)
+    # بایت‌های اولین بسته قبل از شروع اندازه‌گیری رسیده‌اند
+    duration = timeline[-1][0] - timeline[0][0]
+    gaps = [b[0] - a[0] for a, b in zip(timeline, timeline[1:])]
+    stall = sum(gap for gap in gaps if gap > STALL_SECONDS)
+    stream_gaps = [
+        (b[0] - a[0]) * 1000
+        for stream in streams for a, b in zip(stream, stream[1:])
+    ]
+    return ThroughputResult(
+        config=config,
+        success=True,
+        mbps=(total - timeline[0][1]) * 8 / duration / 1_000_000 if duration > 0 else 0.0,
+        bytes_received=total,
+        duration=duration,
+        stall_time=stall,
+        jitter_ms=statistics.pstdev(stream_gaps) if len(stream_gaps) > 1 else 0.0,
+        streams=len(streams),
+    )
+
+
+async def measure_throughput(config: ConfigData, proxy: str,
+                             payload_url: str = DEFAULT_PAYLOAD_URL,
+                             payload_mb: float = DEFAULT_PAYLOAD_MB,
+                             streams: int = DEFAULT_STREAMS,
+                             bucket: Optional[TokenBucket] = None,
+                             max_duration: float = MAX_DURATION) -> ThroughputResult:
+    """دانلود موازی یک payload از طریق پروکسی کانفیگ و اندازه‌گیری سرعت پایدار"""
+    url = payload_url.format(bytes=int(payload_mb * 1024 * 1024 / streams))
+    timeout = aiohttp.ClientTimeout(total=max_duration + 10, sock_read=max_duration)
+    connector = aiohttp.TCPConnector(limit=streams)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            deadline = time.perf_counter() + max_duration
+            results = await asyncio.gather(
+                *(_read_stream(session, url, proxy, bucket, deadline) for _ in range(streams)),
+                return_exceptions=True,
+            )
+    except Exception as e:
+        return ThroughputResult(config, False, streams=streams, error=str(e))
+    received = [r for r in results if not isinstance(r, BaseException)]
+    if not received:
+        error = results[0]
+        if isinstance(error, asyncio.TimeoutError):
+            return ThroughputResult(config, False, streams=streams, error="Timeout")
+        return ThroughputResult(config, False, streams=streams, error=str(error) or type(error).__name__)
+    return summarize(config, received)
@@ -0,0 +1,70 @@
+# transport_profile.py
+from dataclasses import asdict, dataclass
+from typing import Dict, Mapping, Tuple
+
+# پارامترهای query که در پروفایل مشترک قرار می‌گیرند (نام در URI ← نام فیلد)
+PROFILE_PARAMS = {
+    'type': 'network',
+    'security': 'security',
+    'sni': 'sni',
+    'host': 'host',
+    'path': 'path',
+    'alpn': 'alpn',
+    'fp': 'fingerprint',
+    'serviceName': 'service_name',
+    'headerType': 'header_type',
+}
+# سقف تعداد پروفایل‌های یکتا؛ بیشتر از این بدون اشتراک ساخته می‌شوند
+MAX_INTERNED = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class TransportProfile:
+    """پارامترهای انتقال و TLS یک کانفیگ؛ تغییرناپذیر و بین کانفیگ‌ها مشترک"""
+    network: str = 'tcp'
+    security: str = 'none'
+    sni: str = ''
+    host: str = ''
+    path: str = ''
+    alpn: Tuple[str, ...] = ()
+    fingerprint: str = ''
+    service_name: str = ''
+    header_type: str = ''
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data['alpn'] = list(self.alpn)
+        return data
+
+
+_interned: Dict[TransportProfile, TransportProfile] = {}
+
+
+def intern_profile(profile: TransportProfile) -> TransportProfile:
+    """برگرداندن نمونه مشترک پروفایل‌های برابر"""
+    shared = _interned.get(profile)
+    if shared is not None:
+        return shared
+    if len(_interned) < MAX_INTERNED:
+        _interned[profile] = profile
+    return profile
+
+
+def profile_from_params(params: Mapping[str, str], default_security: str = 'none',
+                        server: str = '') -> TransportProfile:
+    """ساخت پروفایل از پارامترهای query رمزگشایی‌شده یک URI
+
+    default_security پیش‌فرض هر پروتکل است (مثلا tls برای trojan) و با
+    TLS فعال، SNI در صورت نبودن پارامتر sni برابر آدرس سرور می‌شود.
+    """
+    fields = {name: params[key] for key, name in PROFILE_PARAMS.items() if params.get(key)}
+    fields.setdefault('security', default_security)
+    if fields['security'] != 'none' and 'sni' not in fields and server:
+        fields['sni'] = server
+    if 'alpn' in fields:
+        fields['alpn'] = tuple(a.strip() for a in fields['alpn'].split(',') if a.strip())
+    return intern_profile(TransportProfile(**fields))
+
+
+def interned_count() -> int:
+    return len(_interned)